@@ -1 +1,2 @@
 from .notion_database_api_manager import NotionDatabaseApiManager
+from .async_notion_database_api_manager import AsyncNotionDatabaseApiManager
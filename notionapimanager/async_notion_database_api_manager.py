@@ -0,0 +1,349 @@
+import asyncio
+from typing import AsyncIterator, Dict, List
+
+from notionapimanager.base_notion_database_api_manager import BaseNotionDatabaseApiManager
+from notionapimanager.lazy_import import is_installed, LazyModule
+from notionapimanager.notion_property_encoder import PageRecord, PropertyValue
+
+httpx = LazyModule("httpx") if is_installed("httpx") else None
+
+
+class AsyncNotionDatabaseApiManager(BaseNotionDatabaseApiManager):
+    """Asyncio counterpart of :class:`~.notion_database_api_manager.NotionDatabaseApiManager`
+
+    Every method that talks to Notion API is a coroutine, so many of them can run concurrently on the same event loop.
+    It requires the optional dependency `httpx` (``pip install notionapimanager[async]``).
+    """
+
+    def __init__(self, integration_token, database_ids, **kwargs):
+        """Accepts the same arguments as :class:`~.base_notion_database_api_manager.BaseNotionDatabaseApiManager`"""
+        if httpx is None:  # pragma: no cover
+            raise ImportError("AsyncNotionDatabaseApiManager requires httpx: pip install notionapimanager[async]")
+
+        super().__init__(integration_token, database_ids, **kwargs)
+
+        self._client = None
+
+    async def connect(self):
+        """Perform preparation operations before communicating with Notion API
+
+        The schemas of all the databases are fetched concurrently.
+        """
+        self._prepare_connection()
+        self._client = self._create_client()
+
+        property_definitions = await asyncio.gather(
+            *(self._get_property_definitions(database_id) for database_id in self.database_ids)
+        )
+        self._property_types = {
+            database_id: self._get_property_types_from_definitions(definitions)
+            for database_id, definitions in zip(self.database_ids, property_definitions)
+        }
+
+    async def close(self):
+        """Release the connections opened against Notion API"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _create_client(self, transport=None):
+        if isinstance(self.timeout, tuple):
+            connect_timeout, read_timeout = self.timeout
+            timeout = httpx.Timeout(read_timeout, connect=connect_timeout)
+        else:
+            timeout = httpx.Timeout(self.timeout)
+
+        limits = httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size if self.keep_alive else 0
+        )
+        return httpx.AsyncClient(timeout=timeout, limits=limits, transport=transport)
+
+    async def _request(self, method, url, **kwargs):
+        tracker = self.instrumentation.track(method, url)
+        response = None
+        attempt = 0
+        idempotent = self._is_idempotent(method, url)
+        try:
+            while True:
+                if self._rate_limiter is not None:
+                    tracker.waited_for_rate_limit(await self._rate_limiter.acquire_async())
+
+                with tracker.attempt():
+                    response = await self._client.request(method, url, headers=self._headers, **kwargs)
+                if response.is_success:
+                    return response
+
+                delay = self._get_retry_delay(
+                    response.status_code, response.headers.get("Retry-After"), response.text, attempt, idempotent
+                )
+                tracker.retrying(delay)
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            if response is None:
+                tracker.finish(None)
+            else:
+                tracker.finish(response.status_code, len(response.request.content), len(response.content))
+
+    async def _get_property_definitions(self, database_id):
+        response = await self._request("GET", self.DATABASES_URL + database_id)
+        return self._parse_property_definitions(self._loads(response))
+
+    async def get_database(self, database_id, filter=None, sorts=None, page_size=None, output="pandas"):
+        """
+        Read Notion database and return a Pandas DataFrame
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param filter: condition the pages must meet, e.g. ``Property("Price") > 10``, or a raw Notion filter object
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time (Notion's default and maximum is 100)
+        :type page_size: int
+        :param output: ``"pandas"``, ``"compact"`` or ``"arrow"`` (see
+            :func:`~.notion_database_api_manager.NotionDatabaseApiManager.get_database`)
+        :type output: str
+        :return: dataframe of the database
+        :rtype: pd.DataFrame or pyarrow.Table
+        """
+        self._check_output_format(output)
+        query = self._create_query(database_id, filter, sorts, page_size)
+        builder = self._create_dataframe_builder(database_id)
+        async for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+            builder.add_pages(pages)
+
+        return self._format_output(database_id, builder.build(), output)
+
+    async def get_databases(self, database_ids=None, max_concurrency=None, output="pandas"):
+        """
+        Read several Notion databases concurrently, sharing the rate limiter of the manager
+
+        :param database_ids: ids of the databases. By default, the ones the manager was created with
+        :type database_ids: List[str]
+        :param max_concurrency: maximum number of databases read at a time. By default, the size of the connection pool
+        :type max_concurrency: int
+        :param output: ``"pandas"``, ``"compact"`` or ``"arrow"``, as in :func:`get_database`
+        :type output: str
+        :return: dataframe of each database, by id
+        :rtype: Dict[str, pd.DataFrame]
+        """
+        database_ids = self.database_ids if database_ids is None else database_ids
+        self._check_output_format(output)
+        semaphore = asyncio.Semaphore(max_concurrency or self.pool_size)
+
+        async def get_database(database_id):
+            async with semaphore:
+                return await self.get_database(database_id, output=output)
+
+        dataframes = await asyncio.gather(*(get_database(database_id) for database_id in database_ids))
+        return dict(zip(database_ids, dataframes))
+
+    async def get_records(self, database_id, filter=None, sorts=None, page_size=None) -> List[PageRecord]:
+        """
+        Read Notion database as a list of records, a light alternative to :func:`get_database` for small reads
+
+        Values are plain Python objects, without pandas (which is not even imported): strings for titles, texts,
+        selects, URLs and dates (the ISO 8601 start), floats or ints for numbers, bools for checkboxes, lists of page
+        ids for relations and the JSON value of the rest of the property types. Missing values are None.
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param filter: condition the pages must meet
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time
+        :type page_size: int
+        :return: id and property values of each page
+        :rtype: List[:class:`~.notion_property_encoder.PageRecord`]
+        """
+        query = self._create_query(database_id, filter, sorts, page_size)
+        records = []
+        async for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+            records.extend(self._decode_records(database_id, pages))
+
+        return records
+
+    async def iter_pages(self, database_id, filter=None, sorts=None, page_size=None) -> AsyncIterator[PageRecord]:
+        """
+        Read Notion database page by page, requesting the next segment of pages only when the previous one is consumed
+
+        Each segment is decoded at once, column by column, into the plain Python values described in
+        :func:`get_records`.
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param filter: condition the pages must meet
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time
+        :type page_size: int
+        :return: asynchronous iterator over the decoded pages of the database
+        :rtype: AsyncIterator[:class:`~.notion_property_encoder.PageRecord`]
+        """
+        query = self._create_query(database_id, filter, sorts, page_size)
+        async for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+            for record in self._decode_records(database_id, pages):
+                yield record
+
+    async def iter_dataframes(self, database_id, chunk_size=None, filter=None, sorts=None, page_size=None):
+        """
+        Read Notion database as a sequence of Pandas DataFrames, so only one chunk of it is held in memory at a time
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param chunk_size: number of rows of each DataFrame. By default, one DataFrame per segment returned by Notion
+        :type chunk_size: int
+        :param filter: condition the pages must meet
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time
+        :type page_size: int
+        :return: asynchronous iterator over dataframes with consecutive rows of the database
+        :rtype: AsyncIterator[pd.DataFrame]
+        """
+        query = self._create_query(database_id, filter, sorts, page_size)
+        builder = self._create_dataframe_builder(database_id)
+        async for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+            for page in pages:
+                builder.add_page(page)
+                if len(builder) == chunk_size:
+                    yield builder.build()
+                    builder = self._create_dataframe_builder(database_id)
+
+            if chunk_size is None and len(builder):
+                yield builder.build()
+                builder = self._create_dataframe_builder(database_id)
+
+        if len(builder):
+            yield builder.build()
+
+    async def _get_all_segments(self, database_query_url, query=None):
+        next_cursor = None
+        has_more = True
+        while has_more:
+            response = await self._request(
+                "POST",
+                database_query_url,
+                content=self._dumps(self._get_results_segment_body(next_cursor, query))
+            )
+            pages, has_more, next_cursor = self._parse_results_segment(self._loads(response))
+            yield pages
+
+    async def create_page(self, database_id, page_properties: List[PropertyValue]):
+        """
+        Add Notion page to database
+
+        :param database_id: id of database you want to add a page to
+        :type database_id: str
+        :param page_properties: property values of new page
+        :type page_properties: List[:class:`~.notion_property_encoder.PropertyValue`]
+        :return: id of the new page
+        :rtype: str
+        """
+        new_page_data = self._create_page_properties(database_id, page_properties)
+
+        response = await self._request("POST", self.PAGES_URL, content=self._dumps(new_page_data))
+        return self._loads(response).get("id", None)
+
+    async def update_page(self, database_id, page_id, page_properties: List[PropertyValue]):
+        """
+        Change some properties of a Notion page of a database
+
+        :param database_id: id of the database of the page
+        :type database_id: str
+        :param page_id: id of the page
+        :type page_id: str
+        :param page_properties: new values of the properties to change
+        :type page_properties: List[:class:`~.notion_property_encoder.PropertyValue`]
+        :return: id of the updated page
+        :rtype: str
+        """
+        page_data = self._update_page_properties(database_id, page_properties)
+
+        response = await self._request("PATCH", self._get_page_url(page_id), content=self._dumps(page_data))
+        return self._loads(response).get("id", None)
+
+    async def archive_page(self, page_id):
+        """
+        Archive (delete) a Notion page
+
+        :param page_id: id of the page
+        :type page_id: str
+        :return: id of the archived page
+        :rtype: str
+        """
+        response = await self._request("PATCH", self._get_page_url(page_id), content=self._dumps({"archived": True}))
+        return self._loads(response).get("id", None)
+
+    async def get_page_blocks(self, page_id):
+        """
+        Get page blocks, following the pagination of the results
+
+        :param page_id: id of the page (or of a block, to get its children)
+        :type page_id: str
+        :return: list of blocks of the page
+        :rtype: list
+        """
+        url = self.BLOCKS_URL_TEMPLATE.format(page_id=page_id)
+        blocks = []
+        next_cursor = None
+        has_more = True
+        while has_more:
+            response = await self._request("GET", url, params=self._get_block_children_params(next_cursor))
+            segment, has_more, next_cursor = self._parse_results_segment(self._loads(response))
+            blocks.extend(segment)
+
+        return blocks
+
+    async def get_page_block_tree(self, page_id, max_depth=None, max_concurrency=None) -> List[dict]:
+        """
+        Get the blocks of a page together with their nested children
+
+        Children are read breadth-first, one level of the tree at a time, requesting the children of several blocks
+        concurrently. Each block becomes a compact node (a dict with its ``id``, ``type``, type specific ``content``,
+        ``has_children`` and the list of ``children`` nodes).
+
+        :param page_id: id of the page
+        :type page_id: str
+        :param max_depth: number of levels of blocks read. By default, the whole tree
+        :type max_depth: int
+        :param max_concurrency: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_concurrency: int
+        :return: nodes of the top level blocks of the page
+        :rtype: List[dict]
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or self.pool_size)
+
+        async def get_blocks(block_id):
+            async with semaphore:
+                return await self.get_page_blocks(block_id)
+
+        root: Dict[str, list] = {"children": []}
+        level = [(root, page_id)]
+        depth = 0
+        while level and (max_depth is None or depth < max_depth):
+            next_level = []
+            children = await asyncio.gather(*(get_blocks(block_id) for _, block_id in level))
+            for (parent, _), blocks in zip(level, children):
+                for block in blocks:
+                    node = self._create_block_node(block)
+                    parent["children"].append(node)
+                    if node["has_children"]:
+                        next_level.append((node, node["id"]))
+
+            level = next_level
+            depth += 1
+
+        return root["children"]
@@ -0,0 +1,476 @@
+from __future__ import annotations
+
+from datetime import datetime
+import hashlib
+import json
+from typing import Dict, List, NamedTuple, Optional, Tuple, TYPE_CHECKING, Union
+
+from notionapimanager.compact_output import compact_dataframe, OUTPUT_FORMATS, to_arrow_table
+from notionapimanager.dataframe_builder import DataFrameBuilder
+from notionapimanager.instrumentation import Instrumentation
+from notionapimanager.json_backend import get_json_backend
+from notionapimanager.lazy_import import LazyModule
+from notionapimanager.notion_filter import Filter, Sort
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder, ColumnarNotionPropertyEncoder, \
+    NotionPropertyEncoder, PageRecord, PropertyDefinition, PropertyType, PropertyValue
+from notionapimanager.rate_limiter import RateLimiter
+from notionapimanager.retry_policy import DEFAULT_RETRY_POLICY, NotionApiError
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+
+
+class SyncResult(NamedTuple):
+    """Updated copy of a database and the `last_edited_time` watermark to use in the next synchronization"""
+    dataframe: pd.DataFrame
+    watermark: Optional[Union[str, datetime]]
+
+
+class PageOperationResult(NamedTuple):
+    """Outcome of one of the operations of a bulk request: either the id of the affected page or the error raised"""
+    page_id: Optional[str]
+    error: Optional[Exception] = None
+
+
+class UpsertResult(NamedTuple):
+    """Outcome of the operations sent to mirror a DataFrame into a database, one list per kind of operation"""
+    created: List[PageOperationResult]
+    updated: List[PageOperationResult]
+    archived: List[PageOperationResult]
+
+
+class UpsertPlan(NamedTuple):
+    """Operations needed to mirror a DataFrame into a database: bodies of the pages to create, (page id, body) of the
+    pages to update and ids of the pages to archive
+    """
+    to_create: List[dict]
+    to_update: List[Tuple[str, dict]]
+    to_archive: List[str]
+
+
+class BaseNotionDatabaseApiManager:
+    """Transport independent logic shared by the synchronous and asynchronous managers
+
+    It knows how to build Notion API requests and how to interpret their responses, but never performs I/O itself.
+    """
+
+    DATABASES_URL = 'https://api.notion.com/v1/databases/'
+    PAGES_URL = 'https://api.notion.com/v1/pages'
+    BLOCKS_URL_TEMPLATE = "https://api.notion.com/v1/blocks/{page_id}/children"
+    NOTION_VERSION = "2021-05-13"
+
+    def __init__(
+        self, integration_token, database_ids, pool_size=10, timeout=30, keep_alive=True, requests_per_second=3,
+        retry_policy=DEFAULT_RETRY_POLICY, cache=None, instrumentation=None, base_url=None, json_backend=None
+    ):
+        """
+        :param integration_token: Notion integration token
+        :type integration_token: str
+        :param database_ids: ids of the databases the manager works with
+        :type database_ids: List[str]
+        :param pool_size: maximum number of connections kept open against Notion API
+        :type pool_size: int
+        :param timeout: seconds to wait for the server (or a (connect, read) tuple, as accepted by requests)
+        :type timeout: float or tuple
+        :param keep_alive: whether connections are reused between requests
+        :type keep_alive: bool
+        :param requests_per_second: maximum sustained rate of requests to Notion API (which allows about 3).
+            None disables the limit
+        :type requests_per_second: float
+        :param retry_policy: when and after how long rate limited and failed requests are retried
+        :type retry_policy: :class:`~.retry_policy.RetryPolicy`
+        :param cache: on-disk cache where copies of the databases read are kept. None disables caching
+        :type cache: :class:`~.database_cache.DatabaseCache`
+        :param instrumentation: receives the measurements of every request and decoding. By default, a new one
+        :type instrumentation: :class:`~.instrumentation.Instrumentation`
+        :param base_url: root of the API URLs, e.g. to use a local fake server. By default, https://api.notion.com/v1
+        :type base_url: str
+        :param json_backend: serializes request bodies and parses responses: a backend instance or ``"json"`` (the
+            standard library, by default), ``"orjson"`` or ``"auto"`` (`orjson` when installed)
+        :type json_backend: :class:`~.json_backend.JsonBackend` or str
+        """
+        self.integration_token = integration_token
+        self.database_ids = database_ids
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+
+        self.retry_policy = retry_policy
+        self.cache = cache
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.json_backend = get_json_backend(json_backend)
+
+        if base_url is not None:
+            base_url = base_url.rstrip("/")
+            self.DATABASES_URL = base_url + "/databases/"
+            self.PAGES_URL = base_url + "/pages"
+            self.BLOCKS_URL_TEMPLATE = base_url + "/blocks/{page_id}/children"
+
+        self._rate_limiter = RateLimiter(requests_per_second) if requests_per_second else None
+        self._headers = None
+        self._encoder = None
+        self._property_types = None
+        self._column_decoders = {}
+        self._column_encoders = {}
+        self._relation_indexes: Dict[str, pd.DataFrame] = {}
+
+    def _prepare_connection(self):
+        self._headers = {
+            "Authorization": "Bearer " + self.integration_token,
+            "Content-Type": "application/json",
+            "Notion-Version": self.NOTION_VERSION
+        }
+        if not self.keep_alive:
+            self._headers["Connection"] = "close"
+        self._encoder = NotionPropertyEncoder()
+
+    def _dumps(self, value) -> bytes:
+        return self.json_backend.dumps(value)
+
+    def _loads(self, response):
+        return self.json_backend.loads(response.content)
+
+    def _get_retry_delay(self, status_code, retry_after, body, attempt, idempotent=True):
+        """Seconds to wait before retrying a failed request. If it must not be retried, raise the error instead
+
+        When the request was rate limited, the shared rate limiter is paused instead, so that the requests sent from
+        other threads or coroutines wait as well. In that case, 0 is returned.
+        """
+        delay = self.retry_policy.get_delay(status_code, retry_after, attempt, idempotent)
+        if delay is None:
+            raise NotionApiError.from_response_body(status_code, body)
+
+        if status_code == 429 and self._rate_limiter is not None:
+            self._rate_limiter.pause(delay)
+            return 0
+
+        return delay
+
+    @staticmethod
+    def _is_idempotent(method, url):
+        """Whether a request can be sent again safely. Database queries are the only POST requests that only read"""
+        return method != "POST" or url.endswith("/query")
+
+    def _get_property_types(self, database_id):
+        return self._property_types[database_id]
+
+    @staticmethod
+    def _get_property_types_from_definitions(property_definitions: List[PropertyDefinition]):
+        return {
+            property_definition.name: property_definition.property_type
+            for property_definition in property_definitions
+        }
+
+    @staticmethod
+    def _parse_property_definitions(database: dict) -> List[PropertyDefinition]:
+        def get_property_type(property_type_str):
+            if PropertyType.has_value(property_type_str):
+                return PropertyType(property_type_str)
+            else:
+                return PropertyType.UNKNOWN
+
+        return [
+            PropertyDefinition(prop_name, get_property_type(prop_object["type"]))
+            for prop_name, prop_object in database["properties"].items()
+        ]
+
+    def _get_database_query_url(self, database_id):
+        return self.DATABASES_URL + database_id + "/query"
+
+    def _create_query(self, database_id, filter=None, sorts=None, page_size=None):
+        """Body of a database query. Filters and sorts may be given as objects of this package or as raw JSON"""
+        query = {}
+        if filter is not None:
+            query["filter"] = (
+                filter.compile(self._get_property_types(database_id)) if isinstance(filter, Filter) else filter
+            )
+        if sorts:
+            query["sorts"] = [sort.compile() if isinstance(sort, Sort) else sort for sort in sorts]
+        if page_size is not None:
+            query["page_size"] = page_size
+
+        return query
+
+    def _create_partition_query(self, database_id, partition_filter: Filter, filter=None, sorts=None, page_size=None):
+        """Body of a query for one partition of a database, restricted to the pages that also meet `filter`"""
+        query = self._create_query(database_id, partition_filter, sorts, page_size)
+        if filter is not None:
+            query["filter"] = {"and": [query["filter"], self._create_query(database_id, filter)["filter"]]}
+
+        return query
+
+    @staticmethod
+    def _get_partition_boundaries(minimum, maximum, num_partitions, property_type: PropertyType) -> list:
+        """Values splitting the range between `minimum` and `maximum` into `num_partitions` ranges of equal width
+
+        Notion compares dates by day, so the boundaries of dates are whole days, interpolated between the days of the
+        extremes (which may mix dates without time and times with an offset).
+        """
+        if property_type == PropertyType.DATE:
+            minimum, maximum = (pd.Timestamp(pd.Timestamp(extreme).date()) for extreme in (minimum, maximum))
+        boundaries = [minimum + (maximum - minimum) * number / num_partitions for number in range(1, num_partitions)]
+        if property_type == PropertyType.DATE:
+            return sorted({boundary.date() for boundary in boundaries if boundary.date() > minimum.date()})
+
+        return sorted(set(boundaries))
+
+    @staticmethod
+    def _take_unique_pages(pages):
+        """Skip pages already taken, which may be returned by two partitions when edited during the scan"""
+        page_ids = set()
+        for page in pages:
+            if page["id"] not in page_ids:
+                page_ids.add(page["id"])
+                yield page
+
+    @staticmethod
+    def _get_results_segment_body(start_cursor, query=None):
+        body = dict(query) if query else {}
+        if start_cursor:
+            body["start_cursor"] = start_cursor
+
+        return body
+
+    @staticmethod
+    def _parse_results_segment(data):
+        pages = data["results"]
+        next_cursor = data.get("next_cursor")
+        has_more = data.get("has_more", False)
+
+        return pages, has_more, next_cursor
+
+    @staticmethod
+    def _get_block_children_params(start_cursor):
+        return {"start_cursor": start_cursor} if start_cursor else None
+
+    @staticmethod
+    def _create_block_node(block: dict) -> dict:
+        """Compact node of a block tree: its id, type, type specific content and children (if they were read)"""
+        return {
+            "id": block["id"],
+            "type": block["type"],
+            "content": block.get(block["type"]),
+            "has_children": block.get("has_children", False),
+            "children": [],
+        }
+
+    LAST_EDITED_TIME_DESCENDING_QUERY = {"sorts": [{"timestamp": "last_edited_time", "direction": "descending"}]}
+
+    @staticmethod
+    def _get_database_version(database, newest_pages):
+        """Identify the state of a database by its own `last_edited_time` and that of its most recently edited page
+
+        The former changes with the schema and the latter with the contents, so both are needed.
+        """
+        newest_page_edition = newest_pages[0]["last_edited_time"] if newest_pages else None
+        return f"{database.get('last_edited_time')}|{newest_page_edition}"
+
+    @classmethod
+    def _get_last_edited_time(cls, database, newest_pages):
+        """Time of the most recent edit of a database, either of its schema or of its contents, if known"""
+        editions = [database.get("last_edited_time")] + [page.get("last_edited_time") for page in newest_pages[:1]]
+        editions = [cls._to_utc_timestamp(edition) for edition in editions if edition is not None]
+        return max(editions) if editions else None
+
+    @staticmethod
+    def _is_snapshot_current(snapshot, version, last_edited_time) -> bool:
+        """Whether a cached snapshot still holds the contents of a database, given its current version
+
+        Notion truncates `last_edited_time` to minutes, so an edit made later during the minute the snapshot was
+        stored keeps the same version. Unless the snapshot was stored after the minute of the last edit, it is stale.
+        """
+        if snapshot.version != version:
+            return False
+        if last_edited_time is None:
+            return True
+
+        end_of_last_edit_minute = last_edited_time.floor("min") + pd.Timedelta(minutes=1)
+        return pd.Timestamp(snapshot.stored_at, unit="s", tz="UTC") >= end_of_last_edit_minute
+
+    @staticmethod
+    def _to_utc_timestamp(value):
+        timestamp = pd.Timestamp(value)
+        return timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp
+
+    @classmethod
+    def _take_pages_edited_since(cls, pages_by_last_edition, since):
+        """Take pages, sorted by descending `last_edited_time`, until reaching one edited before `since`
+
+        Notion truncates `last_edited_time` to minutes, so pages edited during the minute of `since` are taken too.
+        """
+        since = cls._to_utc_timestamp(since) if since is not None else None
+        for page in pages_by_last_edition:
+            if since is not None and cls._to_utc_timestamp(page["last_edited_time"]) < since:
+                return
+            yield page
+
+    @staticmethod
+    def _merge_updated_pages(previous_dataframe, updated_dataframe):
+        if previous_dataframe is None:
+            return updated_dataframe
+        if updated_dataframe.empty:
+            return previous_dataframe
+
+        return pd.concat([
+            previous_dataframe.drop(index=updated_dataframe.index, errors="ignore"),
+            updated_dataframe
+        ])
+
+    def _get_column_decoder(self, database_id):
+        """Decoding plan of the database, compiled again only when its schema changes"""
+        property_types = self._get_property_types(database_id)
+        column_decoder = self._column_decoders.get(database_id)
+        if column_decoder is None or column_decoder.property_types is not property_types:
+            column_decoder = self._column_decoders[database_id] = ColumnarNotionPropertyDecoder(property_types)
+
+        return column_decoder
+
+    def _decode_records(self, database_id, pages: List[dict]) -> List[PageRecord]:
+        """Decode pages into records of plain Python values, extracted column by column without pandas"""
+        column_decoder = self._get_column_decoder(database_id)
+        property_names = dict.fromkeys(property_name for page in pages for property_name in page["properties"])
+        columns = {
+            property_name: column_decoder.extract_column(
+                property_name, [page["properties"].get(property_name) for page in pages]
+            )
+            for property_name in property_names
+        }
+        return [
+            PageRecord(page.get("id", None), {property_name: column[row] for property_name, column in columns.items()})
+            for row, page in enumerate(pages)
+        ]
+
+    def _create_dataframe_builder(self, database_id):
+        return DataFrameBuilder(self._get_column_decoder(database_id), self.instrumentation)
+
+    @staticmethod
+    def _check_output_format(output):
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output!r}, expected one of {OUTPUT_FORMATS}")
+
+    def _format_output(self, database_id, dataframe: pd.DataFrame, output):
+        """Convert a decoded database into the requested output format: pandas, compact or arrow"""
+        if output == "compact":
+            return compact_dataframe(dataframe, self._get_property_types(database_id))
+        if output == "arrow":
+            return to_arrow_table(dataframe, self._get_property_types(database_id))
+
+        return dataframe
+
+    @staticmethod
+    def _join_relations(dataframe: pd.DataFrame, column, target: pd.DataFrame, target_columns=None) -> pd.DataFrame:
+        """Explode a relation column and join each related page id with its row in `target`, indexed by page id"""
+        target_columns = list(target.columns) if target_columns is None else list(target_columns)
+        exploded = dataframe.explode(column)
+        related = target[target_columns].reindex(exploded[column].to_numpy())
+        related.columns = [f"{column}.{target_column}" for target_column in target_columns]
+        related.index = exploded.index
+        return pd.concat([exploded, related], axis=1)
+
+    def _build_dataframe(self, database_id, pages_raw):
+        builder = self._create_dataframe_builder(database_id)
+        builder.add_pages(pages_raw)
+        return builder.build()
+
+    def _get_column_encoder(self, database_id, columns):
+        """Encoding plan of a set of columns of the database, compiled again only when its schema changes"""
+        property_types = self._get_property_types(database_id)
+        key = (database_id, tuple(columns))
+        column_encoder = self._column_encoders.get(key)
+        if column_encoder is None or column_encoder.property_types is not property_types:
+            column_encoder = self._column_encoders[key] = ColumnarNotionPropertyEncoder(property_types, columns)
+
+        return column_encoder
+
+    def _create_pages_properties(self, database_id, dataframe: pd.DataFrame) -> List[dict]:
+        """Request bodies creating a page for each row of a DataFrame, whose missing values are left empty"""
+        parent = {"database_id": database_id}
+        return [
+            {"parent": parent, "properties": properties}
+            for properties in self._get_column_encoder(database_id, dataframe.columns).encode_dataframe(dataframe)
+        ]
+
+    @staticmethod
+    def _hash_properties(properties: Dict[str, dict]) -> str:
+        return hashlib.sha1(json.dumps(properties, sort_keys=True).encode()).hexdigest()
+
+    @staticmethod
+    def _check_upsert_key(dataframe: pd.DataFrame, key):
+        if key not in dataframe.columns:
+            raise ValueError(f"The DataFrame has no key column {key!r}")
+        if dataframe[key].isna().any() or dataframe[key].duplicated().any():
+            raise ValueError(f"The values of the key column {key!r} must be unique and not missing")
+
+    def _plan_upsert(
+        self, database_id, current: pd.DataFrame, dataframe: pd.DataFrame, key, archive_missing=True
+    ) -> UpsertPlan:
+        """Compare the rows of a DataFrame (desired state) with the current pages of the database (indexed by page id),
+        matched by the value of the `key` column, through the hashes of their normalized encoded properties
+        """
+        column_encoder = self._get_column_encoder(database_id, dataframe.columns)
+        desired_properties = column_encoder.encode_dataframe(dataframe)
+        current_properties = column_encoder.encode_dataframe(current.reindex(columns=dataframe.columns))
+
+        page_ids_by_key = {}
+        to_archive = []
+        for page_id, page_key, properties in zip(current.index, current.reindex(columns=[key])[key], current_properties):
+            if self._is_missing(page_key) or page_key in page_ids_by_key:
+                to_archive.append(page_id)
+            else:
+                page_ids_by_key[page_key] = (page_id, self._hash_properties(column_encoder.normalize(properties)))
+
+        parent = {"database_id": database_id}
+        to_create = []
+        to_update = []
+        for row_key, properties in zip(dataframe[key], desired_properties):
+            page_id, current_hash = page_ids_by_key.pop(row_key, (None, None))
+            if page_id is None:
+                to_create.append({"parent": parent, "properties": properties})
+            elif current_hash != self._hash_properties(column_encoder.normalize(properties)):
+                to_update.append((page_id, {"properties": dict(column_encoder.empty_values, **properties)}))
+
+        if archive_missing:
+            to_archive.extend(page_id for page_id, _ in page_ids_by_key.values())
+        else:
+            to_archive = []
+
+        return UpsertPlan(to_create, to_update, to_archive)
+
+    @staticmethod
+    def _is_missing(value):
+        try:
+            return bool(pd.isna(value))
+        except (TypeError, ValueError):
+            return False
+
+    def _encode_page_properties(self, database_id, page_properties: List[PropertyValue]):
+        property_types = self._get_property_types(database_id)
+        return {
+            page_property.name: self._encoder.encode(page_property.value, property_types[page_property.name])
+            for page_property in page_properties
+        }
+
+    def _create_page_properties(self, database_id, page_properties: List[PropertyValue]):
+        return {
+            "parent": {"database_id": database_id},
+            "properties": self._encode_page_properties(database_id, page_properties)
+        }
+
+    def _update_page_properties(self, database_id, page_properties: List[PropertyValue]):
+        return {"properties": self._encode_page_properties(database_id, page_properties)}
+
+    def _update_pages_properties(self, database_id, dataframe: pd.DataFrame) -> List[Tuple[str, dict]]:
+        """(page id, request body) updating each page of the index of a DataFrame, whose missing values are left
+        unchanged
+        """
+        return [
+            (page_id, {"properties": properties})
+            for page_id, properties in zip(
+                dataframe.index, self._get_column_encoder(database_id, dataframe.columns).encode_dataframe(dataframe)
+            )
+        ]
+
+    def _get_page_url(self, page_id):
+        return f"{self.PAGES_URL}/{page_id}"
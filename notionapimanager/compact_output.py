@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Dict, TYPE_CHECKING
+
+from notionapimanager.lazy_import import is_installed, LazyModule
+from notionapimanager.notion_property_encoder import PropertyType
+
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+else:
+    pd = LazyModule("pandas")
+    pa = LazyModule("pyarrow") if is_installed("pyarrow") else None
+
+
+OUTPUT_FORMATS = ("pandas", "compact", "arrow")
+
+_STRING_PROPERTY_TYPES = (PropertyType.TITLE, PropertyType.RICH_TEXT, PropertyType.URL)
+
+
+def _get_string_dtype():
+    return pd.StringDtype("pyarrow") if pa is not None else pd.StringDtype()
+
+
+def _compact_column(column: pd.Series, property_type) -> pd.Series:
+    if property_type == PropertyType.SELECT:
+        return column.astype("category")
+    if property_type in _STRING_PROPERTY_TYPES:
+        return column.astype(_get_string_dtype())
+    if property_type == PropertyType.CHECKBOX and column.dtype != bool:
+        return column.astype("boolean")
+
+    return column
+
+
+def compact_dataframe(dataframe: pd.DataFrame, property_types: Dict[str, PropertyType]) -> pd.DataFrame:
+    """
+    Convert the columns of a decoded database into memory efficient dtypes
+
+    Selects become categorical, titles, rich texts and URLs become strings (backed by Arrow when `pyarrow` is
+    installed) and checkboxes with missing values become nullable booleans. Numbers and dates already have native dtypes,
+    and the rest of the columns are left unchanged.
+
+    :param dataframe: database as returned by :func:`~.notion_database_api_manager.NotionDatabaseApiManager.get_database`
+    :type dataframe: pd.DataFrame
+    :param property_types: type of each property of the database
+    :type property_types: Dict[str, :class:`~.notion_property_encoder.PropertyType`]
+    :return: the compact DataFrame
+    :rtype: pd.DataFrame
+    """
+    return pd.DataFrame(
+        {name: _compact_column(column, property_types.get(name)) for name, column in dataframe.items()},
+        index=dataframe.index,
+        columns=dataframe.columns
+    )
+
+
+def to_arrow_table(dataframe: pd.DataFrame, property_types: Dict[str, PropertyType]) -> pa.Table:
+    """
+    Convert a decoded database into a `pyarrow.Table`, with the page ids in a ``page_id`` column
+
+    It requires the optional dependency `pyarrow` (``pip install notionapimanager[arrow]``).
+
+    :param dataframe: database as returned by :func:`~.notion_database_api_manager.NotionDatabaseApiManager.get_database`
+    :type dataframe: pd.DataFrame
+    :param property_types: type of each property of the database
+    :type property_types: Dict[str, :class:`~.notion_property_encoder.PropertyType`]
+    :return: the table, with dictionary encoded selects
+    :rtype: pyarrow.Table
+    """
+    if pa is None:  # pragma: no cover
+        raise ImportError("Arrow output requires pyarrow: pip install notionapimanager[arrow]")
+
+    dataframe = compact_dataframe(dataframe, property_types)
+    has_page_ids = not isinstance(dataframe.index, pd.RangeIndex)
+    return pa.Table.from_pandas(dataframe.rename_axis("page_id"), preserve_index=has_page_ids)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+from contextlib import closing
+import json
+import sqlite3
+import time
+from typing import Dict, NamedTuple, Optional, TYPE_CHECKING
+import zlib
+
+from notionapimanager.lazy_import import LazyModule
+from notionapimanager.notion_property_encoder import PropertyType
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+
+
+class CachedSnapshot(NamedTuple):
+    """Copy of a database stored in the cache
+
+    `version` identifies the state of the database when the copy was taken. `is_fresh` tells whether the copy is
+    younger than the time to live of the cache, so it can be used without revalidating it. `stored_at` is the time,
+    given by the clock of the cache, when the copy was stored or last revalidated.
+    """
+    dataframe: pd.DataFrame
+    version: str
+    is_fresh: bool
+    stored_at: float
+
+
+class DatabaseCache:
+    """On-disk cache of decoded database snapshots, database schemas and page contents, stored in a SQLite file
+
+    Snapshots older than `ttl` seconds are not discarded, but must be revalidated before using them. When the cache
+    grows beyond `max_size_bytes`, the least recently used snapshots are evicted. Schemas older than `schema_ttl`
+    seconds are ignored. Page contents are kept until the page is edited.
+    """
+
+    # Below the default limit of host parameters of a SQLite statement, in the older SQLite versions
+    MAX_QUERY_PARAMETERS = 900
+
+    def __init__(self, path, ttl=3600, max_size_bytes=100 * 2 ** 20, schema_ttl=24 * 3600, clock=time.time):
+        """
+        :param path: path of the SQLite file. It is created if it does not exist
+        :type path: str or Path
+        :param ttl: seconds during which a snapshot is used without revalidating it
+        :type ttl: float
+        :param max_size_bytes: maximum size of the stored (compressed) snapshots
+        :type max_size_bytes: int
+        :param schema_ttl: seconds during which a database schema is used without requesting it again
+        :type schema_ttl: float
+        """
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_size_bytes = max_size_bytes
+        self.schema_ttl = schema_ttl
+        self._clock = clock
+
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                "database_id TEXT PRIMARY KEY, version TEXT, stored_at REAL, accessed_at REAL, size INTEGER, "
+                "payload BLOB)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS schemas (database_id TEXT PRIMARY KEY, stored_at REAL, property_types TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS page_contents ("
+                "page_id TEXT PRIMARY KEY, database_id TEXT, last_edited_time TEXT, payload BLOB)"
+            )
+
+    def _connect(self):
+        return closing(sqlite3.connect(self.path, isolation_level=None))
+
+    def get(self, database_id) -> Optional[CachedSnapshot]:
+        """
+        Get the stored snapshot of a database
+
+        :param database_id: id of the database
+        :type database_id: str
+        :return: the snapshot, or None if the database is not cached
+        :rtype: :class:`CachedSnapshot`
+        """
+        now = self._clock()
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT version, stored_at, payload FROM snapshots WHERE database_id = ?", (database_id,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            connection.execute("UPDATE snapshots SET accessed_at = ? WHERE database_id = ?", (now, database_id))
+
+        version, stored_at, payload = row
+        return CachedSnapshot(self._deserialize(payload), version, now - stored_at < self.ttl, stored_at)
+
+    def put(self, database_id, dataframe: pd.DataFrame, version):
+        """
+        Store the snapshot of a database, replacing the previous one
+
+        :param database_id: id of the database
+        :type database_id: str
+        :param dataframe: decoded database
+        :type dataframe: pd.DataFrame
+        :param version: identifier of the state of the database
+        :type version: str
+        """
+        now = self._clock()
+        payload = self._serialize(dataframe)
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?)",
+                (database_id, version, now, now, len(payload), payload)
+            )
+            self._evict(connection)
+
+    def touch(self, database_id):
+        """Mark the snapshot of a database as fresh again, after checking that it is still valid"""
+        with self._connect() as connection:
+            connection.execute("UPDATE snapshots SET stored_at = ? WHERE database_id = ?", (self._clock(), database_id))
+
+    def invalidate(self, database_id):
+        """Remove the snapshot of a database"""
+        with self._connect() as connection:
+            connection.execute("DELETE FROM snapshots WHERE database_id = ?", (database_id,))
+
+    def get_schema(self, database_id) -> Optional[Dict[str, PropertyType]]:
+        """
+        Get the stored property types of a database
+
+        :param database_id: id of the database
+        :type database_id: str
+        :return: type of each property, or None if the schema is not cached or has expired
+        :rtype: Dict[str, :class:`~.notion_property_encoder.PropertyType`]
+        """
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT property_types FROM schemas WHERE database_id = ? AND stored_at > ?",
+                (database_id, self._clock() - self.schema_ttl)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return {name: PropertyType(value) for name, value in json.loads(row[0]).items()}
+
+    def put_schema(self, database_id, property_types: Dict[str, PropertyType]):
+        """Store the property types of a database"""
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO schemas VALUES (?, ?, ?)",
+                (
+                    database_id,
+                    self._clock(),
+                    json.dumps({name: property_type.value for name, property_type in property_types.items()})
+                )
+            )
+
+    def get_page_content(self, page_id, last_edited_time) -> Optional[list]:
+        """
+        Get the stored blocks of a page, if they were stored when the page had the same `last_edited_time`
+
+        :param page_id: id of the page
+        :type page_id: str
+        :param last_edited_time: current `last_edited_time` of the page, as returned by Notion API
+        :type last_edited_time: str
+        :return: the blocks, or None if they are not cached or the page was edited since then
+        :rtype: list
+        """
+        return self.get_page_contents({page_id: last_edited_time}).get(page_id)
+
+    def get_page_contents(self, last_edited_times: Dict[str, str]) -> Dict[str, list]:
+        """
+        Get the stored blocks of many pages at once, for the pages stored when they had the same `last_edited_time`
+
+        :param last_edited_times: current `last_edited_time` of each page, by page id, as returned by Notion API
+        :type last_edited_times: Dict[str, str]
+        :return: the blocks of the pages that are cached and were not edited since then, by page id
+        :rtype: Dict[str, list]
+        """
+        page_ids = list(last_edited_times)
+        rows = []
+        with self._connect() as connection:
+            for start in range(0, len(page_ids), self.MAX_QUERY_PARAMETERS):
+                batch = page_ids[start:start + self.MAX_QUERY_PARAMETERS]
+                rows.extend(connection.execute(
+                    "SELECT page_id, last_edited_time, payload FROM page_contents "
+                    f"WHERE page_id IN ({', '.join('?' * len(batch))})",
+                    batch
+                ).fetchall())
+
+        return {
+            page_id: json.loads(zlib.decompress(payload))
+            for page_id, last_edited_time, payload in rows
+            if last_edited_times[page_id] == last_edited_time
+        }
+
+    def put_page_contents(self, database_id, page_contents):
+        """
+        Store the blocks of many pages of a database, replacing the previous ones
+
+        :param database_id: id of the database of the pages
+        :type database_id: str
+        :param page_contents: tuples of (page id, `last_edited_time` of the page, list of blocks)
+        :type page_contents: Iterable[tuple]
+        """
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO page_contents VALUES (?, ?, ?, ?)",
+                [
+                    (page_id, database_id, last_edited_time, zlib.compress(json.dumps(blocks).encode()))
+                    for page_id, last_edited_time, blocks in page_contents
+                ]
+            )
+
+    def _evict(self, connection):
+        rows = connection.execute("SELECT database_id, size FROM snapshots ORDER BY accessed_at DESC").fetchall()
+        total_size = 0
+        for database_id, size in rows:
+            total_size += size
+            if total_size > self.max_size_bytes:
+                connection.execute("DELETE FROM snapshots WHERE database_id = ?", (database_id,))
+
+    @staticmethod
+    def _is_timestamp_column(column: pd.Series) -> bool:
+        """Whether a column holds timestamps, either as datetime64 or as objects (dates with different offsets)"""
+        if pd.api.types.is_datetime64_any_dtype(column.dtype):
+            return True
+        if column.dtype != object:
+            return False
+
+        values = [value for value in column.tolist() if value is not None and not pd.isna(value)]
+        return bool(values) and all(isinstance(value, pd.Timestamp) for value in values)
+
+    @classmethod
+    def _serialize(cls, dataframe: pd.DataFrame) -> bytes:
+        columns = {}
+        for name, column in dataframe.items():
+            is_timestamp_column = cls._is_timestamp_column(column)
+            if is_timestamp_column:
+                values = [None if pd.isna(value) else value.isoformat() for value in column]
+            else:
+                values = column.tolist()
+            columns[name] = {"dtype": str(column.dtype), "timestamps": is_timestamp_column, "values": values}
+
+        snapshot = {
+            "index": None if isinstance(dataframe.index, pd.RangeIndex) else dataframe.index.tolist(),
+            "columns": columns,
+        }
+        return zlib.compress(json.dumps(snapshot, default=str).encode())
+
+    @staticmethod
+    def _deserialize(payload: bytes) -> pd.DataFrame:
+        snapshot = json.loads(zlib.decompress(payload))
+        dataframe = pd.DataFrame(
+            {name: column["values"] for name, column in snapshot["columns"].items()},
+            index=snapshot["index"],
+            columns=list(snapshot["columns"].keys())
+        )
+        for name, column in snapshot["columns"].items():
+            dtype = column["dtype"]
+            if dtype.startswith("datetime64"):
+                dataframe[name] = pd.to_datetime(dataframe[name]).astype(dtype)
+            elif column.get("timestamps"):
+                dataframe[name] = pd.Series(
+                    [None if value is None else pd.Timestamp(value) for value in column["values"]],
+                    index=dataframe.index, dtype=object
+                )
+            elif dtype in ("bool", "float64"):
+                dataframe[name] = dataframe[name].astype(dtype)
+
+        return dataframe
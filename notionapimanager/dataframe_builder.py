@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from itertools import islice
+from typing import Dict, Optional, TYPE_CHECKING
+
+from notionapimanager.instrumentation import Instrumentation
+from notionapimanager.lazy_import import LazyModule
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+
+
+class DataFrameBuilder:
+    """Accumulates decoded Notion pages column by column and assembles a Pandas DataFrame only once
+
+    Pages are decoded in batches, one column at a time, with a
+    :class:`~.notion_property_encoder.ColumnarNotionPropertyDecoder`. When an
+    :class:`~.instrumentation.Instrumentation` is given, the time spent decoding is reported to it on each build.
+
+    Use the methods :func:`~DataFrameBuilder.add_pages` and :func:`~DataFrameBuilder.build`
+    """
+
+    BATCH_SIZE = 100
+
+    def __init__(self, decoder: ColumnarNotionPropertyDecoder, instrumentation: Optional[Instrumentation] = None):
+        self._decoder = decoder
+        self._instrumentation = instrumentation
+
+        self._columns: Dict[str, list] = {}
+        self._index: list = []
+        self._decode_time = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def add_page(self, page: dict):
+        """Decode the properties of a page (as returned by Notion API) and append them to the columns"""
+        self._add_batch([page])
+
+    def add_pages(self, pages):
+        """Decode the properties of many pages (as returned by Notion API) and append them to the columns"""
+        pages = iter(pages)
+        batch = list(islice(pages, self.BATCH_SIZE))
+        while batch:
+            self._add_batch(batch)
+            batch = list(islice(pages, self.BATCH_SIZE))
+
+    def _add_batch(self, pages):
+        if self._instrumentation is None:
+            self._decode_batch(pages)
+            return
+
+        started_at = self._instrumentation.clock()
+        self._decode_batch(pages)
+        self._decode_time += self._instrumentation.clock() - started_at
+
+    def _decode_batch(self, pages):
+        num_rows = len(self._index)
+        property_names = dict.fromkeys(property_name for page in pages for property_name in page["properties"])
+        for property_name in property_names:
+            column = self._columns.get(property_name)
+            if column is None:
+                column = self._columns[property_name] = [None] * num_rows
+            column.extend(
+                self._decoder.extract_column(property_name, [page["properties"].get(property_name) for page in pages])
+            )
+
+        self._index.extend(page.get("id", None) for page in pages)
+
+        if len(property_names) != len(self._columns):
+            self._pad_missing_values()
+
+    def _pad_missing_values(self):
+        num_rows = len(self._index)
+        for column in self._columns.values():
+            column.extend([None] * (num_rows - len(column)))
+
+    def build(self) -> pd.DataFrame:
+        """Create the DataFrame with one typed column per property and the page ids as index"""
+        if self._instrumentation is None:
+            return self._assemble()
+
+        started_at = self._instrumentation.clock()
+        dataframe = self._assemble()
+        self._instrumentation.record_decode(len(self), self._decode_time + self._instrumentation.clock() - started_at)
+        self._decode_time = 0
+        return dataframe
+
+    def _assemble(self):
+        if not self._index:
+            return pd.DataFrame([], columns=self._decoder.property_types.keys())
+
+        index = self._index if all(page_id is not None for page_id in self._index) else None
+        return pd.DataFrame(
+            {
+                property_name: self._decoder.finalize_column(property_name, values)
+                for property_name, values in self._columns.items()
+            },
+            index=index
+        )
@@ -0,0 +1,213 @@
+from contextlib import contextmanager
+import logging
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+
+_ID_SEGMENT_PATTERN = re.compile(r"(/(?:databases|pages|blocks)/)[^/]+")
+
+logger = logging.getLogger(__name__)
+
+
+class RequestEvent(NamedTuple):
+    """Measurements of one request to Notion API, including all its retries
+
+    `endpoint` is the path of the URL with the ids replaced by ``{id}``, e.g. ``/v1/databases/{id}/query``.
+    `latency` is the time spent waiting for the server in all the attempts, while `rate_limit_wait` and `retry_wait`
+    are the times spent waiting for the rate limiter and before retrying.
+    """
+    method: str
+    endpoint: str
+    status_code: Optional[int]
+    latency: float
+    request_bytes: int
+    response_bytes: int
+    retries: int
+    rate_limit_wait: float
+    retry_wait: float
+
+
+class StatsSummary(NamedTuple):
+    """Aggregated measurements of the requests sent and the pages decoded by a manager"""
+    request_count: int
+    requests_by_endpoint: Dict[str, int]
+    error_count: int
+    retry_count: int
+    latency_p50: float
+    latency_p95: float
+    network_time: float
+    rate_limit_wait: float
+    retry_wait: float
+    request_bytes: int
+    response_bytes: int
+    decoded_pages: int
+    decode_time: float
+
+
+class RequestTracker:
+    """Collects the measurements of a request while it is being sent, and reports them when it finishes"""
+
+    def __init__(self, instrumentation: "Instrumentation", method, url):
+        self._instrumentation = instrumentation
+        self._method = method
+        self._url = url
+        self._latency = 0
+        self._retries = 0
+        self._rate_limit_wait = 0
+        self._retry_wait = 0
+
+    def waited_for_rate_limit(self, seconds):
+        self._rate_limit_wait += seconds
+
+    @contextmanager
+    def attempt(self):
+        """Measure the time spent waiting for the server in one attempt"""
+        started_at = self._instrumentation.clock()
+        try:
+            yield
+        finally:
+            self._latency += self._instrumentation.clock() - started_at
+
+    def retrying(self, delay):
+        self._retries += 1
+        self._retry_wait += delay
+
+    def finish(self, status_code, request_bytes=0, response_bytes=0):
+        self._instrumentation.record_request(
+            RequestEvent(
+                self._method,
+                Instrumentation.get_endpoint(self._url),
+                status_code,
+                self._latency,
+                request_bytes,
+                response_bytes,
+                self._retries,
+                self._rate_limit_wait,
+                self._retry_wait,
+            )
+        )
+
+
+class Instrumentation:
+    """Measures the requests sent to Notion API and the time spent decoding their responses
+
+    Every request is reported to the listeners as a :class:`RequestEvent`, and aggregated into the summary returned by
+    :func:`~Instrumentation.get_stats`. The same instance can be shared by several managers and threads.
+
+    Memory stays bounded however many requests are sent: the latency percentiles are estimated from a uniform random
+    sample of at most `max_latency_samples` requests, and everything else is kept as running totals.
+    """
+
+    def __init__(self, clock=time.perf_counter, max_latency_samples=10000):
+        self.clock = clock
+        self.max_latency_samples = max_latency_samples
+
+        self._listeners: List[Callable[[RequestEvent], None]] = []
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self.reset()
+
+    def add_listener(self, listener: Callable[[RequestEvent], None]):
+        """Call `listener` with the :class:`RequestEvent` of every request, from the thread that sent it
+
+        Exceptions raised by the listener are logged and do not affect the request.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[RequestEvent], None]):
+        self._listeners.remove(listener)
+
+    def reset(self):
+        """Forget the aggregated measurements"""
+        with self._lock:
+            self._latencies: List[float] = []
+            self._request_count = 0
+            self._network_time = 0
+            self._requests_by_endpoint: Dict[str, int] = {}
+            self._error_count = 0
+            self._retry_count = 0
+            self._rate_limit_wait = 0
+            self._retry_wait = 0
+            self._request_bytes = 0
+            self._response_bytes = 0
+            self._decoded_pages = 0
+            self._decode_time = 0
+
+    @staticmethod
+    def get_endpoint(url):
+        return _ID_SEGMENT_PATTERN.sub(r"\1{id}", urlsplit(url).path)
+
+    def track(self, method, url) -> RequestTracker:
+        return RequestTracker(self, method, url)
+
+    def record_request(self, event: RequestEvent):
+        with self._lock:
+            self._request_count += 1
+            self._network_time += event.latency
+            self._sample_latency(event.latency)
+            key = f"{event.method} {event.endpoint}"
+            self._requests_by_endpoint[key] = self._requests_by_endpoint.get(key, 0) + 1
+            if event.status_code is None or event.status_code >= 400:
+                self._error_count += 1
+            self._retry_count += event.retries
+            self._rate_limit_wait += event.rate_limit_wait
+            self._retry_wait += event.retry_wait
+            self._request_bytes += event.request_bytes
+            self._response_bytes += event.response_bytes
+
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("Instrumentation listener %r failed", listener)
+
+    def _sample_latency(self, latency):
+        """Keep a uniform sample of the latencies of all the requests (reservoir sampling)"""
+        if len(self._latencies) < self.max_latency_samples:
+            self._latencies.append(latency)
+            return
+
+        index = self._random.randrange(self._request_count)
+        if index < self.max_latency_samples:
+            self._latencies[index] = latency
+
+    def record_decode(self, num_pages, seconds):
+        """Account for the time spent decoding pages into DataFrames"""
+        with self._lock:
+            self._decoded_pages += num_pages
+            self._decode_time += seconds
+
+    @staticmethod
+    def _get_percentile(sorted_values, percentile):
+        if not sorted_values:
+            return 0
+        return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))]
+
+    def get_stats(self) -> StatsSummary:
+        """
+        Summarize the measurements taken since the creation of the instance or its last reset
+
+        :return: aggregated measurements
+        :rtype: :class:`StatsSummary`
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return StatsSummary(
+                request_count=self._request_count,
+                requests_by_endpoint=dict(self._requests_by_endpoint),
+                error_count=self._error_count,
+                retry_count=self._retry_count,
+                latency_p50=self._get_percentile(latencies, 50),
+                latency_p95=self._get_percentile(latencies, 95),
+                network_time=self._network_time,
+                rate_limit_wait=self._rate_limit_wait,
+                retry_wait=self._retry_wait,
+                request_bytes=self._request_bytes,
+                response_bytes=self._response_bytes,
+                decoded_pages=self._decoded_pages,
+                decode_time=self._decode_time,
+            )
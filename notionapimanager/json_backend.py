@@ -0,0 +1,68 @@
+import json
+from typing import Any, TYPE_CHECKING, Union
+
+from notionapimanager.lazy_import import is_installed, LazyModule
+
+if TYPE_CHECKING:
+    import orjson
+else:
+    orjson = LazyModule("orjson") if is_installed("orjson") else None
+
+
+class JsonBackend:
+    """Serializes the bodies of the requests to Notion API and parses the bodies of its responses, with the standard
+    library
+
+    Subclass it to use another JSON library, overriding :func:`~JsonBackend.dumps` and :func:`~JsonBackend.loads`.
+    """
+
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        """Serialize a value into the UTF-8 encoded bytes sent as request body"""
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Parse the body of a response"""
+        return json.loads(data)
+
+
+class OrjsonBackend(JsonBackend):
+    """JSON backend based on `orjson`, which serializes directly into bytes and is faster than the standard library,
+    especially serializing. It requires the optional dependency `orjson` (``pip install
+    notionapimanager[orjson]``)
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:  # pragma: no cover
+            raise ImportError("OrjsonBackend requires orjson: pip install notionapimanager[orjson]")
+
+    def dumps(self, value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+def get_json_backend(json_backend: Union[JsonBackend, str, None] = None) -> JsonBackend:
+    """
+    Resolve the JSON backend argument of the managers
+
+    :param json_backend: a backend instance, or the name of one: ``"json"`` (the default), ``"orjson"`` or ``"auto"``
+        (`orjson` when it is installed, the standard library otherwise)
+    :type json_backend: :class:`JsonBackend` or str
+    :return: the backend
+    :rtype: :class:`JsonBackend`
+    """
+    if isinstance(json_backend, JsonBackend):
+        return json_backend
+    if json_backend is None or json_backend == "json":
+        return JsonBackend()
+    if json_backend == "orjson":
+        return OrjsonBackend()
+    if json_backend == "auto":
+        return OrjsonBackend() if orjson is not None else JsonBackend()
+
+    raise ValueError(f"Unknown JSON backend {json_backend!r}")
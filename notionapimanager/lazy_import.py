@@ -0,0 +1,33 @@
+import importlib
+import importlib.util
+import sys
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Stand-in for a module that is only imported the first time one of its attributes is used
+
+    Heavy dependencies such as pandas are referenced through it, so importing this package stays fast and light for
+    the code that never builds DataFrames, e.g. a script that only creates pages. Type checkers do not see through
+    it, so modules import the real module under ``TYPE_CHECKING`` for their annotations and bind the proxy otherwise.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self.__name__)
+        return getattr(self._module, attribute)
+
+
+def is_installed(name) -> bool:
+    """Whether a module can be imported, without importing it"""
+    return importlib.util.find_spec(name) is not None
+
+
+def is_dataframe(value) -> bool:
+    """Whether a value is a Pandas DataFrame, without importing pandas if nothing has imported it yet"""
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(value, pandas.DataFrame)
@@ -1,133 +1,457 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from itertools import chain
-import json
-from typing import List
+import time
+from typing import Dict, Iterator, List, TYPE_CHECKING, Union
 
-import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+
+from notionapimanager.base_notion_database_api_manager import BaseNotionDatabaseApiManager, PageOperationResult, \
+    SyncResult, UpsertResult
+from notionapimanager.lazy_import import is_dataframe, LazyModule
+from notionapimanager.notion_filter import Property, range_partitions, Sort
+# Property types and codecs are re-exported for backwards compatibility
+from notionapimanager.notion_property_encoder import NotionPropertyDecoder, NotionPropertyEncoder, \
+    PageRecord, PropertyType, PropertyValue  # noqa: F401
 
-from notionapimanager.notion_property_encoder import NotionPropertyDecoder, NotionPropertyEncoder, PropertyDefinition, \
-    PropertyType, PropertyValue
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
 
 
-class NotionDatabaseApiManager:
+class NotionDatabaseApiManager(BaseNotionDatabaseApiManager):
     """Class for reading from (and writing to) Notion databases"""
 
-    DATABASES_URL = 'https://api.notion.com/v1/databases/'
-    PAGES_URL = 'https://api.notion.com/v1/pages'
-    BLOCKS_URL_TEMPLATE = "https://api.notion.com/v1/blocks/{page_id}/children"
-
-    def __init__(self, integration_token, database_ids):
-        self.integration_token = integration_token
-        self.database_ids = database_ids
-
-        self._headers = None
-        self._decoder = None
-        self._encoder = None
-        self._property_types = None
-
-    def connect(self):
-        """Perform preparation operations before communicating with Notion API"""
-
-        self._headers = {
-            "Authorization": "Bearer " + self.integration_token,
-            "Content-Type": "application/json",
-            "Notion-Version": "2021-05-13"
-        }
-        self._decoder = NotionPropertyDecoder()
-        self._encoder = NotionPropertyEncoder()
-
-        self._property_types = {
-            database_id: {
-                property_definition.name: property_definition.property_type
-                for property_definition in self._get_property_definitions(database_id)
-            }
-            for database_id in self.database_ids
-        }
+    def __init__(self, integration_token, database_ids, **kwargs):
+        """Accepts the same arguments as :class:`~.base_notion_database_api_manager.BaseNotionDatabaseApiManager`"""
+        super().__init__(integration_token, database_ids, **kwargs)
 
-    def _get_property_definitions(self, database_id):
-        def get_property_type(property_type_str):
-            if PropertyType.has_value(property_type_str):
-                return PropertyType(property_type_str)
-            else:
-                return PropertyType.UNKNOWN
+        self._session = None
 
-        database_url = self.DATABASES_URL + database_id
-        properties = requests.get(database_url, headers=self._headers).json()["properties"]
-        return [
-            PropertyDefinition(prop_name, get_property_type(prop_object["type"]))
-            for prop_name, prop_object in properties.items()
-        ]
+    def connect(self, lazy=False):
+        """
+        Perform preparation operations before communicating with Notion API
+
+        :param lazy: if True, the schema of each database is only requested the first time it is needed. Otherwise, the
+            schemas of all the databases are requested now, in parallel
+        :type lazy: bool
+        """
 
-    def _get_page_properties(self, page: dict) -> pd.Series:
-        properties = {
-            property_name: self._decoder.decode(property_data)
-            for property_name, property_data in page["properties"].items()
-        }
+        self._prepare_connection()
+        self._session = self._create_session()
 
-        return pd.Series(properties, name=page.get("id", None))
+        self._property_types = {}
+        if not lazy:
+            self.load_schemas()
 
-    def get_database(self, database_id):
+    def load_schemas(self, database_ids=None, max_workers=None):
+        """
+        Request the schemas of several databases in parallel, unless they are already known or in the cache
+
+        :param database_ids: ids of the databases. By default, the ones the manager was created with
+        :type database_ids: List[str]
+        :param max_workers: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_workers: int
+        """
+        database_ids = self.database_ids if database_ids is None else database_ids
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            list(executor.map(self._get_property_types, database_ids))
+
+    def _get_property_types(self, database_id):
+        property_types = self._property_types.get(database_id)
+        if property_types is None and self.cache is not None:
+            property_types = self.cache.get_schema(database_id)
+            if property_types is not None:
+                self._property_types[database_id] = property_types
+        if property_types is None:
+            property_types = self._get_property_types_from_definitions(self._get_property_definitions(database_id))
+            self._set_property_types(database_id, property_types)
+
+        return property_types
+
+    def _set_property_types(self, database_id, property_types):
+        self._property_types[database_id] = property_types
+        if self.cache is not None:
+            self.cache.put_schema(database_id, property_types)
+
+    def close(self):
+        """Release the connections opened against Notion API"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method, url, **kwargs):
+        tracker = self.instrumentation.track(method, url)
+        response = None
+        attempt = 0
+        idempotent = self._is_idempotent(method, url)
+        try:
+            while True:
+                if self._rate_limiter is not None:
+                    tracker.waited_for_rate_limit(self._rate_limiter.acquire())
+
+                with tracker.attempt():
+                    response = self._session.request(
+                        method, url, headers=self._headers, timeout=self.timeout, **kwargs
+                    )
+                if response.ok:
+                    return response
+
+                delay = self._get_retry_delay(
+                    response.status_code, response.headers.get("Retry-After"), response.text, attempt, idempotent
+                )
+                tracker.retrying(delay)
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            if response is None:
+                tracker.finish(None)
+            else:
+                tracker.finish(response.status_code, len(response.request.body or b""), len(response.content))
+
+    def _get_property_definitions(self, database_id):
+        database = self._loads(self._request("GET", self.DATABASES_URL + database_id))
+        return self._parse_property_definitions(database)
+
+    def get_database(self, database_id, filter=None, sorts=None, page_size=None, use_cache=True, output="pandas"):
         """
         Read Notion database and return a Pandas DataFrame
 
+        Filters and sorts are applied by Notion, so only the requested pages are transferred.
+
+        If the manager has a cache and neither filters nor sorts are given, a fresh cached copy is returned without
+        contacting Notion. Once its time to live expires, the copy is still used as long as neither the database nor
+        any of its pages has been edited since, which takes two small requests instead of reading the whole database.
+        Notion truncates edit times to minutes, so a copy stored during the minute of the last edit is read again.
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param filter: condition the pages must meet, e.g. ``Property("Price") > 10``, or a raw Notion filter object
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time (Notion's default and maximum is 100)
+        :type page_size: int
+        :param use_cache: whether the cache of the manager, if any, may be used
+        :type use_cache: bool
+        :param output: ``"pandas"`` for the decoded DataFrame, ``"compact"`` for a DataFrame with memory efficient
+            dtypes (categorical selects and Arrow strings, see :func:`~.compact_output.compact_dataframe`) or
+            ``"arrow"`` for a `pyarrow.Table`
+        :type output: str
+        :return: dataframe of the database
+        :rtype: pd.DataFrame or pyarrow.Table
+        """
+        self._check_output_format(output)
+        dataframe = self._get_database_dataframe(database_id, filter, sorts, page_size, use_cache)
+        return self._format_output(database_id, dataframe, output)
+
+    def get_databases(
+        self, database_ids=None, max_workers=None, use_cache=True, output="pandas"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Read several Notion databases concurrently
+
+        Each database is paginated in its own thread, all of them sharing the rate limiter and the connection pool of
+        the manager, so reading many databases takes about as long as reading the largest one when the rate limit
+        allows it.
+
+        :param database_ids: ids of the databases. By default, the ones the manager was created with
+        :type database_ids: List[str]
+        :param max_workers: maximum number of databases read at a time. By default, the size of the connection pool
+        :type max_workers: int
+        :param use_cache: whether the cache of the manager, if any, may be used
+        :type use_cache: bool
+        :param output: ``"pandas"``, ``"compact"`` or ``"arrow"``, as in :func:`get_database`
+        :type output: str
+        :return: dataframe of each database, by id
+        :rtype: Dict[str, pd.DataFrame]
+        """
+        database_ids = self.database_ids if database_ids is None else database_ids
+        self._check_output_format(output)
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            dataframes = executor.map(
+                lambda database_id: self.get_database(database_id, use_cache=use_cache, output=output), database_ids
+            )
+            return dict(zip(database_ids, dataframes))
+
+    def get_database_partitioned(
+        self, database_id, partition_by, partitions=4, filter=None, max_workers=None, output="pandas"
+    ):
+        """
+        Read a large Notion database splitting it into partitions that are paginated concurrently
+
+        Notion paginates a query with cursors, one segment after another. Instead, the database is split into disjoint
+        ranges of a number or date property, each read by its own query (see
+        :func:`~.notion_filter.range_partitions`), plus one for the pages without value. With a number of
+        partitions, the ranges have the same width between the minimum and maximum values of the property, which
+        are requested first. The pages are returned ordered by partition, and only once even if they are edited
+        into another partition during the scan.
+
         :param database_id: id of database you want to retrieve
         :type database_id: str
+        :param partition_by: name of the number or date property used to split the database
+        :type partition_by: str
+        :param partitions: number of ranges, or the sorted values where a range ends and the next one starts
+        :type partitions: int or list
+        :param filter: condition the pages must meet (see :func:`get_database`)
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param max_workers: maximum number of partitions read at a time. By default, the size of the connection pool
+        :type max_workers: int
+        :param output: ``"pandas"``, ``"compact"`` or ``"arrow"``, as in :func:`get_database`
+        :type output: str
         :return: dataframe of the database
+        :rtype: pd.DataFrame or pyarrow.Table
+        """
+        property_type = self._get_property_types(database_id).get(partition_by)
+        if property_type not in (PropertyType.NUMBER, PropertyType.DATE):
+            raise ValueError(f"Databases can only be partitioned by number or date properties, not {partition_by!r}")
+        self._check_output_format(output)
+
+        if isinstance(partitions, int):
+            minimum = self._get_extreme_value(database_id, partition_by, filter, descending=False)
+            maximum = self._get_extreme_value(database_id, partition_by, filter, descending=True)
+            boundaries = (
+                [] if minimum is None else self._get_partition_boundaries(minimum, maximum, partitions, property_type)
+            )
+        else:
+            boundaries = list(partitions)
+
+        database_query_url = self._get_database_query_url(database_id)
+        queries = [
+            self._create_partition_query(database_id, partition_filter, filter)
+            for partition_filter in range_partitions(partition_by, boundaries)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            partitions_pages = list(executor.map(
+                lambda query: list(self._get_all_pages(database_query_url, query)), queries
+            ))
+
+        builder = self._create_dataframe_builder(database_id)
+        builder.add_pages(self._take_unique_pages(chain.from_iterable(partitions_pages)))
+        return self._format_output(database_id, builder.build(), output)
+
+    def _get_extreme_value(self, database_id, property_name, filter=None, descending=False):
+        """Minimum (or maximum) value of a property in a database, or None when no page has a value"""
+        query = self._create_partition_query(
+            database_id, Property(property_name).is_not_empty(), filter, [Sort(property_name, descending)], page_size=1
+        )
+        pages, _, _ = self._get_results_segment(self._get_database_query_url(database_id), None, query)
+        if not pages:
+            return None
+
+        return self._build_dataframe(database_id, pages[:1])[property_name].iloc[0]
+
+    def _get_database_dataframe(self, database_id, filter, sorts, page_size, use_cache):
+        query = self._create_query(database_id, filter, sorts, page_size)
+        if self.cache is None or not use_cache or filter is not None or sorts:
+            return self._read_database(database_id, query)
+
+        snapshot = self.cache.get(database_id)
+        if snapshot is not None and snapshot.is_fresh:
+            return snapshot.dataframe
+
+        version, last_edited_time = self._request_database_version(database_id)
+        if snapshot is not None and self._is_snapshot_current(snapshot, version, last_edited_time):
+            self.cache.touch(database_id)
+            return snapshot.dataframe
+
+        dataframe = self._read_database(database_id, query)
+        self.cache.put(database_id, dataframe, version)
+        return dataframe
+
+    def _read_database(self, database_id, query=None):
+        pages_raw = self._get_all_pages(self._get_database_query_url(database_id), query)
+        return self._build_dataframe(database_id, pages_raw)
+
+    def _request_database_version(self, database_id):
+        database = self._loads(self._request("GET", self.DATABASES_URL + database_id))
+        self._set_property_types(
+            database_id, self._get_property_types_from_definitions(self._parse_property_definitions(database))
+        )
+        newest_pages, _, _ = self._get_results_segment(
+            self._get_database_query_url(database_id),
+            None,
+            dict(self.LAST_EDITED_TIME_DESCENDING_QUERY, page_size=1)
+        )
+        return self._get_database_version(database, newest_pages), self._get_last_edited_time(database, newest_pages)
+
+    def sync_database(self, database_id, previous_df: pd.DataFrame = None, since=None) -> SyncResult:
+        """
+        Bring a previously read copy of a Notion database up to date, requesting only the pages edited since then
+
+        Pages are requested from the most to the least recently edited, stopping at the first one edited before the
+        watermark. Rows of edited pages replace those with the same page id in `previous_df`, and new pages are
+        appended. Pages deleted or archived since then are not detected, so read the whole database from time to time.
+
+        :param database_id: id of database you want to synchronize
+        :type database_id: str
+        :param previous_df: copy of the database as returned by a previous call (or by `get_database`)
+        :type previous_df: pd.DataFrame
+        :param since: watermark returned by the previous call. If None, all pages are read
+        :type since: str or datetime
+        :return: updated dataframe and new watermark
+        :rtype: :class:`~.base_notion_database_api_manager.SyncResult`
+        """
+        pages_by_last_edition = self._get_all_pages(
+            self._get_database_query_url(database_id), self.LAST_EDITED_TIME_DESCENDING_QUERY
+        )
+        builder = self._create_dataframe_builder(database_id)
+        watermark = since
+        for page in self._take_pages_edited_since(pages_by_last_edition, since):
+            if len(builder) == 0:
+                watermark = page["last_edited_time"]
+            builder.add_page(page)
+
+        return SyncResult(self._merge_updated_pages(previous_df, builder.build()), watermark)
+
+    def resolve_relations(
+        self, dataframe: pd.DataFrame, column, target_database_id, columns=None, refresh=False
+    ) -> pd.DataFrame:
+        """
+        Join the pages of a relation property with their properties, reading the related database once instead of
+        requesting every related page
+
+        The related database is read the first time and kept in memory, indexed by page id, for the following calls
+        (and through the cache of the manager, if any). The result has a row per related page, as with
+        `DataFrame.explode`: `column` holds the id of the related page and its properties are added in columns named
+        ``"<column>.<property>"``. Rows without related pages, or related to pages not found, get missing values.
+
+        :param dataframe: database with a relation column, as returned by :func:`get_database`
+        :type dataframe: pd.DataFrame
+        :param column: name of the relation column
+        :type column: str
+        :param target_database_id: id of the database the relation points to
+        :type target_database_id: str
+        :param columns: properties of the related pages to add. By default, all of them
+        :type columns: List[str]
+        :param refresh: whether the related database is read again instead of using the copy kept in memory
+        :type refresh: bool
+        :return: dataframe with the properties of the related pages
         :rtype: pd.DataFrame
         """
-        database_query_url = self.DATABASES_URL + database_id + "/query"
-        pages_raw = self._get_all_pages(database_query_url)
-        pages = [
-            self._get_page_properties(page)
-            for page in pages_raw
+        target = self._relation_indexes.get(target_database_id)
+        if target is None or refresh:
+            target = self._relation_indexes[target_database_id] = self.get_database(target_database_id)
+
+        return self._join_relations(dataframe, column, target, columns)
+
+    def get_records(self, database_id, filter=None, sorts=None, page_size=None) -> List[PageRecord]:
+        """
+        Read Notion database as a list of records, a light alternative to :func:`get_database` for small reads
+
+        Values are plain Python objects, without pandas (which is not even imported): strings for titles, texts,
+        selects, URLs and dates (the ISO 8601 start), floats or ints for numbers, bools for checkboxes, lists of page
+        ids for relations and the JSON value of the rest of the property types. Missing values are None.
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param filter: condition the pages must meet (see :func:`get_database`)
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time
+        :type page_size: int
+        :return: id and property values of each page
+        :rtype: List[:class:`~.notion_property_encoder.PageRecord`]
+        """
+        query = self._create_query(database_id, filter, sorts, page_size)
+        return [
+            record
+            for pages in self._get_all_segments(self._get_database_query_url(database_id), query)
+            for record in self._decode_records(database_id, pages)
         ]
 
-        if pages:
-            return pd.concat(pages, axis="columns").T
-        else:
-            return pd.DataFrame(
-                [],
-                columns=self._property_types[database_id].keys()
-            )
+    def iter_pages(self, database_id, filter=None, sorts=None, page_size=None) -> Iterator[PageRecord]:
+        """
+        Read Notion database page by page, requesting the next segment of pages only when the previous one is consumed
+
+        Each segment is decoded at once, column by column, into the plain Python values described in
+        :func:`get_records`.
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param filter: condition the pages must meet (see :func:`get_database`)
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time
+        :type page_size: int
+        :return: iterator over the decoded pages of the database
+        :rtype: Iterator[:class:`~.notion_property_encoder.PageRecord`]
+        """
+        query = self._create_query(database_id, filter, sorts, page_size)
+        for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+            yield from self._decode_records(database_id, pages)
 
-    def _get_all_pages(self, database_query_url):
+    def iter_dataframes(self, database_id, chunk_size=None, filter=None, sorts=None, page_size=None):
+        """
+        Read Notion database as a sequence of Pandas DataFrames, so only one chunk of it is held in memory at a time
+
+        :param database_id: id of database you want to retrieve
+        :type database_id: str
+        :param chunk_size: number of rows of each DataFrame. By default, one DataFrame per segment returned by Notion
+        :type chunk_size: int
+        :param filter: condition the pages must meet (see :func:`get_database`)
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param sorts: order of the pages
+        :type sorts: List[:class:`~.notion_filter.Sort` or dict]
+        :param page_size: number of pages requested at a time
+        :type page_size: int
+        :return: iterator over dataframes with consecutive rows of the database
+        :rtype: Iterator[pd.DataFrame]
+        """
+        query = self._create_query(database_id, filter, sorts, page_size)
+        builder = self._create_dataframe_builder(database_id)
+        for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+            for page in pages:
+                builder.add_page(page)
+                if len(builder) == chunk_size:
+                    yield builder.build()
+                    builder = self._create_dataframe_builder(database_id)
+
+            if chunk_size is None and len(builder):
+                yield builder.build()
+                builder = self._create_dataframe_builder(database_id)
+
+        if len(builder):
+            yield builder.build()
+
+    def _get_all_pages(self, database_query_url, query=None):
+        for pages in self._get_all_segments(database_query_url, query):
+            yield from pages
+
+    def _get_all_segments(self, database_query_url, query=None):
         next_cursor = None
         has_more = True
-        segments = []
         while has_more:
-            print("Get segment")
-            pages, has_more, next_cursor = self._get_results_segment(database_query_url, next_cursor)
-            segments.append(pages)
+            pages, has_more, next_cursor = self._get_results_segment(database_query_url, next_cursor, query)
+            yield pages
 
-        return chain.from_iterable(segments)
-
-    def _get_results_segment(self, database_query_url, start_cursor):
-        response = requests.post(
+    def _get_results_segment(self, database_query_url, start_cursor, query=None):
+        response = self._request(
+            "POST",
             database_query_url,
-            headers=self._headers,
-            json=dict(
-                start_cursor=start_cursor
-            ) if start_cursor else {}
+            data=self._dumps(self._get_results_segment_body(start_cursor, query))
         )
-        data = response.json()
-        pages = data["results"]
-        next_cursor = data["next_cursor"]
-        has_more = data["has_more"]
-
-        return pages, has_more, next_cursor
-
-    def _create_page_properties(self, database_id, page_properties: List[PropertyValue]):
-        properties = {
-            page_property.name: self._encoder.encode(
-                page_property.value, self._property_types[database_id][page_property.name]
-            )
-            for page_property in page_properties
-        }
-
-        return {
-            "parent": {"database_id": database_id},
-            "properties": properties
-        }
+        return self._parse_results_segment(self._loads(response))
 
     def create_page(self, database_id, page_properties: List[PropertyValue]):
         """
@@ -137,20 +461,271 @@ class NotionDatabaseApiManager:
         :type database_id: str
         :param page_properties: property values of new page
         :type page_properties: List[:class:`~.notion_property_encoder.PropertyValue`]
+        :return: id of the new page
+        :rtype: str
         """
 
-        new_page_data = self._create_page_properties(database_id, page_properties)
+        return self._post_page(self._create_page_properties(database_id, page_properties))
 
-        data = json.dumps(new_page_data)
-        requests.post(self.PAGES_URL, headers=self._headers, data=data)
+    def _post_page(self, new_page_data):
+        data = self._dumps(new_page_data)
+        response = self._request("POST", self.PAGES_URL, data=data)
+        return self._loads(response).get("id", None)
 
-    def get_page_blocks(self, page_id):
+    def create_pages(
+        self, database_id, rows: Union[List[List[PropertyValue]], pd.DataFrame], max_workers=None
+    ) -> List[PageOperationResult]:
+        """
+        Add many Notion pages to database, sending several requests at a time without exceeding the rate limit
+
+        A failure creating one page does not stop the creation of the rest.
+
+        :param database_id: id of database you want to add the pages to
+        :type database_id: str
+        :param rows: property values of each new page, or a DataFrame with a column per property (missing values are
+            left empty)
+        :type rows: List[List[:class:`~.notion_property_encoder.PropertyValue`]] or pd.DataFrame
+        :param max_workers: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_workers: int
+        :return: for each row, in the same order, the id of the new page or the error that prevented its creation
+        :rtype: List[:class:`~.base_notion_database_api_manager.PageOperationResult`]
+        """
+        if is_dataframe(rows):
+            return self._run_concurrently(self._post_page, self._create_pages_properties(database_id, rows), max_workers)
+
+        return self._run_concurrently(
+            lambda page_properties: self.create_page(database_id, page_properties), rows, max_workers
+        )
+
+    def _patch_page(self, page_id, page_data):
+        response = self._request("PATCH", self._get_page_url(page_id), data=self._dumps(page_data))
+        return self._loads(response).get("id", None)
+
+    def update_page(self, database_id, page_id, page_properties: List[PropertyValue]):
         """
-        Get page blocks
+        Change some properties of a Notion page of a database
 
+        :param database_id: id of the database of the page
+        :type database_id: str
         :param page_id: id of the page
         :type page_id: str
+        :param page_properties: new values of the properties to change
+        :type page_properties: List[:class:`~.notion_property_encoder.PropertyValue`]
+        :return: id of the updated page
+        :rtype: str
+        """
+        return self._patch_page(page_id, self._update_page_properties(database_id, page_properties))
+
+    def archive_page(self, page_id):
+        """
+        Archive (delete) a Notion page
+
+        :param page_id: id of the page
+        :type page_id: str
+        :return: id of the archived page
+        :rtype: str
+        """
+        return self._patch_page(page_id, {"archived": True})
+
+    def update_pages(
+        self, database_id, updates: Union[Dict[str, List[PropertyValue]], pd.DataFrame], max_workers=None
+    ) -> List[PageOperationResult]:
+        """
+        Change properties of many Notion pages of a database, sending several requests at a time without exceeding
+        the rate limit
+
+        A failure updating one page does not stop the update of the rest.
+
+        :param database_id: id of the database of the pages
+        :type database_id: str
+        :param updates: new property values by page id, or a DataFrame indexed by page id (as returned by
+            :func:`get_database`) with a column per property to change (missing values are left unchanged)
+        :type updates: Dict[str, List[:class:`~.notion_property_encoder.PropertyValue`]] or pd.DataFrame
+        :param max_workers: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_workers: int
+        :return: for each page, in the same order, its id or the error that prevented its update
+        :rtype: List[:class:`~.base_notion_database_api_manager.PageOperationResult`]
+        """
+        if is_dataframe(updates):
+            return self._run_concurrently(
+                lambda update: self._patch_page(*update), self._update_pages_properties(database_id, updates),
+                max_workers
+            )
+
+        return self._run_concurrently(
+            lambda update: self.update_page(database_id, *update), list(updates.items()), max_workers
+        )
+
+    def archive_pages(self, page_ids: List[str], max_workers=None) -> List[PageOperationResult]:
+        """
+        Archive (delete) many Notion pages, sending several requests at a time without exceeding the rate limit
+
+        A failure archiving one page does not stop the archiving of the rest.
+
+        :param page_ids: ids of the pages
+        :type page_ids: List[str]
+        :param max_workers: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_workers: int
+        :return: for each page, in the same order, its id or the error that prevented archiving it
+        :rtype: List[:class:`~.base_notion_database_api_manager.PageOperationResult`]
+        """
+        return self._run_concurrently(self.archive_page, page_ids, max_workers)
+
+    def upsert_dataframe(
+        self, database_id, dataframe: pd.DataFrame, key, archive_missing=True, max_workers=None
+    ) -> UpsertResult:
+        """
+        Mirror a DataFrame into a Notion database, sending requests only for the rows that changed
+
+        The current pages of the database are read and matched with the rows of `dataframe` by the value of the
+        `key` column. Rows without a matching page are created, pages whose encoded properties differ from their
+        row are updated (missing values clear the property), and pages without a matching row are archived. Only
+        the properties of the columns of `dataframe` are compared and written.
+
+        :param database_id: id of the database
+        :type database_id: str
+        :param dataframe: desired content of the database, with a column per property
+        :type dataframe: pd.DataFrame
+        :param key: name of the column (and property) whose values identify the rows
+        :type key: str
+        :param archive_missing: whether pages without a matching row are archived
+        :type archive_missing: bool
+        :param max_workers: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_workers: int
+        :return: result of each create, update and archive operation sent
+        :rtype: :class:`~.base_notion_database_api_manager.UpsertResult`
+        """
+        self._check_upsert_key(dataframe, key)
+        plan = self._plan_upsert(database_id, self._read_database(database_id), dataframe, key, archive_missing)
+
+        operations = (
+            [partial(self._post_page, page_data) for page_data in plan.to_create]
+            + [partial(self._patch_page, page_id, page_data) for page_id, page_data in plan.to_update]
+            + [partial(self.archive_page, page_id) for page_id in plan.to_archive]
+        )
+        results = self._run_concurrently(lambda operation: operation(), operations, max_workers)
+        if operations:
+            self._relation_indexes.pop(database_id, None)
+            if self.cache is not None:
+                self.cache.invalidate(database_id)
+
+        num_created, num_updated = len(plan.to_create), len(plan.to_update)
+        return UpsertResult(
+            results[:num_created], results[num_created:num_created + num_updated], results[num_created + num_updated:]
+        )
+
+    def _run_concurrently(self, operation, items, max_workers=None) -> List[PageOperationResult]:
+        def run_operation(item):
+            try:
+                return PageOperationResult(operation(item))
+            except Exception as error:
+                return PageOperationResult(None, error)
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            return list(executor.map(run_operation, items))
+
+    def get_page_blocks(self, page_id):
+        """
+        Get page blocks, following the pagination of the results
+
+        :param page_id: id of the page (or of a block, to get its children)
+        :type page_id: str
         :return: list of blocks of the page
         :rtype: list
         """
-        return requests.get(self.BLOCKS_URL_TEMPLATE.format(page_id=page_id), headers=self._headers).json()["results"]
+        url = self.BLOCKS_URL_TEMPLATE.format(page_id=page_id)
+        blocks = []
+        next_cursor = None
+        has_more = True
+        while has_more:
+            response = self._request("GET", url, params=self._get_block_children_params(next_cursor))
+            segment, has_more, next_cursor = self._parse_results_segment(self._loads(response))
+            blocks.extend(segment)
+
+        return blocks
+
+    def get_database_contents(self, database_id, filter=None, max_workers=None) -> Dict[str, list]:
+        """
+        Get the blocks of every page of a Notion database
+
+        The blocks of the pages of each segment are requested simultaneously while the next segment of pages is
+        requested. When the manager has a cache, the stored blocks of a segment are looked up at once, and pages whose
+        `last_edited_time` did not change since their blocks were stored are not requested again.
+
+        :param database_id: id of the database
+        :type database_id: str
+        :param filter: condition the pages must meet (see :func:`get_database`)
+        :type filter: :class:`~.notion_filter.Filter` or dict
+        :param max_workers: maximum number of simultaneous block requests. By default, the size of the connection pool
+        :type max_workers: int
+        :return: list of blocks of each page, by page id, in the order returned by the database query
+        :rtype: Dict[str, list]
+        """
+        query = self._create_query(database_id, filter)
+        page_ids = []
+        contents: Dict[str, list] = {}
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            for pages in self._get_all_segments(self._get_database_query_url(database_id), query):
+                if self.cache is not None:
+                    contents.update(self.cache.get_page_contents({
+                        page["id"]: page["last_edited_time"] for page in pages if page.get("last_edited_time") is not None
+                    }))
+
+                for page in pages:
+                    page_ids.append(page["id"])
+                    if page["id"] not in contents:
+                        pending[page["id"]] = (
+                            page.get("last_edited_time"), executor.submit(self.get_page_blocks, page["id"])
+                        )
+
+            for page_id, (_, future) in pending.items():
+                contents[page_id] = future.result()
+
+        if self.cache is not None and pending:
+            self.cache.put_page_contents(
+                database_id,
+                [
+                    (page_id, last_edited_time, contents[page_id])
+                    for page_id, (last_edited_time, _) in pending.items()
+                    if last_edited_time is not None
+                ]
+            )
+
+        return {page_id: contents[page_id] for page_id in page_ids}
+
+    def get_page_block_tree(self, page_id, max_depth=None, max_workers=None) -> List[dict]:
+        """
+        Get the blocks of a page together with their nested children
+
+        Children are read breadth-first, one level of the tree at a time, requesting the children of several blocks
+        simultaneously. Each block becomes a compact node (a dict with its ``id``, ``type``, type specific
+        ``content``, ``has_children`` and the list of ``children`` nodes).
+
+        :param page_id: id of the page
+        :type page_id: str
+        :param max_depth: number of levels of blocks read. By default, the whole tree
+        :type max_depth: int
+        :param max_workers: maximum number of simultaneous requests. By default, the size of the connection pool
+        :type max_workers: int
+        :return: nodes of the top level blocks of the page
+        :rtype: List[dict]
+        """
+        root: Dict[str, list] = {"children": []}
+        level = [(root, page_id)]
+        depth = 0
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            while level and (max_depth is None or depth < max_depth):
+                next_level = []
+                block_ids = [block_id for _, block_id in level]
+                for (parent, _), blocks in zip(level, executor.map(self.get_page_blocks, block_ids)):
+                    for block in blocks:
+                        node = self._create_block_node(block)
+                        parent["children"].append(node)
+                        if node["has_children"]:
+                            next_level.append((node, node["id"]))
+
+                level = next_level
+                depth += 1
+
+        return root["children"]
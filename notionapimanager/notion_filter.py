@@ -0,0 +1,223 @@
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple
+
+from notionapimanager.notion_property_encoder import PropertyType
+
+
+_TEXT_CONDITIONS = {
+    "equals": "equals",
+    "does_not_equal": "does_not_equal",
+    "contains": "contains",
+    "does_not_contain": "does_not_contain",
+    "starts_with": "starts_with",
+    "ends_with": "ends_with",
+    "is_empty": "is_empty",
+    "is_not_empty": "is_not_empty",
+}
+
+_NUMBER_CONDITIONS = {
+    "equals": "equals",
+    "does_not_equal": "does_not_equal",
+    "greater_than": "greater_than",
+    "less_than": "less_than",
+    "greater_than_or_equal_to": "greater_than_or_equal_to",
+    "less_than_or_equal_to": "less_than_or_equal_to",
+    "is_empty": "is_empty",
+    "is_not_empty": "is_not_empty",
+}
+
+_DATE_CONDITIONS = {
+    "equals": "equals",
+    "greater_than": "after",
+    "less_than": "before",
+    "greater_than_or_equal_to": "on_or_after",
+    "less_than_or_equal_to": "on_or_before",
+    "is_empty": "is_empty",
+    "is_not_empty": "is_not_empty",
+}
+
+_SELECT_CONDITIONS = {
+    "equals": "equals",
+    "does_not_equal": "does_not_equal",
+    "is_empty": "is_empty",
+    "is_not_empty": "is_not_empty",
+}
+
+_CHECKBOX_CONDITIONS = {
+    "equals": "equals",
+    "does_not_equal": "does_not_equal",
+}
+
+PROPERTY_TYPE_TO_FILTER_CONDITIONS_MAP = {
+    PropertyType.TEXT: _TEXT_CONDITIONS,
+    PropertyType.RICH_TEXT: _TEXT_CONDITIONS,
+    PropertyType.TITLE: _TEXT_CONDITIONS,
+    PropertyType.URL: _TEXT_CONDITIONS,
+    PropertyType.NUMBER: _NUMBER_CONDITIONS,
+    PropertyType.DATE: _DATE_CONDITIONS,
+    PropertyType.SELECT: _SELECT_CONDITIONS,
+    PropertyType.CHECKBOX: _CHECKBOX_CONDITIONS,
+}
+
+
+class Filter:
+    """Condition on the pages of a database, compiled into the filter object of Notion API database queries
+
+    Filters can be combined with the operators ``&`` (and) and ``|`` (or).
+    """
+
+    def __and__(self, other):
+        return CompoundFilter("and", [self, other])
+
+    def __or__(self, other):
+        return CompoundFilter("or", [self, other])
+
+    def compile(self, property_types: Dict[str, PropertyType]) -> dict:
+        """
+        Translate the filter into the JSON object expected by Notion API
+
+        :param property_types: type of each property of the database
+        :type property_types: Dict[str, :class:`~.notion_property_encoder.PropertyType`]
+        :return: filter object
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+
+class PropertyFilter(Filter):
+    """Condition on the value of one property"""
+
+    def __init__(self, property_name, condition, value=True):
+        self.property_name = property_name
+        self.condition = condition
+        self.value = value
+
+    def __repr__(self):
+        return f"PropertyFilter({self.property_name!r}, {self.condition!r}, {self.value!r})"
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+
+        return value
+
+    def compile(self, property_types: Dict[str, PropertyType]) -> dict:
+        if self.property_name not in property_types:
+            raise ValueError(f"The database has no property {self.property_name!r}")
+
+        property_type = property_types[self.property_name]
+        conditions = PROPERTY_TYPE_TO_FILTER_CONDITIONS_MAP.get(property_type, {})
+        if self.condition not in conditions:
+            raise ValueError(
+                f"Properties of type {property_type.value} cannot be filtered with condition {self.condition!r}"
+            )
+
+        return {
+            "property": self.property_name,
+            property_type.value: {conditions[self.condition]: self._encode_value(self.value)}
+        }
+
+
+class CompoundFilter(Filter):
+    """Conjunction or disjunction of several filters"""
+
+    def __init__(self, operator, filters: List[Filter]):
+        self.operator = operator
+        self.filters: List[Filter] = [
+            nested_filter
+            for compound_filter in filters
+            for nested_filter in (
+                compound_filter.filters
+                if isinstance(compound_filter, CompoundFilter) and compound_filter.operator == operator
+                else [compound_filter]
+            )
+        ]
+
+    def __repr__(self):
+        return f"CompoundFilter({self.operator!r}, {self.filters!r})"
+
+    def compile(self, property_types: Dict[str, PropertyType]) -> dict:
+        return {self.operator: [nested_filter.compile(property_types) for nested_filter in self.filters]}
+
+
+class Property:
+    """Entry point to build filters on a property of a database
+
+    For example, ``(Property("Price") >= 10) & Property("Category").equals("Books")``.
+    Comparison operators apply to number and date properties.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def equals(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "equals", value)
+
+    def does_not_equal(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "does_not_equal", value)
+
+    def contains(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "contains", value)
+
+    def does_not_contain(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "does_not_contain", value)
+
+    def starts_with(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "starts_with", value)
+
+    def ends_with(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "ends_with", value)
+
+    def is_empty(self) -> PropertyFilter:
+        return PropertyFilter(self.name, "is_empty")
+
+    def is_not_empty(self) -> PropertyFilter:
+        return PropertyFilter(self.name, "is_not_empty")
+
+    def __gt__(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "greater_than", value)
+
+    def __lt__(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "less_than", value)
+
+    def __ge__(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "greater_than_or_equal_to", value)
+
+    def __le__(self, value) -> PropertyFilter:
+        return PropertyFilter(self.name, "less_than_or_equal_to", value)
+
+
+def range_partitions(property_name, boundaries: List) -> List[Filter]:
+    """
+    Split the pages of a database into disjoint filters by ranges of a number or date property
+
+    For boundaries ``[b1, b2]`` the filters are ``x < b1``, ``b1 <= x < b2``, ``x >= b2`` and ``x`` is empty, so every
+    page meets exactly one of them.
+
+    :param property_name: name of the number or date property
+    :type property_name: str
+    :param boundaries: sorted values where a range ends and the next one starts
+    :type boundaries: List[float or date]
+    :return: one filter per range, and a last one for the pages without value
+    :rtype: List[:class:`Filter`]
+    """
+    partition_property = Property(property_name)
+    if not boundaries:
+        return [partition_property.is_not_empty(), partition_property.is_empty()]
+
+    return (
+        [partition_property < boundaries[0]]
+        + [(partition_property >= lower) & (partition_property < upper) for lower, upper in zip(boundaries, boundaries[1:])]
+        + [partition_property >= boundaries[-1], partition_property.is_empty()]
+    )
+
+
+class Sort(NamedTuple):
+    """Order of the pages returned by a database query"""
+    property_name: str
+    descending: bool = False
+
+    def compile(self) -> dict:
+        """Translate the sort into the JSON object expected by Notion API"""
+        return {"property": self.property_name, "direction": "descending" if self.descending else "ascending"}
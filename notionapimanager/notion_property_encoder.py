@@ -1,7 +1,16 @@
+from __future__ import annotations
+
 from enum import Enum, unique
-from typing import Any, NamedTuple
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from notionapimanager.lazy_import import LazyModule
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = LazyModule("pandas")
+np = LazyModule("numpy")
 
 
 class EnrichedEnum(Enum):
@@ -20,6 +29,7 @@ class PropertyType(EnrichedEnum):
     CHECKBOX = "checkbox"
     NUMBER = "number"
     URL = "url"
+    RELATION = "relation"
     UNKNOWN = "unknown"
 
 
@@ -33,6 +43,11 @@ class PropertyValue(NamedTuple):
     value: Any
 
 
+class PageRecord(NamedTuple):
+    id: Optional[str]
+    properties: Dict[str, Any]
+
+
 class NotionPropertyDecoder:
     """Transforms Notion page property encoded values (as returned by Notion API in JSON format) into domain object values
 
@@ -44,7 +59,8 @@ class NotionPropertyDecoder:
             "select": self._select_decoder,
             "rich_text": self._rich_text_decoder,
             "title": self._rich_text_decoder,
-            "date": self._date_decoder
+            "date": self._date_decoder,
+            "relation": self._relation_decoder
         }
 
     def _get_decoder_for_type(self, property_type):
@@ -59,6 +75,9 @@ class NotionPropertyDecoder:
 
     @classmethod
     def _select_decoder(cls, property_value):
+        if not property_value:
+            return None
+
         return property_value["name"]
 
     @classmethod
@@ -70,8 +89,15 @@ class NotionPropertyDecoder:
 
     @classmethod
     def _date_decoder(cls, property_value):
+        if not property_value:
+            return None
+
         return pd.to_datetime(property_value["start"])
 
+    @classmethod
+    def _relation_decoder(cls, property_value):
+        return [related_page["id"] for related_page in property_value]
+
     @classmethod
     def _get_property_type(cls, property_data):
         return property_data["type"]
@@ -88,6 +114,133 @@ class NotionPropertyDecoder:
         return self._get_decoder_for_type(property_type)(encoded_property_value)
 
 
+class ColumnarNotionPropertyDecoder:
+    """Transforms the encoded values of a property of many pages into a column, following a plan compiled once from the
+    database schema
+
+    The values of each column are first extracted from the JSON of all the pages with a single loop, and then converted
+    together into a typed column, e.g. parsing all the dates with one call to `pd.to_datetime`. Properties missing from
+    the schema are planned the first time they are found, from their type in the pages.
+
+    Use the methods :func:`~ColumnarNotionPropertyDecoder.extract_column` and
+    :func:`~ColumnarNotionPropertyDecoder.finalize_column`
+    """
+
+    def __init__(self, property_types: Dict[str, PropertyType]):
+        self.property_types = property_types
+
+        self._column_types: Dict[str, PropertyType] = {}
+        self._extractors: Dict[str, Any] = {}
+        for property_name, property_type in property_types.items():
+            if property_type != PropertyType.UNKNOWN:
+                self._plan_column(property_name, property_type.value)
+
+    def _plan_column(self, property_name, property_type_str):
+        self._column_types[property_name] = (
+            PropertyType(property_type_str) if PropertyType.has_value(property_type_str) else PropertyType.UNKNOWN
+        )
+        self._extractors[property_name] = {
+            "select": self._extract_select,
+            "rich_text": partial(self._extract_rich_text, "rich_text"),
+            "title": partial(self._extract_rich_text, "title"),
+            "date": self._extract_date,
+            "relation": self._extract_relation,
+        }.get(property_type_str, self._extract_raw)
+
+    @staticmethod
+    def _extract_raw(column):
+        return [None if property_data is None else property_data[property_data["type"]] for property_data in column]
+
+    @staticmethod
+    def _extract_select(column):
+        return [
+            property_data["select"]["name"] if property_data is not None and property_data["select"] else None
+            for property_data in column
+        ]
+
+    @staticmethod
+    def _extract_rich_text(property_type_str, column):
+        return [
+            property_data[property_type_str][0]["plain_text"]
+            if property_data is not None and property_data[property_type_str] else None
+            for property_data in column
+        ]
+
+    @staticmethod
+    def _extract_date(column):
+        return [
+            property_data["date"]["start"] if property_data is not None and property_data["date"] else None
+            for property_data in column
+        ]
+
+    @staticmethod
+    def _extract_relation(column):
+        return [
+            [related_page["id"] for related_page in property_data["relation"]] if property_data is not None else None
+            for property_data in column
+        ]
+
+    def extract_column(self, property_name, column: List[Optional[dict]]) -> list:
+        """
+        Extract the values of a property from its encoded form in a batch of pages
+
+        :param property_name: name of the property
+        :type property_name: str
+        :param column: property data of each page (as returned by Notion API), or None for pages without it
+        :type column: List[dict]
+        :return: extracted values (e.g. the ISO strings of dates), to be converted by :func:`finalize_column`
+        :rtype: list
+        """
+        extractor = self._extractors.get(property_name)
+        if extractor is None:
+            first_property_data = next((property_data for property_data in column if property_data is not None), None)
+            if first_property_data is None:
+                return [None] * len(column)
+            self._plan_column(property_name, first_property_data["type"])
+            extractor = self._extractors[property_name]
+
+        return extractor(column)
+
+    def finalize_column(self, property_name, values: list):
+        """
+        Convert all the extracted values of a property into a column with the right type
+
+        :param property_name: name of the property
+        :type property_name: str
+        :param values: values returned by :func:`extract_column`
+        :type values: list
+        :return: bool array for checkboxes, float array for numbers, datetimes for dates and a list otherwise
+        """
+        property_type = self._column_types.get(property_name)
+        if property_type == PropertyType.DATE:
+            return self._parse_dates(values)
+
+        try:
+            if property_type == PropertyType.CHECKBOX and None not in values:
+                return np.array(values, dtype=bool)
+            if property_type == PropertyType.NUMBER:
+                return np.array(values, dtype=float)
+        except (TypeError, ValueError):
+            pass
+
+        return values
+
+    @staticmethod
+    def _parse_dates(values):
+        # Notion mixes dates with and without time in the same column, so the format cannot be inferred from the first
+        # value. Formats other than ISO 8601 are still accepted, and dates with different time zones, which cannot
+        # share a datetime64 column, are parsed one by one
+        try:
+            return pd.to_datetime(values, format="ISO8601")
+        except (TypeError, ValueError):
+            pass
+
+        try:
+            return pd.to_datetime(values)
+        except (TypeError, ValueError):
+            return [None if value is None else pd.to_datetime(value) for value in values]
+
+
 class NotionPropertyEncoder:
     """Transforms list of domain object values into page property encoded values (as required by Notion API in JSON format)
 
@@ -103,6 +256,7 @@ class NotionPropertyEncoder:
             PropertyType.DATE: self._date_encode,
             PropertyType.CHECKBOX: self._checkbox_encode,
             PropertyType.NUMBER: self._number_encode,
+            PropertyType.RELATION: self._relation_encode,
         }
 
     @staticmethod
@@ -159,7 +313,168 @@ class NotionPropertyEncoder:
     def _number_encode(value):
         return {"number": value}
 
+    @staticmethod
+    def _relation_encode(value: List[str]):
+        return {"relation": [{"id": page_id} for page_id in value]}
+
     def encode(self, value, property_type: PropertyType):
         """This function is the entry point for the class"""
         encoder = self.property_type_to_property_encoder_map[property_type]
         return encoder(value)
+
+
+class ColumnarNotionPropertyEncoder:
+    """Transforms the rows of a DataFrame into page property encoded values, following a plan compiled once for a
+    database schema and a set of columns
+
+    Each column is converted at once (e.g. all the dates are formatted with a single call to `strftime`) into native
+    Python values, and only then are the payloads of the rows assembled. Missing values are left out of the payloads.
+    Numbers are always encoded as floats, as they are decoded, so that equal values give equal payloads.
+
+    Use the method :func:`~ColumnarNotionPropertyEncoder.encode_dataframe`
+    """
+
+    PROPERTY_TYPE_TO_EMPTY_VALUE_MAP: Dict[PropertyType, dict] = {
+        PropertyType.TEXT: {"text": []},
+        PropertyType.RICH_TEXT: {"rich_text": []},
+        PropertyType.TITLE: {"title": []},
+        PropertyType.SELECT: {"select": None},
+        PropertyType.DATE: {"date": None},
+        PropertyType.CHECKBOX: {"checkbox": False},
+        PropertyType.NUMBER: {"number": None},
+        PropertyType.RELATION: {"relation": []},
+    }
+
+    def __init__(self, property_types: Dict[str, PropertyType], columns: Iterable[str]):
+        """
+        :param property_types: type of each property of the database
+        :type property_types: Dict[str, :class:`PropertyType`]
+        :param columns: names of the columns (properties) that will be encoded
+        :type columns: Iterable[str]
+        """
+        self.property_types = property_types
+        self.columns = tuple(columns)
+
+        property_type_to_column_encoder_map: Dict[PropertyType, Callable] = {
+            PropertyType.TEXT: self._encode_text_column,
+            PropertyType.RICH_TEXT: partial(self._encode_rich_text_column, "rich_text"),
+            PropertyType.TITLE: partial(self._encode_rich_text_column, "title"),
+            PropertyType.SELECT: self._encode_select_column,
+            PropertyType.DATE: self._encode_date_column,
+            PropertyType.CHECKBOX: self._encode_checkbox_column,
+            PropertyType.NUMBER: self._encode_number_column,
+            PropertyType.RELATION: self._encode_relation_column,
+        }
+        self._column_encoders: List[Tuple[str, Callable]] = []
+        for column in self.columns:
+            property_type = property_types.get(column)
+            if property_type not in property_type_to_column_encoder_map:
+                raise ValueError(f"Column {column!r} does not match a property that can be encoded")
+            self._column_encoders.append((column, property_type_to_column_encoder_map[property_type]))
+
+        self.empty_values = {
+            column: self.PROPERTY_TYPE_TO_EMPTY_VALUE_MAP[property_types[column]] for column in self.columns
+        }
+        """Encoded value clearing each column, to send in place of missing values when updating pages"""
+
+    @staticmethod
+    def _encode_text_column(values, missing):
+        return [
+            None if is_missing else {"text": {"content": value}}
+            for value, is_missing in zip(values.tolist(), missing)
+        ]
+
+    @staticmethod
+    def _encode_rich_text_column(property_type_str, values, missing):
+        return [
+            None if is_missing else {property_type_str: [{"text": {"content": value}}]}
+            for value, is_missing in zip(values.tolist(), missing)
+        ]
+
+    @staticmethod
+    def _encode_select_column(values, missing):
+        return [
+            None if is_missing else {"select": {"name": value}}
+            for value, is_missing in zip(values.tolist(), missing)
+        ]
+
+    @staticmethod
+    def _encode_date_column(values, missing):
+        # Dates with different UTC offsets (e.g. either side of a DST change), as decoded from Notion, cannot share a
+        # datetime64 column, so each of them is formatted in its own time zone instead
+        try:
+            dates = pd.to_datetime(values).dt.strftime("%Y-%m-%d").tolist()
+        except (AttributeError, TypeError, ValueError):
+            dates = [
+                None if is_missing else pd.Timestamp(value).strftime("%Y-%m-%d")
+                for value, is_missing in zip(values.tolist(), missing)
+            ]
+        return [
+            None if is_missing else {"date": {"start": date, "end": None, "time_zone": None}}
+            for date, is_missing in zip(dates, missing)
+        ]
+
+    @staticmethod
+    def _encode_checkbox_column(values, missing):
+        values = np.where(missing, False, values.to_numpy(dtype=object)).astype(bool)
+        return [None if is_missing else {"checkbox": value} for value, is_missing in zip(values.tolist(), missing)]
+
+    @staticmethod
+    def _encode_number_column(values, missing):
+        values = values.to_numpy(dtype=float, na_value=np.nan)
+        return [None if is_missing else {"number": value} for value, is_missing in zip(values.tolist(), missing)]
+
+    @staticmethod
+    def _encode_relation_column(values, missing):
+        return [
+            None if is_missing else {"relation": [{"id": page_id} for page_id in value]}
+            for value, is_missing in zip(values.tolist(), missing)
+        ]
+
+    def _is_empty_text(self, column, value: dict) -> bool:
+        property_type = self.property_types[column]
+        if property_type == PropertyType.TEXT:
+            return value["text"].get("content") == ""
+        if property_type in (PropertyType.TITLE, PropertyType.RICH_TEXT):
+            return all(item.get("text", {}).get("content") == "" for item in value[property_type.value])
+
+        return False
+
+    def normalize(self, properties: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Replace missing values and empty texts with the encoded value clearing their column, so that properties with
+        the same content are equal however they were obtained (e.g. Notion returns a text set to an empty string as an
+        empty list, and an unset checkbox as False)
+
+        :param properties: encoded properties of a row, as returned by :func:`encode_dataframe`
+        :type properties: Dict[str, dict]
+        :return: encoded value of every column of the plan
+        :rtype: Dict[str, dict]
+        """
+        return {
+            column: (
+                self.empty_values[column]
+                if properties.get(column) is None or self._is_empty_text(column, properties[column])
+                else properties[column]
+            )
+            for column in self.columns
+        }
+
+    def encode_dataframe(self, dataframe: pd.DataFrame) -> List[Dict[str, dict]]:
+        """
+        Encode every row of a DataFrame
+
+        :param dataframe: values with a column per property, including at least the columns of the plan
+        :type dataframe: pd.DataFrame
+        :return: encoded properties of each row
+        :rtype: List[Dict[str, dict]]
+        """
+        encoded_columns = []
+        for column, encoder in self._column_encoders:
+            series = dataframe[column]
+            encoded_columns.append(encoder(series, series.isna().to_numpy()))
+
+        return [
+            {column: value for column, value in zip(self.columns, row) if value is not None}
+            for row in zip(*encoded_columns)
+        ] if encoded_columns else [{} for _ in range(len(dataframe))]
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Token bucket limiting how many requests per second are sent to Notion API
+
+    The bucket holds up to `capacity` tokens and is refilled at `rate` tokens per second. Each request takes one token,
+    waiting for it when the bucket is empty. The same instance can be shared between threads and coroutines, since the
+    lock is never held while waiting.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep, async_sleep=asyncio.sleep):
+        """
+        :param rate: sustained number of requests per second
+        :type rate: float
+        :param capacity: maximum number of requests sent in a burst. By default, as many as `rate` (and at least one)
+        :type capacity: float
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1, rate)
+
+        self._clock = clock
+        self._sleep = sleep
+        self._async_sleep = async_sleep
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _reserve(self):
+        """Take a token, possibly borrowing it from the future, and return the time to wait until it exists"""
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0
+
+    def acquire(self):
+        """
+        Block until a request can be sent
+
+        :return: seconds waited
+        :rtype: float
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+
+        return wait
+
+    async def acquire_async(self):
+        """
+        Wait without blocking the event loop until a request can be sent
+
+        :return: seconds waited
+        :rtype: float
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await self._async_sleep(wait)
+
+        return wait
+
+    def pause(self, seconds):
+        """Stop handing out tokens for some seconds, e.g. when Notion API answers with 429 Too Many Requests"""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens, -seconds * self.rate)
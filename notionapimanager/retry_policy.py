@@ -0,0 +1,73 @@
+import json
+from typing import NamedTuple, Optional, Tuple
+
+
+class NotionApiError(Exception):
+    """Error response of Notion API, raised once the request is not worth retrying anymore"""
+
+    def __init__(self, status_code, code=None, message=None):
+        super().__init__(status_code, code, message)
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+    def __str__(self):
+        return f"Notion API responded with status {self.status_code}: {self.code} - {self.message}"
+
+    @classmethod
+    def from_response_body(cls, status_code, body):
+        try:
+            error = json.loads(body)
+            return cls(status_code, error.get("code"), error.get("message"))
+        except (ValueError, AttributeError):
+            return cls(status_code, message=body)
+
+
+class RetryPolicy(NamedTuple):
+    """Decides whether a failed request is sent again and how long to wait before doing it
+
+    Rate limited (429) and server error responses are retried with exponential backoff, unless the response tells
+    how long to wait with the `Retry-After` header.
+
+    A server error does not tell whether the request was applied, so server errors of non idempotent requests (those
+    creating a page) are only retried if `retry_non_idempotent_server_errors` is set, at the risk of duplicating the
+    page. Rate limited requests were not applied, so they are always retried.
+    """
+
+    max_retries: int = 5
+    backoff_factor: float = 0.5
+    max_backoff: float = 30
+    retry_status_codes: Tuple[int, ...] = (429, 500, 502, 503, 504)
+    retry_non_idempotent_server_errors: bool = False
+
+    def get_delay(self, status_code, retry_after, attempt, idempotent=True) -> Optional[float]:
+        """
+        Seconds to wait before retrying a request
+
+        :param status_code: HTTP status code of the response
+        :type status_code: int
+        :param retry_after: value of the `Retry-After` header of the response, if any
+        :type retry_after: str
+        :param attempt: number of retries already done
+        :type attempt: int
+        :param idempotent: whether sending the request again has the same effect as sending it once
+        :type idempotent: bool
+        :return: seconds to wait, or None if the request must not be retried
+        :rtype: float
+        """
+        if attempt >= self.max_retries or status_code not in self.retry_status_codes:
+            return None
+
+        if status_code != 429 and not idempotent and not self.retry_non_idempotent_server_errors:
+            return None
+
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+
+        return min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
@@ -0,0 +1,12 @@
+"""Run every benchmark with sizes small enough for a quick check: ``python -m tests.benchmarks``"""
+from tests.benchmarks import bench_codecs, bench_create_pages, bench_decoder, bench_encoder, bench_get_database, \
+    bench_json, bench_output
+
+
+bench_get_database.main(1000, 10000)
+bench_create_pages.main(500)
+bench_decoder.main(10000)
+bench_encoder.main(10000)
+bench_codecs.main(10000)
+bench_json.main(20)
+bench_output.main(10000)
@@ -0,0 +1,41 @@
+"""Measure the per-cell cost of NotionPropertyDecoder.decode and NotionPropertyEncoder.encode for each property type
+
+Run with ``python -m tests.benchmarks.bench_codecs``
+"""
+from functools import partial
+import timeit
+
+import pandas as pd
+
+from notionapimanager.notion_property_encoder import NotionPropertyDecoder, NotionPropertyEncoder, PropertyType
+from tests.benchmarks.page_factory import make_page, PROPERTY_TYPES
+
+ENCODED_VALUES = {
+    PropertyType.TITLE: "Page 1",
+    PropertyType.RICH_TEXT: "Some text",
+    PropertyType.SELECT: "Option 1",
+    PropertyType.DATE: pd.Timestamp("2022-03-04"),
+    PropertyType.CHECKBOX: True,
+    PropertyType.NUMBER: 1.5,
+}
+
+
+def main(number=100000):
+    decoder = NotionPropertyDecoder()
+    encoder = NotionPropertyEncoder()
+    page = make_page(1)
+
+    print("property type  decode (us/cell)  encode (us/cell)")
+    for name, property_type in PROPERTY_TYPES.items():
+        property_data = page["properties"][name]
+        decode = timeit.timeit(partial(decoder.decode, property_data), number=number) / number
+        if property_type in ENCODED_VALUES:
+            encode_cell = partial(encoder.encode, ENCODED_VALUES[property_type], property_type)
+            encode = f"{timeit.timeit(encode_cell, number=number) / number * 1e6:.2f}"
+        else:
+            encode = "-"
+        print(f"{property_type.value:<14} {decode * 1e6:<17.2f} {encode}")
+
+
+if __name__ == "__main__":
+    main()
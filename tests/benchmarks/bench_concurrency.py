@@ -0,0 +1,51 @@
+"""Measure how create_pages and get_database_contents scale with the number of simultaneous requests, against the
+fake Notion server with a realistic latency
+
+Run with ``python -m tests.benchmarks.bench_concurrency [latency_seconds]``
+"""
+import sys
+import time
+
+import pandas as pd
+
+from notionapimanager import NotionDatabaseApiManager
+from tests.benchmarks.page_factory import PROPERTY_TYPES
+from tests.helpers.fake_notion_server import FakeNotionServer
+
+NUM_PAGES = 200
+WORKERS = (1, 2, 4, 8, 16)
+
+
+def main(latency=0.05, num_pages=NUM_PAGES, workers=WORKERS):
+    """
+    :return: pages per second created by create_pages and read by get_database_contents, by number of workers
+    :rtype: Dict[int, Tuple[float, float]]
+    """
+    throughputs = {}
+    with FakeNotionServer(latency=latency) as server:
+        server.add_database("database_id", PROPERTY_TYPES)
+        dataframe = pd.DataFrame({"Name": [f"Page {number}" for number in range(num_pages)]})
+
+        print(f"{num_pages} pages, {latency * 1000:.0f} ms of latency")
+        print("workers  create_pages (pages/s)  get_database_contents (pages/s)")
+        for max_workers in workers:
+            with NotionDatabaseApiManager(
+                "integration_token", ["database_id"], base_url=server.base_url, requests_per_second=None,
+                pool_size=max_workers
+            ) as manager:
+                started_at = time.perf_counter()
+                manager.create_pages("database_id", dataframe, max_workers=max_workers)
+                created_at = time.perf_counter()
+                manager.get_database_contents("database_id", max_workers=max_workers)
+                read_at = time.perf_counter()
+
+            for page_id in list(server.pages):
+                server.pages[page_id]["archived"] = True
+            throughputs[max_workers] = (num_pages / (created_at - started_at), num_pages / (read_at - created_at))
+            print(f"{max_workers:<8} {throughputs[max_workers][0]:<23.0f} {throughputs[max_workers][1]:.0f}")
+
+    return throughputs
+
+
+if __name__ == "__main__":
+    main(*map(float, sys.argv[1:2]))
@@ -0,0 +1,41 @@
+"""Measure the throughput of create_page and create_pages against a local fake endpoint, without rate limit
+
+Run with ``python -m tests.benchmarks.bench_create_pages [num_pages]``
+"""
+import sys
+import time
+
+import requests_mock
+
+from notionapimanager import NotionDatabaseApiManager
+from notionapimanager.notion_property_encoder import PropertyValue
+from tests.benchmarks.bench_encoder import make_dataframe
+from tests.benchmarks.fake_endpoint import DATABASE_ID, mock_page_creation, set_up_manager
+
+
+def main(num_pages=2000):
+    dataframe = make_dataframe(num_pages)
+    rows = [
+        [PropertyValue(name, value) for name, value in row.items()] for row in dataframe.to_dict("records")
+    ]
+    with requests_mock.Mocker() as requests_mocker:
+        mock_page_creation(requests_mocker)
+        manager = set_up_manager(NotionDatabaseApiManager("integration_token", [DATABASE_ID], requests_per_second=None))
+
+        started_at = time.perf_counter()
+        for page_properties in rows:
+            manager.create_page(DATABASE_ID, page_properties)
+        one_by_one = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        manager.create_pages(DATABASE_ID, dataframe)
+        bulk = time.perf_counter() - started_at
+        manager.close()
+
+    print(f"Creating {num_pages} pages")
+    print(f"  create_page loop:        {num_pages / one_by_one:.0f} pages/s")
+    print(f"  create_pages(DataFrame): {num_pages / bulk:.0f} pages/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,41 @@
+"""Compare the per-cell NotionPropertyDecoder with the schema-compiled ColumnarNotionPropertyDecoder
+
+Run with ``python -m tests.benchmarks.bench_decoder [num_pages]``
+"""
+import sys
+import timeit
+
+import pandas as pd
+
+from notionapimanager.dataframe_builder import DataFrameBuilder
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder, NotionPropertyDecoder
+from tests.benchmarks.page_factory import make_pages, PROPERTY_TYPES
+
+
+def decode_per_cell(pages):
+    decoder = NotionPropertyDecoder()
+    return pd.DataFrame(
+        [{name: decoder.decode(value) for name, value in page["properties"].items()} for page in pages],
+        index=[page["id"] for page in pages]
+    )
+
+
+def decode_per_column(pages):
+    builder = DataFrameBuilder(ColumnarNotionPropertyDecoder(PROPERTY_TYPES))
+    builder.add_pages(pages)
+    return builder.build()
+
+
+def main(num_pages=10000, repeat=3):
+    pages = make_pages(num_pages)
+    per_cell = min(timeit.repeat(lambda: decode_per_cell(pages), number=1, repeat=repeat))
+    per_column = min(timeit.repeat(lambda: decode_per_column(pages), number=1, repeat=repeat))
+
+    print(f"Decoding {num_pages} pages of {len(PROPERTY_TYPES)} properties")
+    print(f"  per cell:   {per_cell:.3f} s")
+    print(f"  per column: {per_column:.3f} s ({per_cell / per_column:.1f}x faster)")
+    return per_cell, per_column
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
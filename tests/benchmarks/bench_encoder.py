@@ -0,0 +1,60 @@
+"""Compare the per-cell NotionPropertyEncoder with the compiled ColumnarNotionPropertyEncoder when turning a DataFrame
+into page creation payloads
+
+Run with ``python -m tests.benchmarks.bench_encoder [num_rows]``
+"""
+import sys
+import timeit
+
+import pandas as pd
+
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyEncoder, NotionPropertyEncoder, \
+    PropertyType
+
+
+PROPERTY_TYPES = {
+    "Name": PropertyType.TITLE,
+    "Description": PropertyType.RICH_TEXT,
+    "Category": PropertyType.SELECT,
+    "Day": PropertyType.DATE,
+    "Done": PropertyType.CHECKBOX,
+    "Amount": PropertyType.NUMBER,
+}
+
+
+def make_dataframe(num_rows):
+    return pd.DataFrame({
+        "Name": [f"Page {number}" for number in range(num_rows)],
+        "Description": ["Some text"] * num_rows,
+        "Category": [f"Option {number % 5}" for number in range(num_rows)],
+        "Day": pd.date_range("2022-01-01", periods=num_rows, freq="h"),
+        "Done": [number % 2 == 0 for number in range(num_rows)],
+        "Amount": [number * 1.5 for number in range(num_rows)],
+    })
+
+
+def encode_per_cell(dataframe):
+    encoder = NotionPropertyEncoder()
+    return [
+        {name: encoder.encode(value, PROPERTY_TYPES[name]) for name, value in row.items() if not pd.isna(value)}
+        for row in dataframe.to_dict("records")
+    ]
+
+
+def encode_per_column(dataframe):
+    return ColumnarNotionPropertyEncoder(PROPERTY_TYPES, dataframe.columns).encode_dataframe(dataframe)
+
+
+def main(num_rows=100000, repeat=3):
+    dataframe = make_dataframe(num_rows)
+    per_cell = min(timeit.repeat(lambda: encode_per_cell(dataframe), number=1, repeat=repeat))
+    per_column = min(timeit.repeat(lambda: encode_per_column(dataframe), number=1, repeat=repeat))
+
+    print(f"Encoding {num_rows} rows of {len(PROPERTY_TYPES)} properties")
+    print(f"  per cell:   {per_cell:.3f} s")
+    print(f"  per column: {per_column:.3f} s ({per_cell / per_column:.1f}x faster)")
+    return per_cell, per_column
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,61 @@
+"""Measure get_database against a local fake endpoint: network, decode and DataFrame assembly time, and peak memory
+
+The rest of the total time is mostly spent parsing the JSON responses. Peak memory is measured in a separate run, since
+tracing allocations slows everything down.
+
+Run with ``python -m tests.benchmarks.bench_get_database [num_pages ...]`` (by default 1000, 10000 and 100000 pages)
+"""
+import sys
+import time
+import tracemalloc
+
+import requests_mock
+
+from notionapimanager import NotionDatabaseApiManager
+from notionapimanager.dataframe_builder import DataFrameBuilder
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder
+from tests.benchmarks.fake_endpoint import DATABASE_ID, mock_database_query, set_up_manager
+from tests.benchmarks.page_factory import make_pages, PROPERTY_TYPES
+
+
+def read_database(pages, trace_memory=False):
+    with requests_mock.Mocker() as requests_mocker:
+        mock_database_query(requests_mocker, pages)
+        manager = set_up_manager(NotionDatabaseApiManager("integration_token", [DATABASE_ID], requests_per_second=None))
+
+        if trace_memory:
+            tracemalloc.start()
+        started_at = time.perf_counter()
+        manager.get_database(DATABASE_ID)
+        total = time.perf_counter() - started_at
+        peak_memory = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        tracemalloc.stop()
+        manager.close()
+
+    return total, manager.instrumentation.get_stats().network_time, peak_memory
+
+
+def measure_decoding(pages):
+    builder = DataFrameBuilder(ColumnarNotionPropertyDecoder(PROPERTY_TYPES))
+    started_at = time.perf_counter()
+    builder.add_pages(pages)
+    decoded_at = time.perf_counter()
+    builder.build()
+    return decoded_at - started_at, time.perf_counter() - decoded_at
+
+
+def main(*sizes):
+    print("pages     total (s)  network (s)  decode (s)  assembly (s)  peak memory (MiB)")
+    for num_pages in sizes or (1000, 10000, 100000):
+        pages = make_pages(num_pages)
+        total, network, _ = read_database(pages)
+        _, _, peak_memory = read_database(pages, trace_memory=True)
+        decode, assembly = measure_decoding(pages)
+        print(
+            f"{num_pages:<9} {total:<10.3f} {network:<12.3f} {decode:<11.3f} {assembly:<13.3f} "
+            f"{peak_memory / 2 ** 20:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
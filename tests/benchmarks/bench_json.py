@@ -0,0 +1,26 @@
+"""Compare the JSON backends serializing page creation bodies and parsing query responses of 100 pages
+
+Run with ``python -m tests.benchmarks.bench_json [num_segments]``
+"""
+from functools import partial
+import json
+import sys
+import timeit
+
+from notionapimanager.json_backend import JsonBackend, OrjsonBackend
+from tests.benchmarks.page_factory import make_pages
+
+
+def main(num_segments=100, repeat=3):
+    segment = json.dumps({"results": make_pages(100), "next_cursor": None, "has_more": False}).encode()
+    body = {"parent": {"database_id": "database_id"}, "properties": make_pages(1)[0]["properties"]}
+
+    print(f"Parsing {num_segments} segments of 100 pages ({len(segment) / 2 ** 10:.0f} KiB each)")
+    for backend in [JsonBackend(), OrjsonBackend()]:
+        parse = min(timeit.repeat(partial(backend.loads, segment), number=num_segments, repeat=repeat))
+        serialize = min(timeit.repeat(partial(backend.dumps, body), number=num_segments * 100, repeat=repeat))
+        print(f"  {backend.name:<7} parse: {parse:.3f} s, serialize {num_segments * 100} bodies: {serialize:.3f} s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
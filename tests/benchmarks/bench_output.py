@@ -0,0 +1,26 @@
+"""Compare the memory used by the output formats of get_database
+
+Run with ``python -m tests.benchmarks.bench_output [num_pages]``
+"""
+import sys
+
+from notionapimanager.compact_output import compact_dataframe, to_arrow_table
+from notionapimanager.dataframe_builder import DataFrameBuilder
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder
+from tests.benchmarks.page_factory import make_pages, PROPERTY_TYPES
+
+
+def main(num_pages=100000):
+    builder = DataFrameBuilder(ColumnarNotionPropertyDecoder(PROPERTY_TYPES))
+    builder.add_pages(make_pages(num_pages))
+    dataframe = builder.build()
+
+    print(f"Memory of {num_pages} pages of {len(PROPERTY_TYPES)} properties")
+    print(f"  pandas:  {dataframe.memory_usage(deep=True).sum() / 2 ** 20:.1f} MiB")
+    compact = compact_dataframe(dataframe, PROPERTY_TYPES)
+    print(f"  compact: {compact.memory_usage(deep=True).sum() / 2 ** 20:.1f} MiB")
+    print(f"  arrow:   {to_arrow_table(dataframe, PROPERTY_TYPES).nbytes / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,42 @@
+"""Local stand-in for the Notion API endpoints used by the benchmarks, served in process with requests_mock
+
+Responses are serialized in advance, so that the benchmarks measure the client and not the fake server.
+"""
+import json
+
+from tests.benchmarks.page_factory import PROPERTY_TYPES
+
+DATABASE_ID = "benchmark_database"
+QUERY_URL = f"https://api.notion.com/v1/databases/{DATABASE_ID}/query"
+PAGES_URL = "https://api.notion.com/v1/pages"
+
+
+def mock_database_query(requests_mocker, pages, page_size=100):
+    """Serve `pages` from the query endpoint of :data:`DATABASE_ID`, `page_size` at a time"""
+    segments = {}
+    for start in range(0, max(len(pages), 1), page_size):
+        end = start + page_size
+        has_more = end < len(pages)
+        segments[str(start) if start else None] = json.dumps({
+            "object": "list",
+            "results": pages[start:end],
+            "next_cursor": str(end) if has_more else None,
+            "has_more": has_more,
+        })
+
+    requests_mocker.post(
+        QUERY_URL,
+        text=lambda request, context: segments[(request.json() or {}).get("start_cursor")]
+    )
+
+
+def mock_page_creation(requests_mocker):
+    requests_mocker.post(PAGES_URL, text='{"object": "page", "id": "new_page"}')
+
+
+def set_up_manager(manager):
+    """Connect a manager to the fake endpoint, with the schema of the benchmark database already known"""
+    manager._prepare_connection()
+    manager._session = manager._create_session()
+    manager._property_types = {DATABASE_ID: PROPERTY_TYPES}
+    return manager
@@ -0,0 +1,40 @@
+from notionapimanager.notion_property_encoder import PropertyType
+
+
+PROPERTY_TYPES = {
+    "Name": PropertyType.TITLE,
+    "Description": PropertyType.RICH_TEXT,
+    "Category": PropertyType.SELECT,
+    "Day": PropertyType.DATE,
+    "Done": PropertyType.CHECKBOX,
+    "Amount": PropertyType.NUMBER,
+    "Link": PropertyType.URL,
+}
+
+
+def make_page(number):
+    """Page of a database with :data:`PROPERTY_TYPES`, as returned by Notion API"""
+    return {
+        "object": "page",
+        "id": f"page-{number:08d}",
+        "created_time": "2022-06-04T16:34:00.000Z",
+        "last_edited_time": "2022-06-06T23:09:00.000Z",
+        "archived": False,
+        "properties": {
+            "Name": {"id": "title", "type": "title", "title": [{"plain_text": f"Page {number}"}]},
+            "Description": {"id": "a", "type": "rich_text", "rich_text": [{"plain_text": "Some text"}]},
+            "Category": {"id": "b", "type": "select", "select": {"name": f"Option {number % 5}"}},
+            "Day": {
+                "id": "c",
+                "type": "date",
+                "date": {"start": f"2022-{number % 12 + 1:02d}-{number % 28 + 1:02d}", "end": None}
+            },
+            "Done": {"id": "d", "type": "checkbox", "checkbox": number % 2 == 0},
+            "Amount": {"id": "e", "type": "number", "number": number * 1.5},
+            "Link": {"id": "f", "type": "url", "url": f"https://example.com/{number}"},
+        },
+    }
+
+
+def make_pages(num_pages):
+    return [make_page(number) for number in range(num_pages)]
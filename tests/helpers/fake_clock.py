@@ -0,0 +1,15 @@
+"""Clock whose time only moves when the test says so, to replace `time.time` or `time.perf_counter`"""
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
@@ -0,0 +1,399 @@
+"""In-process fake of the parts of Notion API used by the managers, served over HTTP on localhost
+
+It keeps databases, pages and block children in memory and supports database queries with cursors, filters and
+sorts, page creation, update and archiving, and block children pagination. Latency, maximum page size and a server side
+rate limit (answered with 429 and Retry-After) can be configured to exercise the concurrency and retry features of the
+managers offline::
+
+    with FakeNotionServer(latency=0.05, requests_per_second=10) as server:
+        server.add_database("database_id", {"Name": PropertyType.TITLE})
+        manager = NotionDatabaseApiManager("token", ["database_id"], base_url=server.base_url)
+"""
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+import uuid
+
+
+class FakeNotionServer:
+    def __init__(self, latency=0, page_size=100, requests_per_second=None, retry_after=1):
+        """
+        :param latency: seconds each response is delayed
+        :param page_size: maximum number of results returned at a time, whatever the client asks for
+        :param requests_per_second: requests accepted per second (in bursts of as many); the rest get a 429 response.
+            None accepts everything
+        :param retry_after: value of the Retry-After header of 429 responses
+        """
+        self.latency = latency
+        self.page_size = page_size
+        self.requests_per_second = requests_per_second
+        self.retry_after = retry_after
+
+        self.databases = {}
+        self.pages = {}
+        self.blocks = {}
+        self.requests = []
+        self.rate_limited_count = 0
+        self.max_concurrent_requests = 0
+
+        self._lock = threading.Lock()
+        self._concurrent_requests = 0
+        self._tokens = None
+        self._tokens_updated_at = time.monotonic()
+        self._clock = itertools.count()
+        self._server = None
+        self._thread = None
+
+    # Lifecycle
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.01,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    # Data
+
+    def _next_time(self):
+        """Strictly increasing `last_edited_time`, one minute apart, as Notion truncates them to minutes"""
+        moment = datetime(2022, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=next(self._clock))
+        return moment.strftime("%Y-%m-%dT%H:%M:00.000Z")
+
+    def add_database(self, database_id, property_types):
+        """Create a database whose properties have the given :class:`PropertyType`"""
+        self.databases[database_id] = {
+            "object": "database",
+            "id": database_id,
+            "last_edited_time": self._next_time(),
+            "properties": {
+                name: {"id": name, "name": name, "type": property_type.value, property_type.value: {}}
+                for name, property_type in property_types.items()
+            },
+        }
+        return self.databases[database_id]
+
+    def add_page(self, database_id, properties, page_id=None):
+        """Create a page in a database from its properties encoded as in the responses of Notion API"""
+        page_id = page_id or str(uuid.uuid4())
+        self.pages[page_id] = {
+            "object": "page",
+            "id": page_id,
+            "created_time": self._next_time(),
+            "last_edited_time": self._next_time(),
+            "archived": False,
+            "parent": {"type": "database_id", "database_id": database_id},
+            "properties": {
+                name: dict(value, id=name, type=self._get_property_type(database_id, name))
+                for name, value in properties.items()
+            },
+        }
+        return self.pages[page_id]
+
+    def add_blocks(self, parent_id, blocks):
+        """Append children blocks (dicts with at least a type and its content) to a page or block"""
+        children = self.blocks.setdefault(parent_id, [])
+        for block in blocks:
+            children.append(
+                dict(
+                    {"object": "block", "id": str(uuid.uuid4()), "has_children": False, "archived": False},
+                    **block
+                )
+            )
+        return children
+
+    def _get_property_type(self, database_id, name):
+        return self.databases[database_id]["properties"][name]["type"]
+
+    def get_database_pages(self, database_id):
+        return [
+            page for page in self.pages.values()
+            if page["parent"]["database_id"] == database_id and not page["archived"]
+        ]
+
+    # Requests
+
+    def _enter_request(self, method, path):
+        with self._lock:
+            self.requests.append((method, path))
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests, self._concurrent_requests)
+            if self.requests_per_second is None:
+                return True
+
+            now = time.monotonic()
+            if self._tokens is None:
+                self._tokens = self.requests_per_second
+            self._tokens = min(
+                self.requests_per_second,
+                self._tokens + (now - self._tokens_updated_at) * self.requests_per_second
+            )
+            self._tokens_updated_at = now
+            if self._tokens < 1:
+                self.rate_limited_count += 1
+                return False
+
+            self._tokens -= 1
+            return True
+
+    def _exit_request(self):
+        with self._lock:
+            self._concurrent_requests -= 1
+
+    def handle(self, method, path, params, body):
+        """Return the status code and the serialized JSON body of the response to a request"""
+        routes = [
+            ("GET", r"/v1/databases/([^/]+)", self._get_database),
+            ("POST", r"/v1/databases/([^/]+)/query", self._query_database),
+            ("POST", r"/v1/pages", self._create_page),
+            ("GET", r"/v1/pages/([^/]+)", self._get_page),
+            ("PATCH", r"/v1/pages/([^/]+)", self._update_page),
+            ("GET", r"/v1/blocks/([^/]+)/children", self._get_block_children),
+        ]
+        for route_method, pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                with self._lock:
+                    status_code, response = handler(*match.groups(), params=params, body=body)
+                    return status_code, json.dumps(response).encode()
+
+        status_code, response = _error(404, "invalid_request_url", f"Invalid request URL: {method} {path}")
+        return status_code, json.dumps(response).encode()
+
+    def _get_database(self, database_id, params, body):
+        if database_id not in self.databases:
+            return _error(404, "object_not_found", f"Could not find database with ID: {database_id}")
+
+        return 200, self.databases[database_id]
+
+    def _query_database(self, database_id, params, body):
+        if database_id not in self.databases:
+            return _error(404, "object_not_found", f"Could not find database with ID: {database_id}")
+
+        pages = self.get_database_pages(database_id)
+        try:
+            if body.get("filter"):
+                pages = [page for page in pages if _matches(page, body["filter"])]
+        except (KeyError, TypeError) as error:
+            return _error(400, "validation_error", f"Invalid filter: {error}")
+
+        for sort in reversed(body.get("sorts", [])):
+            pages.sort(
+                key=lambda page: _sort_key(page, sort),
+                reverse=sort.get("direction") == "descending"
+            )
+
+        return 200, self._paginate(pages, body.get("start_cursor"), body.get("page_size"))
+
+    def _paginate(self, results, start_cursor, page_size):
+        start = int(start_cursor or 0)
+        end = start + min(int(page_size or 100), self.page_size)
+        has_more = end < len(results)
+        return {
+            "object": "list",
+            "results": results[start:end],
+            "next_cursor": str(end) if has_more else None,
+            "has_more": has_more,
+        }
+
+    def _create_page(self, params, body):
+        database_id = body.get("parent", {}).get("database_id")
+        if database_id not in self.databases:
+            return _error(404, "object_not_found", f"Could not find database with ID: {database_id}")
+
+        unknown = set(body.get("properties", {})) - set(self.databases[database_id]["properties"])
+        if unknown:
+            return _error(400, "validation_error", f"{sorted(unknown)[0]} is not a property that exists.")
+
+        return 200, self.add_page(database_id, _to_response_properties(body.get("properties", {})))
+
+    def _get_page(self, page_id, params, body):
+        if page_id not in self.pages:
+            return _error(404, "object_not_found", f"Could not find page with ID: {page_id}")
+
+        return 200, self.pages[page_id]
+
+    def _update_page(self, page_id, params, body):
+        if page_id not in self.pages:
+            return _error(404, "object_not_found", f"Could not find page with ID: {page_id}")
+
+        page = self.pages[page_id]
+        database_id = page["parent"]["database_id"]
+        unknown = set(body.get("properties", {})) - set(self.databases[database_id]["properties"])
+        if unknown:
+            return _error(400, "validation_error", f"{sorted(unknown)[0]} is not a property that exists.")
+
+        for name, value in _to_response_properties(body.get("properties", {})).items():
+            page["properties"][name] = dict(value, id=name, type=self._get_property_type(database_id, name))
+        if "archived" in body:
+            page["archived"] = body["archived"]
+        page["last_edited_time"] = self._next_time()
+        return 200, page
+
+    def _get_block_children(self, block_id, params, body):
+        if block_id not in self.blocks and block_id not in self.pages:
+            return _error(404, "object_not_found", f"Could not find block with ID: {block_id}")
+
+        return 200, self._paginate(
+            self.blocks.get(block_id, []),
+            params.get("start_cursor", [None])[0],
+            params.get("page_size", [None])[0]
+        )
+
+
+def _error(status_code, code, message):
+    return status_code, {"object": "error", "status": status_code, "code": code, "message": message}
+
+
+def _to_response_properties(properties):
+    """Add the plain_text field that Notion API adds to the rich texts of the properties sent"""
+    response_properties = {}
+    for name, value in properties.items():
+        value = json.loads(json.dumps(value))
+        for rich_text_type in ("title", "rich_text", "text"):
+            if isinstance(value.get(rich_text_type), list):
+                for rich_text in value[rich_text_type]:
+                    rich_text["plain_text"] = rich_text.get("text", {}).get("content", "")
+        response_properties[name] = value
+    return response_properties
+
+
+def _get_value(page, property_name):
+    """Simple value of a property of a page, used to filter and sort"""
+    property_data = page["properties"].get(property_name)
+    if property_data is None:
+        return None
+
+    property_type = property_data["type"]
+    value = property_data.get(property_type)
+    if property_type in ("title", "rich_text", "text"):
+        return "".join(rich_text.get("plain_text", "") for rich_text in value or []) or None
+    if property_type == "select":
+        return value["name"] if value else None
+    if property_type == "date":
+        return value["start"] if value else None
+    return value
+
+
+def _matches(page, page_filter):
+    if "and" in page_filter:
+        return all(_matches(page, nested_filter) for nested_filter in page_filter["and"])
+    if "or" in page_filter:
+        return any(_matches(page, nested_filter) for nested_filter in page_filter["or"])
+
+    if "timestamp" in page_filter:
+        value = page[page_filter["timestamp"]]
+        (condition, expected), = page_filter[page_filter["timestamp"]].items()
+        precision = 19
+    else:
+        value = _get_value(page, page_filter["property"])
+        property_type, conditions = next((key, value) for key, value in page_filter.items() if key != "property")
+        (condition, expected), = conditions.items()
+        precision = 10 if property_type == "date" else None
+
+    if condition == "is_empty":
+        return value in (None, "", [])
+    if condition == "is_not_empty":
+        return value not in (None, "", [])
+    if condition in ("equals", "does_not_equal"):
+        return (value == expected) == (condition == "equals")
+    if value is None:
+        return False
+    if condition in ("contains", "does_not_contain"):
+        return (expected in value) == (condition == "contains")
+    if condition == "starts_with":
+        return value.startswith(expected)
+    if condition == "ends_with":
+        return value.endswith(expected)
+
+    if precision is not None:
+        value, expected = value[:precision], expected[:precision]
+    return {
+        "greater_than": value > expected,
+        "after": value > expected,
+        "less_than": value < expected,
+        "before": value < expected,
+        "greater_than_or_equal_to": value >= expected,
+        "on_or_after": value >= expected,
+        "less_than_or_equal_to": value <= expected,
+        "on_or_before": value <= expected,
+    }[condition]
+
+
+def _sort_key(page, sort):
+    value = page[sort["timestamp"]] if "timestamp" in sort else _get_value(page, sort["property"])
+    return (value is None, value if value is not None else 0)
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _handle(self, method):
+            url = urlsplit(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+
+            accepted = server._enter_request(method, url.path)
+            try:
+                if server.latency:
+                    time.sleep(server.latency)
+
+                headers = {}
+                if not accepted:
+                    status_code, error = _error(429, "rate_limited", "You have been rate limited.")
+                    payload = json.dumps(error).encode()
+                    headers["Retry-After"] = str(server.retry_after)
+                elif self.headers.get("Authorization", "").startswith("Bearer "):
+                    status_code, payload = server.handle(
+                        method, url.path, parse_qs(url.query), json.loads(raw_body) if raw_body else {}
+                    )
+                else:
+                    status_code, error = _error(401, "unauthorized", "API token is invalid.")
+                    payload = json.dumps(error).encode()
+            finally:
+                server._exit_request()
+
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._handle("GET")
+
+        def do_POST(self):
+            self._handle("POST")
+
+        def do_PATCH(self):
+            self._handle("PATCH")
+
+    return Handler
+
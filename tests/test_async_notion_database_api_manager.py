@@ -0,0 +1,356 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+import httpx
+import pandas as pd
+from pandas._testing import assert_frame_equal
+
+from notionapimanager.async_notion_database_api_manager import AsyncNotionDatabaseApiManager
+from notionapimanager.notion_filter import Property, Sort
+from notionapimanager.notion_property_encoder import PageRecord, PropertyType, PropertyValue
+from notionapimanager.rate_limiter import RateLimiter
+from notionapimanager.retry_policy import NotionApiError
+
+
+class AsyncNotionDatabaseApiManagerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.requests = []
+        self.responses = {}
+        self.manager = AsyncNotionDatabaseApiManager(
+            "integration_token_1234", ["database_id_12345678"], requests_per_second=None
+        )
+        self.manager._prepare_connection()
+        self.manager._property_types = {
+            "database_id_12345678": {
+                "property1": PropertyType.CHECKBOX,
+                "property2": PropertyType.TEXT,
+                "property3": PropertyType.SELECT
+            }
+        }
+        self.manager._client = self.manager._create_client(transport=httpx.MockTransport(self._handle))
+
+    async def asyncTearDown(self) -> None:
+        await self.manager.close()
+
+    def _handle(self, request):
+        self.requests.append(request)
+        responses = self.responses[(request.method, str(request.url))]
+        response = responses.pop(0) if len(responses) > 1 else responses[0]
+        if isinstance(response, httpx.Response):
+            return response
+        return httpx.Response(200, json=response)
+
+    async def test_connect_fetches_all_schemas_concurrently(self):
+        # Given
+        database_ids = ["database_1", "database_2"]
+        manager = AsyncNotionDatabaseApiManager("integration_token_1234", database_ids)
+        pending = set(database_ids)
+        all_requested = asyncio.Event()
+
+        async def handle(request):
+            database_id = request.url.path.split("/")[-1]
+            pending.discard(database_id)
+            if not pending:
+                all_requested.set()
+            await all_requested.wait()
+            return httpx.Response(200, json={"properties": {"name": {"type": "title"}}})
+
+        manager._create_client = lambda: AsyncNotionDatabaseApiManager._create_client(
+            manager, transport=httpx.MockTransport(handle)
+        )
+        # When
+        await asyncio.wait_for(manager.connect(), timeout=1)
+        await manager.close()
+        # Then
+        self.assertEqual(
+            {
+                "database_1": {"name": PropertyType.TITLE},
+                "database_2": {"name": PropertyType.TITLE},
+            },
+            manager._property_types
+        )
+
+    async def test_context_manager_connects_and_closes(self):
+        # Given
+        manager = AsyncNotionDatabaseApiManager("integration_token_1234", [], pool_size=3, timeout=(1, 2))
+        # When
+        async with manager:
+            client = manager._client
+        # Then
+        self.assertTrue(client.is_closed)
+        self.assertIsNone(manager._client)
+
+    async def test_get_database_follows_cursors(self):
+        # Given
+        self.responses[("POST", "https://api.notion.com/v1/databases/database_id_12345678/query")] = [
+            {
+                "results": [{"id": "page_1", "properties": {"property3": {"type": "select", "select": {"name": "A"}}}}],
+                "next_cursor": "cursor_1",
+                "has_more": True
+            },
+            {
+                "results": [{"id": "page_2", "properties": {"property3": {"type": "select", "select": {"name": "B"}}}}],
+                "next_cursor": None,
+                "has_more": False
+            },
+        ]
+        # When
+        response = await self.manager.get_database("database_id_12345678")
+        # Then
+        assert_frame_equal(
+            response,
+            pd.DataFrame([["A"], ["B"]], columns=["property3"], index=["page_1", "page_2"])
+        )
+        self.assertEqual({"start_cursor": "cursor_1"}, json.loads(self.requests[1].content))
+        self.assertEqual("Bearer integration_token_1234", self.requests[0].headers["Authorization"])
+
+    async def test_get_databases_returns_a_dataframe_per_database(self):
+        # Given
+        self.manager.database_ids = ["database_1", "database_2"]
+        for database_id in self.manager.database_ids:
+            self.manager._property_types[database_id] = {"property3": PropertyType.SELECT}
+            self.responses[("POST", f"https://api.notion.com/v1/databases/{database_id}/query")] = [{
+                "results": [{"id": f"{database_id}_page", "properties": {"property3": {"type": "select", "select": None}}}],
+                "next_cursor": None,
+                "has_more": False
+            }]
+        # When
+        dataframes = await self.manager.get_databases(max_concurrency=1)
+        # Then
+        self.assertEqual(["database_1", "database_2"], list(dataframes))
+        self.assertEqual(["database_1_page"], list(dataframes["database_1"].index))
+
+    async def test_get_records_returns_plain_python_values(self):
+        # Given
+        self.responses[("POST", "https://api.notion.com/v1/databases/database_id_12345678/query")] = [{
+            "results": [
+                {"id": "page_1", "properties": {"day": {"type": "date", "date": {"start": "2022-03-04"}}}}
+            ],
+            "next_cursor": None,
+            "has_more": False
+        }]
+        # When
+        records = await self.manager.get_records("database_id_12345678", page_size=10)
+        # Then
+        self.assertEqual([PageRecord("page_1", {"day": "2022-03-04"})], records)
+        self.assertEqual({"page_size": 10}, json.loads(self.requests[0].content))
+
+    async def test_get_database_with_filter_and_sorts(self):
+        # Given
+        self.responses[("POST", "https://api.notion.com/v1/databases/database_id_12345678/query")] = [
+            {"results": [], "next_cursor": None, "has_more": False}
+        ]
+        # When
+        await self.manager.get_database(
+            "database_id_12345678", filter=Property("property1").equals(True), sorts=[Sort("property3")]
+        )
+        # Then
+        self.assertEqual(
+            {
+                "filter": {"property": "property1", "checkbox": {"equals": True}},
+                "sorts": [{"property": "property3", "direction": "ascending"}],
+            },
+            json.loads(self.requests[0].content)
+        )
+
+    def _mock_two_segments(self):
+        self.responses[("POST", "https://api.notion.com/v1/databases/database_id_12345678/query")] = [
+            {
+                "results": [
+                    {"id": f"page_{number}", "properties": {"property3": {"type": "select", "select": {"name": "A"}}}}
+                    for number in range(3)
+                ],
+                "next_cursor": "cursor_1",
+                "has_more": True
+            },
+            {
+                "results": [{"id": "page_3", "properties": {"property3": {"type": "select", "select": {"name": "B"}}}}],
+                "next_cursor": None,
+                "has_more": False
+            },
+        ]
+
+    async def test_iter_pages(self):
+        # Given
+        self._mock_two_segments()
+        # When
+        pages = [page async for page in self.manager.iter_pages("database_id_12345678")]
+        # Then
+        self.assertEqual(4, len(pages))
+        self.assertEqual(PageRecord("page_3", {"property3": "B"}), pages[-1])
+
+    async def test_iter_pages_and_iter_dataframes_push_down_filter_sorts_and_page_size(self):
+        # Given
+        self._mock_two_segments()
+        query = {"filter": Property("property1").equals(True), "sorts": [Sort("property3")], "page_size": 3}
+        # When
+        pages = [page async for page in self.manager.iter_pages("database_id_12345678", **query)]
+        self._mock_two_segments()
+        dataframes = [dataframe async for dataframe in self.manager.iter_dataframes("database_id_12345678", **query)]
+        # Then
+        self.assertEqual(4, len(pages))
+        self.assertEqual(4, sum(len(dataframe) for dataframe in dataframes))
+        for request in (self.requests[0], self.requests[2]):
+            self.assertEqual(
+                {
+                    "filter": {"property": "property1", "checkbox": {"equals": True}},
+                    "sorts": [{"property": "property3", "direction": "ascending"}],
+                    "page_size": 3,
+                },
+                json.loads(request.content)
+            )
+
+    async def test_iter_dataframes(self):
+        # Given
+        self._mock_two_segments()
+        # When
+        per_segment = [
+            len(dataframe) async for dataframe in self.manager.iter_dataframes("database_id_12345678")
+        ]
+        self._mock_two_segments()
+        per_chunk = [
+            len(dataframe) async for dataframe in self.manager.iter_dataframes("database_id_12345678", chunk_size=2)
+        ]
+        # Then
+        self.assertEqual([3, 1], per_segment)
+        self.assertEqual([2, 2], per_chunk)
+
+    async def test_create_page(self):
+        # Given
+        self.responses[("POST", "https://api.notion.com/v1/pages")] = [{"id": "new_page"}]
+        # When
+        page_id = await self.manager.create_page(
+            "database_id_12345678",
+            [
+                PropertyValue("property1", True),
+                PropertyValue("property3", "Option 3 of select"),
+            ]
+        )
+        # Then
+        self.assertEqual(
+            {
+                "parent": {"database_id": "database_id_12345678"},
+                "properties": {
+                    "property1": {"checkbox": True},
+                    "property3": {"select": {"name": "Option 3 of select"}}
+                }
+            },
+            json.loads(self.requests[0].content)
+        )
+        self.assertEqual("new_page", page_id)
+
+    async def test_update_and_archive_page(self):
+        # Given
+        self.responses[("PATCH", "https://api.notion.com/v1/pages/page_1")] = [{"id": "page_1"}]
+        # When
+        updated = await self.manager.update_page("database_id_12345678", "page_1", [PropertyValue("property1", False)])
+        archived = await self.manager.archive_page("page_1")
+        # Then
+        self.assertEqual(["page_1", "page_1"], [updated, archived])
+        self.assertEqual(
+            [{"properties": {"property1": {"checkbox": False}}}, {"archived": True}],
+            [json.loads(request.content) for request in self.requests]
+        )
+
+    async def test_get_page_blocks_of_several_pages_concurrently(self):
+        # Given
+        for page_id in ["page_1", "page_2"]:
+            self.responses[("GET", f"https://api.notion.com/v1/blocks/{page_id}/children")] = [
+                {"results": [{"id": f"block_of_{page_id}"}], "next_cursor": None, "has_more": False}
+            ]
+        # When
+        blocks = await asyncio.gather(
+            self.manager.get_page_blocks("page_1"),
+            self.manager.get_page_blocks("page_2"),
+        )
+        # Then
+        self.assertEqual([[{"id": "block_of_page_1"}], [{"id": "block_of_page_2"}]], blocks)
+
+    async def test_get_page_block_tree(self):
+        # Given
+        for parent_id, children in {"page_1": ["block_1", "block_2"], "block_2": ["block_2_1"]}.items():
+            self.responses[("GET", f"https://api.notion.com/v1/blocks/{parent_id}/children")] = [
+                {
+                    "results": [
+                        {"id": child_id, "type": "divider", "divider": {}, "has_children": child_id == "block_2"}
+                        for child_id in children
+                    ],
+                    "next_cursor": None,
+                    "has_more": False
+                }
+            ]
+        # When
+        tree = await self.manager.get_page_block_tree("page_1", max_concurrency=2)
+        # Then
+        self.assertEqual(
+            [
+                {"id": "block_1", "type": "divider", "content": {}, "has_children": False, "children": []},
+                {
+                    "id": "block_2",
+                    "type": "divider",
+                    "content": {},
+                    "has_children": True,
+                    "children": [
+                        {"id": "block_2_1", "type": "divider", "content": {}, "has_children": False, "children": []}
+                    ],
+                },
+            ],
+            tree
+        )
+
+    async def test_rate_limited_request_is_retried_after_pausing_the_rate_limiter(self):
+        # Given
+        self.manager._rate_limiter = RateLimiter(100)
+        self.manager._rate_limiter.pause = mock.Mock()
+        self.responses[("GET", "https://api.notion.com/v1/blocks/page_id/children")] = [
+            httpx.Response(429, headers={"Retry-After": "1"}, json={"code": "rate_limited"}),
+            {"results": [{"id": "block_id"}], "next_cursor": None, "has_more": False},
+        ]
+        # When
+        blocks = await self.manager.get_page_blocks("page_id")
+        # Then
+        self.assertEqual([{"id": "block_id"}], blocks)
+        self.manager._rate_limiter.pause.assert_called_once_with(1.0)
+
+    async def test_server_error_when_creating_a_page_is_not_retried(self):
+        # Given
+        self.responses[("POST", "https://api.notion.com/v1/pages")] = [
+            httpx.Response(502, text="<html>Bad gateway</html>"),
+            {"id": "duplicated_page"},
+        ]
+        # When
+        with self.assertRaises(NotionApiError) as context:
+            await self.manager.create_page("database_id_12345678", [PropertyValue("property1", True)])
+        # Then
+        self.assertEqual(502, context.exception.status_code)
+        self.assertEqual(1, len(self.requests))
+
+    async def test_instrumentation_records_failed_requests(self):
+        # Given
+        events = []
+        self.manager.instrumentation.add_listener(events.append)
+        self.responses[("PATCH", "https://api.notion.com/v1/pages/page_1")] = [
+            httpx.Response(404, json={"code": "object_not_found"}),
+        ]
+        # When
+        with self.assertRaises(NotionApiError):
+            await self.manager.archive_page("page_1")
+        # Then
+        self.assertEqual(
+            [("PATCH", "/v1/pages/{id}", 404, len(self.requests[0].content))],
+            [(event.method, event.endpoint, event.status_code, event.request_bytes) for event in events]
+        )
+
+    async def test_error_response_raises_notion_api_error(self):
+        # Given
+        self.responses[("POST", "https://api.notion.com/v1/pages")] = [
+            httpx.Response(400, json={"code": "validation_error", "message": "property1 is not a property"}),
+        ]
+        # When
+        with self.assertRaises(NotionApiError) as context:
+            await self.manager.create_page("database_id_12345678", [PropertyValue("property1", True)])
+        # Then
+        self.assertEqual(400, context.exception.status_code)
+        self.assertEqual("validation_error", context.exception.code)
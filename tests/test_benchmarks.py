@@ -0,0 +1,31 @@
+import unittest
+
+from tests.benchmarks import bench_concurrency, bench_decoder, bench_encoder
+
+
+class BenchmarkRegressionTests(unittest.TestCase):
+    """The optimized hot paths run at small sizes, and must stay well ahead of the straightforward versions they replaced
+
+    The margins are much lower than the speedups measured by the benchmarks, so that a slow or busy machine does not
+    make them fail.
+    """
+
+    def test_columnar_decoder_is_faster_than_decoding_each_cell(self):
+        # When
+        per_cell, per_column = bench_decoder.main(2000)
+        # Then
+        self.assertLess(per_column * 5, per_cell)
+
+    def test_columnar_encoder_is_faster_than_encoding_each_cell(self):
+        # When
+        per_cell, per_column = bench_encoder.main(5000)
+        # Then
+        self.assertLess(per_column * 1.5, per_cell)
+
+    def test_concurrent_requests_are_faster_than_requesting_pages_one_by_one(self):
+        # When
+        throughputs = bench_concurrency.main(latency=0.02, num_pages=40, workers=(1, 8))
+        # Then
+        (serial_creation, serial_reading), (concurrent_creation, concurrent_reading) = throughputs[1], throughputs[8]
+        self.assertGreater(concurrent_creation, serial_creation * 2)
+        self.assertGreater(concurrent_reading, serial_reading * 2)
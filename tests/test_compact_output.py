@@ -0,0 +1,52 @@
+import unittest
+
+import pandas as pd
+import pyarrow as pa
+
+from notionapimanager.compact_output import compact_dataframe, to_arrow_table
+from notionapimanager.dataframe_builder import DataFrameBuilder
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder
+from tests.benchmarks.page_factory import make_pages, PROPERTY_TYPES
+
+
+class CompactOutputTests(unittest.TestCase):
+    def setUp(self) -> None:
+        builder = DataFrameBuilder(ColumnarNotionPropertyDecoder(PROPERTY_TYPES))
+        builder.add_pages(make_pages(1000))
+        self.dataframe = builder.build()
+
+    def test_compact_dataframe_uses_memory_efficient_dtypes(self):
+        # When
+        compact = compact_dataframe(self.dataframe, PROPERTY_TYPES)
+        # Then
+        self.assertIsInstance(compact["Category"].dtype, pd.CategoricalDtype)
+        self.assertEqual(pd.StringDtype("pyarrow"), compact["Name"].dtype)
+        self.assertEqual(pd.StringDtype("pyarrow"), compact["Link"].dtype)
+        self.assertEqual("bool", compact["Done"].dtype)
+        self.assertEqual("float64", compact["Amount"].dtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(compact["Day"].dtype))
+        self.assertEqual(self.dataframe["Name"].tolist(), compact["Name"].tolist())
+        self.assertEqual(list(self.dataframe.index), list(compact.index))
+        self.assertLess(
+            compact.memory_usage(deep=True).sum(), self.dataframe.astype(object).memory_usage(deep=True).sum() / 2
+        )
+
+    def test_checkboxes_with_missing_values_become_nullable_booleans(self):
+        # Given
+        dataframe = pd.DataFrame({"Done": [True, None]})
+        # When
+        compact = compact_dataframe(dataframe, PROPERTY_TYPES)
+        # Then
+        self.assertEqual("boolean", compact["Done"].dtype)
+        self.assertTrue(pd.isna(compact["Done"][1]))
+
+    def test_to_arrow_table_keeps_page_ids(self):
+        # When
+        table = to_arrow_table(self.dataframe, PROPERTY_TYPES)
+        # Then
+        self.assertEqual(1000, table.num_rows)
+        self.assertEqual("page-00000000", table.column("page_id")[0].as_py())
+        self.assertTrue(pa.types.is_dictionary(table.schema.field("Category").type))
+        name_type = table.schema.field("Name").type
+        self.assertTrue(pa.types.is_string(name_type) or pa.types.is_large_string(name_type))
+        self.assertTrue(pa.types.is_boolean(table.schema.field("Done").type))
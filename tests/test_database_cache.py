@@ -0,0 +1,148 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas._testing import assert_frame_equal
+
+from notionapimanager.database_cache import DatabaseCache
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder, PropertyType
+from tests.helpers.fake_clock import FakeClock
+
+
+class DatabaseCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock(now=1000.0)
+        self.cache = DatabaseCache(os.path.join(self.directory.name, "cache.sqlite"), ttl=60, clock=self.clock)
+        self.dataframe = pd.DataFrame(
+            {
+                "done": np.array([True, False]),
+                "amount": np.array([3.0, np.nan]),
+                "day": pd.to_datetime(["2022-03-04", None]),
+                "category": ["A", None],
+                "other": [{"somefield": "somevalue"}, None],
+            },
+            index=["page_1", "page_2"]
+        )
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_get_missing_database_returns_none(self):
+        self.assertIsNone(self.cache.get("database_id"))
+
+    def test_put_and_get_preserve_values_and_dtypes(self):
+        # Given
+        self.cache.put("database_id", self.dataframe, "version_1")
+        # When
+        snapshot = self.cache.get("database_id")
+        # Then
+        assert_frame_equal(self.dataframe, snapshot.dataframe)
+        self.assertEqual("version_1", snapshot.version)
+        self.assertTrue(snapshot.is_fresh)
+
+    def test_dates_mixing_offsets_are_restored_as_timestamps(self):
+        # Given
+        decoder = ColumnarNotionPropertyDecoder({"day": PropertyType.DATE})
+        dataframe = pd.DataFrame(
+            {"day": decoder.finalize_column("day", ["2022-03-04", "2022-03-05T10:00:00.000+02:00", None])},
+            index=["page_1", "page_2", "page_3"]
+        )
+        self.cache.put("database_id", dataframe, "version_1")
+        # When
+        snapshot = self.cache.get("database_id")
+        # Then
+        assert_frame_equal(dataframe, snapshot.dataframe)
+        self.assertIsInstance(snapshot.dataframe["day"].iloc[1], pd.Timestamp)
+
+    def test_empty_dataframe_round_trip(self):
+        # Given
+        self.cache.put("database_id", pd.DataFrame([], columns=["a", "b"]), "version_1")
+        # When
+        snapshot = self.cache.get("database_id")
+        # Then
+        self.assertEqual(["a", "b"], list(snapshot.dataframe.columns))
+        self.assertEqual(0, len(snapshot.dataframe))
+
+    def test_snapshot_older_than_ttl_is_not_fresh_until_touched(self):
+        # Given
+        self.cache.put("database_id", self.dataframe, "version_1")
+        self.clock.now += 61
+        # When
+        stale = self.cache.get("database_id")
+        self.cache.touch("database_id")
+        touched = self.cache.get("database_id")
+        # Then
+        self.assertFalse(stale.is_fresh)
+        self.assertTrue(touched.is_fresh)
+
+    def test_least_recently_used_snapshots_are_evicted_beyond_max_size(self):
+        # Given
+        self.cache.max_size_bytes = int(len(DatabaseCache._serialize(self.dataframe)) * 2.5)
+        self.cache.put("database_1", self.dataframe, "version_1")
+        self.clock.now += 1
+        self.cache.put("database_2", self.dataframe, "version_1")
+        self.clock.now += 1
+        self.cache.get("database_1")
+        self.clock.now += 1
+        # When
+        self.cache.put("database_3", self.dataframe, "version_1")
+        # Then
+        self.assertIsNotNone(self.cache.get("database_1"))
+        self.assertIsNone(self.cache.get("database_2"))
+        self.assertIsNotNone(self.cache.get("database_3"))
+
+    def test_invalidate(self):
+        # Given
+        self.cache.put("database_id", self.dataframe, "version_1")
+        # When
+        self.cache.invalidate("database_id")
+        # Then
+        self.assertIsNone(self.cache.get("database_id"))
+
+    def test_schema_is_stored_until_it_expires(self):
+        # Given
+        self.cache.schema_ttl = 60
+        property_types = {"done": PropertyType.CHECKBOX, "other": PropertyType.UNKNOWN}
+        self.cache.put_schema("database_id", property_types)
+        # When
+        fresh_schema = self.cache.get_schema("database_id")
+        self.clock.now += 61
+        expired_schema = self.cache.get_schema("database_id")
+        # Then
+        self.assertEqual(property_types, fresh_schema)
+        self.assertIsNone(expired_schema)
+        self.assertIsNone(self.cache.get_schema("other_database_id"))
+
+    def test_page_content_is_returned_while_the_page_is_not_edited(self):
+        # Given
+        blocks = [{"id": "block_1", "type": "paragraph", "paragraph": {"text": []}}]
+        self.cache.put_page_contents("database_id", [("page_1", "2022-06-06T23:09:00.000Z", blocks)])
+        # When
+        unchanged = self.cache.get_page_content("page_1", "2022-06-06T23:09:00.000Z")
+        edited = self.cache.get_page_content("page_1", "2022-06-07T10:00:00.000Z")
+        # Then
+        self.assertEqual(blocks, unchanged)
+        self.assertIsNone(edited)
+        self.assertIsNone(self.cache.get_page_content("page_2", "2022-06-06T23:09:00.000Z"))
+
+    def test_page_contents_of_many_pages_are_looked_up_at_once(self):
+        # Given
+        page_ids = [f"page_{index}" for index in range(2000)]
+        self.cache.put_page_contents(
+            "database_id", [(page_id, "2022-06-06T23:09:00.000Z", [{"id": page_id}]) for page_id in page_ids]
+        )
+        last_edited_times = {page_id: "2022-06-06T23:09:00.000Z" for page_id in page_ids}
+        last_edited_times["page_1"] = "2022-06-07T10:00:00.000Z"
+        last_edited_times["page_missing"] = "2022-06-06T23:09:00.000Z"
+        # When
+        contents = self.cache.get_page_contents(last_edited_times)
+        # Then
+        self.assertEqual(1999, len(contents))
+        self.assertEqual([{"id": "page_0"}], contents["page_0"])
+        self.assertEqual([{"id": "page_1999"}], contents["page_1999"])
+        self.assertNotIn("page_1", contents)
+        self.assertNotIn("page_missing", contents)
+        self.assertEqual({}, self.cache.get_page_contents({}))
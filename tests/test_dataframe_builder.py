@@ -0,0 +1,94 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from pandas._testing import assert_frame_equal
+
+from notionapimanager.dataframe_builder import DataFrameBuilder
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder, PropertyType
+
+
+class DataFrameBuilderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.property_types = {
+            "done": PropertyType.CHECKBOX,
+            "amount": PropertyType.NUMBER,
+            "day": PropertyType.DATE,
+            "category": PropertyType.SELECT,
+        }
+        self.builder = DataFrameBuilder(ColumnarNotionPropertyDecoder(self.property_types))
+
+    @staticmethod
+    def _page(page_id, done, amount, day, category):
+        return {
+            "id": page_id,
+            "properties": {
+                "done": {"type": "checkbox", "checkbox": done},
+                "amount": {"type": "number", "number": amount},
+                "day": {"type": "date", "date": {"start": day}},
+                "category": {"type": "select", "select": {"name": category}},
+            }
+        }
+
+    def test_build_assigns_dtypes_from_property_types(self):
+        # Given
+        self.builder.add_pages([
+            self._page("page_1", True, 3, "2022-03-04", "A"),
+            self._page("page_2", False, None, "2022-03-05", "B"),
+        ])
+        # When
+        dataframe = self.builder.build()
+        # Then
+        assert_frame_equal(
+            dataframe,
+            pd.DataFrame(
+                {
+                    "done": np.array([True, False]),
+                    "amount": np.array([3.0, np.nan]),
+                    "day": pd.to_datetime(["2022-03-04", "2022-03-05"]),
+                    "category": ["A", "B"],
+                },
+                index=["page_1", "page_2"]
+            )
+        )
+
+    def test_build_without_pages_returns_schema_columns(self):
+        # When
+        dataframe = self.builder.build()
+        # Then
+        self.assertEqual(["done", "amount", "day", "category"], list(dataframe.columns))
+        self.assertEqual(0, len(self.builder))
+
+    def test_pages_with_missing_properties_are_filled_with_missing_values(self):
+        # Given
+        self.builder.add_page({"id": "page_1", "properties": {"category": {"type": "select", "select": {"name": "A"}}}})
+        self.builder.add_page({"id": "page_2", "properties": {"other": {"type": "url", "url": "https://notion.so"}}})
+        # When
+        dataframe = self.builder.build()
+        # Then
+        self.assertEqual("A", dataframe.loc["page_1", "category"])
+        self.assertEqual("https://notion.so", dataframe.loc["page_2", "other"])
+        self.assertEqual([False, True], dataframe["category"].isna().tolist())
+        self.assertEqual([True, False], dataframe["other"].isna().tolist())
+
+    def test_dates_that_cannot_share_a_column_type_are_left_as_they_are(self):
+        # Given
+        self.builder.add_page({"id": "page_1", "properties": {"day": {"type": "date", "date": {"start": "2022-03-04"}}}})
+        self.builder.add_page(
+            {"id": "page_2", "properties": {"day": {"type": "date", "date": {"start": "2022-03-04T10:00:00+02:00"}}}}
+        )
+        # When
+        dataframe = self.builder.build()
+        # Then
+        self.assertEqual(object, dataframe["day"].dtype)
+
+    def test_add_pages_in_several_batches(self):
+        # Given
+        self.builder.BATCH_SIZE = 2
+        pages = (self._page(f"page_{number}", True, number, "2022-03-04", "A") for number in range(5))
+        # When
+        self.builder.add_pages(pages)
+        dataframe = self.builder.build()
+        # Then
+        self.assertEqual([f"page_{number}" for number in range(5)], list(dataframe.index))
+        self.assertEqual([0.0, 1.0, 2.0, 3.0, 4.0], list(dataframe["amount"]))
@@ -0,0 +1,203 @@
+import unittest
+
+import pandas as pd
+
+from notionapimanager import AsyncNotionDatabaseApiManager, NotionDatabaseApiManager
+from notionapimanager.notion_filter import Property, Sort
+from notionapimanager.notion_property_encoder import PropertyType
+from notionapimanager.retry_policy import RetryPolicy
+from tests.helpers.fake_notion_server import FakeNotionServer
+
+PROPERTY_TYPES = {
+    "Name": PropertyType.TITLE,
+    "Category": PropertyType.SELECT,
+    "Amount": PropertyType.NUMBER,
+    "Done": PropertyType.CHECKBOX,
+}
+
+
+def make_properties(number):
+    return {
+        "Name": {"title": [{"plain_text": f"Page {number}"}]},
+        "Category": {"select": {"name": "Even" if number % 2 == 0 else "Odd"}},
+        "Amount": {"number": number},
+        "Done": {"checkbox": number % 3 == 0},
+    }
+
+
+class FakeNotionServerTests(unittest.TestCase):
+    """The managers working against the fake server, which paginates, delays and rate limits like Notion API"""
+
+    def setUp(self) -> None:
+        self.server = FakeNotionServer(page_size=3).start()
+        self.addCleanup(self.server.stop)
+        self.server.add_database("database_id", PROPERTY_TYPES)
+        for number in range(10):
+            self.server.add_page("database_id", make_properties(number), page_id=f"page_{number}")
+
+    def _create_manager(self, **kwargs):
+        kwargs.setdefault("requests_per_second", None)
+        manager = NotionDatabaseApiManager("integration_token", ["database_id"], base_url=self.server.base_url, **kwargs)
+        manager.connect()
+        self.addCleanup(manager.close)
+        return manager
+
+    def test_get_database_follows_cursors_with_filters_and_sorts(self):
+        # Given
+        manager = self._create_manager()
+        # When
+        all_pages = manager.get_database("database_id")
+        filtered = manager.get_database(
+            "database_id", filter=(Property("Amount") >= 4) & Property("Category").equals("Even"),
+            sorts=[Sort("Amount", descending=True)]
+        )
+        # Then
+        self.assertEqual([f"page_{number}" for number in range(10)], list(all_pages.index))
+        self.assertEqual(["page_8", "page_6", "page_4"], list(filtered.index))
+        self.assertEqual(5, sum(path.endswith("/query") for _, path in self.server.requests[:6]))
+
+    def test_create_pages_sends_requests_concurrently(self):
+        # Given
+        self.server.latency = 0.05
+        manager = self._create_manager()
+        dataframe = pd.DataFrame({"Name": [f"New {number}" for number in range(8)], "Amount": range(8)})
+        # When
+        results = manager.create_pages("database_id", dataframe, max_workers=4)
+        # Then
+        self.assertEqual([None] * 8, [result.error for result in results])
+        self.assertGreater(self.server.max_concurrent_requests, 1)
+        self.assertEqual(18, len(self.server.get_database_pages("database_id")))
+
+    def test_get_databases_reads_databases_concurrently(self):
+        # Given
+        self.server.latency = 0.05
+        self.server.add_database("other_database_id", PROPERTY_TYPES)
+        for number in range(4):
+            self.server.add_page("other_database_id", make_properties(number))
+        manager = self._create_manager()
+        # When
+        dataframes = manager.get_databases(["database_id", "other_database_id"])
+        # Then
+        self.assertEqual([10, 4], [len(dataframes["database_id"]), len(dataframes["other_database_id"])])
+        self.assertGreater(self.server.max_concurrent_requests, 1)
+
+    def test_get_database_partitioned_reads_every_page_once(self):
+        # Given
+        self.server.latency = 0.02
+        self.server.add_page("database_id", {"Name": {"title": [{"plain_text": "No amount"}]}}, page_id="page_empty")
+        manager = self._create_manager()
+        # When
+        by_count = manager.get_database_partitioned("database_id", "Amount", partitions=3, max_workers=4)
+        by_boundaries = manager.get_database_partitioned(
+            "database_id", "Amount", partitions=[5], filter=Property("Category").equals("Even")
+        )
+        # Then
+        self.assertEqual(
+            sorted(manager.get_database("database_id").index), sorted(by_count.index)
+        )
+        self.assertEqual(["page_0", "page_2", "page_4", "page_6", "page_8"], sorted(by_boundaries.index))
+        self.assertGreater(self.server.max_concurrent_requests, 1)
+
+    def test_get_database_partitioned_by_dates_with_and_without_time(self):
+        # Given
+        self.server.add_database("dated_database_id", {"Name": PropertyType.TITLE, "Day": PropertyType.DATE})
+        days = ["2022-03-01", "2022-03-04T10:00:00.000+02:00", "2022-03-07", "2022-03-10T23:30:00.000-05:00"]
+        for number, day in enumerate(days):
+            self.server.add_page("dated_database_id", {"Day": {"date": {"start": day}}}, page_id=f"dated_{number}")
+        manager = self._create_manager()
+        # When
+        dataframe = manager.get_database_partitioned("dated_database_id", "Day", partitions=3)
+        # Then
+        self.assertEqual([f"dated_{number}" for number in range(4)], sorted(dataframe.index))
+
+    def test_rate_limited_requests_are_retried(self):
+        # Given
+        self.server.requests_per_second = 5
+        self.server.retry_after = 0.1
+        manager = self._create_manager(retry_policy=RetryPolicy(max_retries=50))
+        # When
+        results = manager.archive_pages([f"page_{number}" for number in range(10)], max_workers=10)
+        # Then
+        self.assertEqual([None] * 10, [result.error for result in results])
+        self.assertGreater(self.server.rate_limited_count, 0)
+        self.assertEqual([], self.server.get_database_pages("database_id"))
+
+    def test_upsert_dataframe_twice_sends_no_request_the_second_time(self):
+        # Given
+        manager = self._create_manager()
+        dataframe = pd.DataFrame({
+            "Name": ["Page 0", "Page 1", "New page"],
+            "Amount": [0.0, 100.0, 7.0],
+        })
+        # When
+        first = manager.upsert_dataframe("database_id", dataframe, key="Name")
+        second = manager.upsert_dataframe("database_id", dataframe, key="Name")
+        # Then
+        self.assertEqual((1, 1, 8), tuple(map(len, first)))
+        self.assertEqual((0, 0, 0), tuple(map(len, second)))
+        database = manager.get_database("database_id")
+        self.assertEqual(
+            {"Page 0": 0.0, "Page 1": 100.0, "New page": 7.0}, dict(zip(database["Name"], database["Amount"]))
+        )
+
+    def test_upsert_dataframe_read_with_dates_in_different_time_zones(self):
+        # Given
+        self.server.add_database("dated_database_id", {"Name": PropertyType.TITLE, "Day": PropertyType.DATE})
+        for name, day in [("Spring", "2022-03-04T10:00:00.000+01:00"), ("Summer", "2022-07-04T10:00:00.000+02:00")]:
+            self.server.add_page("dated_database_id", {
+                "Name": {"title": [{"plain_text": name, "text": {"content": name}}]}, "Day": {"date": {"start": day}}
+            })
+        manager = self._create_manager()
+        dataframe = pd.concat([
+            manager.get_database("dated_database_id"),
+            pd.DataFrame({"Name": ["Autumn"], "Day": [pd.Timestamp("2022-10-04")]}),
+        ])
+        # When
+        result = manager.upsert_dataframe("dated_database_id", dataframe, key="Name")
+        # Then
+        self.assertEqual((1, 0, 0), tuple(map(len, result)))
+        self.assertEqual([None], [operation.error for operation in result.created])
+        self.assertEqual(3, len(self.server.get_database_pages("dated_database_id")))
+
+    def test_get_page_block_tree_follows_cursors_of_nested_children(self):
+        # Given
+        manager = self._create_manager()
+        blocks = self.server.add_blocks("page_0", [{"type": "paragraph", "paragraph": {}} for _ in range(4)])
+        blocks[3]["has_children"] = True
+        self.server.add_blocks(blocks[3]["id"], [{"type": "to_do", "to_do": {"checked": True}}])
+        # When
+        tree = manager.get_page_block_tree("page_0")
+        # Then
+        self.assertEqual(4, len(tree))
+        self.assertEqual([{"checked": True}], [node["content"] for node in tree[3]["children"]])
+
+    def test_sync_database_only_reads_pages_edited_since_the_watermark(self):
+        # Given
+        manager = self._create_manager()
+        first = manager.sync_database("database_id")
+        manager.update_pages("database_id", pd.DataFrame({"Amount": [50.0]}, index=["page_2"]))
+        # When
+        second = manager.sync_database("database_id", first.dataframe, first.watermark)
+        # Then
+        self.assertEqual(50.0, second.dataframe.loc["page_2", "Amount"])
+        self.assertEqual(10, len(second.dataframe))
+
+
+class AsyncFakeNotionServerTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = FakeNotionServer(page_size=4, latency=0.02).start()
+        self.addCleanup(self.server.stop)
+        self.server.add_database("database_id", PROPERTY_TYPES)
+        for number in range(10):
+            self.server.add_page("database_id", make_properties(number), page_id=f"page_{number}")
+
+    async def test_get_database(self):
+        # Given
+        async with AsyncNotionDatabaseApiManager(
+            "integration_token", ["database_id"], base_url=self.server.base_url, requests_per_second=None
+        ) as manager:
+            # When
+            dataframe = await manager.get_database("database_id", filter=Property("Done").equals(True))
+        # Then
+        self.assertEqual(["page_0", "page_3", "page_6", "page_9"], list(dataframe.index))
+        self.assertTrue(dataframe["Done"].all())
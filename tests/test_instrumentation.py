@@ -0,0 +1,94 @@
+import unittest
+
+from notionapimanager.instrumentation import Instrumentation, RequestEvent
+from tests.helpers.fake_clock import FakeClock
+
+
+class InstrumentationTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+        self.instrumentation = Instrumentation(clock=self.clock)
+
+    def test_endpoint_replaces_ids(self):
+        self.assertEqual(
+            ["/v1/databases/{id}/query", "/v1/pages/{id}", "/v1/pages", "/v1/blocks/{id}/children"],
+            [
+                Instrumentation.get_endpoint(url)
+                for url in [
+                    "https://api.notion.com/v1/databases/database_1/query",
+                    "https://api.notion.com/v1/pages/page_1",
+                    "https://api.notion.com/v1/pages",
+                    "https://api.notion.com/v1/blocks/page_1/children?start_cursor=cursor_1",
+                ]
+            ]
+        )
+
+    def test_tracker_reports_the_measurements_of_all_attempts_to_listeners(self):
+        # Given
+        events = []
+        self.instrumentation.add_listener(events.append)
+        tracker = self.instrumentation.track("GET", "https://api.notion.com/v1/pages/page_1")
+        # When
+        tracker.waited_for_rate_limit(0.5)
+        with tracker.attempt():
+            self.clock.now += 0.2
+        tracker.retrying(2)
+        with tracker.attempt():
+            self.clock.now += 0.3
+        tracker.finish(200, 10, 100)
+        # Then
+        self.assertEqual([RequestEvent("GET", "/v1/pages/{id}", 200, 0.5, 10, 100, 1, 0.5, 2)], events)
+
+    def test_stats_aggregate_requests_and_decoding(self):
+        # Given
+        for latency in range(1, 21):
+            self.instrumentation.record_request(
+                RequestEvent("POST", "/v1/databases/{id}/query", 200, latency / 10, 5, 50, 0, 0, 0)
+            )
+        self.instrumentation.record_request(RequestEvent("PATCH", "/v1/pages/{id}", 404, 0.1, 5, 50, 2, 1, 3))
+        self.instrumentation.record_decode(100, 0.25)
+        # When
+        stats = self.instrumentation.get_stats()
+        # Then
+        self.assertEqual(21, stats.request_count)
+        self.assertEqual({"POST /v1/databases/{id}/query": 20, "PATCH /v1/pages/{id}": 1}, stats.requests_by_endpoint)
+        self.assertEqual((1, 2), (stats.error_count, stats.retry_count))
+        self.assertEqual((1.0, 1.9), (stats.latency_p50, stats.latency_p95))
+        self.assertEqual((105, 1050), (stats.request_bytes, stats.response_bytes))
+        self.assertEqual((100, 0.25), (stats.decoded_pages, stats.decode_time))
+
+    def test_reset_forgets_the_measurements(self):
+        # Given
+        self.instrumentation.record_decode(100, 0.25)
+        # When
+        self.instrumentation.reset()
+        # Then
+        self.assertEqual(0, self.instrumentation.get_stats().decoded_pages)
+
+    def test_latency_sample_is_bounded_while_totals_count_every_request(self):
+        # Given
+        instrumentation = Instrumentation(clock=self.clock, max_latency_samples=10)
+        # When
+        for _ in range(1000):
+            instrumentation.record_request(RequestEvent("GET", "/v1/pages/{id}", 200, 0.5, 0, 0, 0, 0, 0))
+        stats = instrumentation.get_stats()
+        # Then
+        self.assertEqual(10, len(instrumentation._latencies))
+        self.assertEqual((1000, 500.0, 0.5), (stats.request_count, stats.network_time, stats.latency_p95))
+
+    def test_failing_listener_is_logged_and_does_not_stop_the_others(self):
+        # Given
+        events = []
+
+        def failing_listener(event):
+            raise RuntimeError("listener failure")
+
+        self.instrumentation.add_listener(failing_listener)
+        self.instrumentation.add_listener(events.append)
+        event = RequestEvent("GET", "/v1/pages/{id}", 200, 0.5, 0, 0, 0, 0, 0)
+        # When
+        with self.assertLogs("notionapimanager.instrumentation", level="ERROR") as logs:
+            self.instrumentation.record_request(event)
+        # Then
+        self.assertEqual([event], events)
+        self.assertIn("listener failure", logs.output[0])
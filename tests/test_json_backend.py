@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+import requests_mock
+
+from notionapimanager import NotionDatabaseApiManager
+from notionapimanager.json_backend import get_json_backend, JsonBackend, OrjsonBackend
+from notionapimanager.notion_property_encoder import PropertyType, PropertyValue
+
+
+class JsonBackendTests(unittest.TestCase):
+    def test_backends_serialize_into_compact_utf8_bytes(self):
+        for backend in [JsonBackend(), OrjsonBackend()]:
+            with self.subTest(backend.name):
+                self.assertEqual(
+                    '{"name":"Café","values":[1,2.5,true,null]}'.encode(),
+                    backend.dumps({"name": "Café", "values": [1, 2.5, True, None]})
+                )
+                self.assertEqual({"a": [1, "é"]}, backend.loads('{"a": [1, "é"]}'.encode()))
+
+    def test_orjson_backend_serializes_numpy_values(self):
+        self.assertEqual(b'{"number":[1.5,2.0]}', OrjsonBackend().dumps({"number": np.array([1.5, 2.0])}))
+
+    def test_get_json_backend(self):
+        custom = JsonBackend()
+        self.assertIsInstance(get_json_backend(None), JsonBackend)
+        self.assertIsInstance(get_json_backend("orjson"), OrjsonBackend)
+        self.assertIsInstance(get_json_backend("auto"), OrjsonBackend)
+        self.assertIs(custom, get_json_backend(custom))
+        with self.assertRaises(ValueError):
+            get_json_backend("unknown")
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_manager_uses_the_backend_for_requests_and_responses(self, requests_mocker):
+        # Given
+        manager = NotionDatabaseApiManager(
+            "integration_token_1234", ["database_id"], requests_per_second=None, json_backend="orjson"
+        )
+        manager.connect(lazy=True)
+        self.addCleanup(manager.close)
+        manager._property_types["database_id"] = {"property1": PropertyType.CHECKBOX}
+        requests_mocker.post("https://api.notion.com/v1/pages", content=b'{"id":"new_page"}')
+        # When
+        page_id = manager.create_page("database_id", [PropertyValue("property1", True)])
+        # Then
+        self.assertEqual("new_page", page_id)
+        self.assertEqual(
+            b'{"parent":{"database_id":"database_id"},"properties":{"property1":{"checkbox":true}}}',
+            requests_mocker.last_request.body
+        )
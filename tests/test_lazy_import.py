@@ -0,0 +1,54 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+import pandas as pd
+
+from notionapimanager.lazy_import import is_dataframe, is_installed, LazyModule
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class LazyImportTests(unittest.TestCase):
+    def test_lazy_module_is_imported_when_an_attribute_is_used(self):
+        # Given
+        module = LazyModule("json")
+        # When
+        result = module.dumps([1])
+        # Then
+        self.assertEqual("[1]", result)
+        self.assertIs(sys.modules["json"], module._module)
+
+    def test_is_installed_and_is_dataframe(self):
+        self.assertTrue(is_installed("pandas"))
+        self.assertFalse(is_installed("not_an_installed_module"))
+        self.assertTrue(is_dataframe(pd.DataFrame()))
+        self.assertFalse(is_dataframe([]))
+
+    def test_writing_pages_and_reading_records_does_not_import_pandas_nor_orjson(self):
+        # Given
+        script = textwrap.dedent("""
+            import sys
+
+            from notionapimanager import NotionDatabaseApiManager
+            from notionapimanager.notion_property_encoder import PropertyType, PropertyValue
+            from tests.helpers.fake_notion_server import FakeNotionServer
+
+            with FakeNotionServer() as server:
+                server.add_database("database_id", {"Name": PropertyType.TITLE, "Amount": PropertyType.NUMBER})
+                with NotionDatabaseApiManager(
+                    "integration_token", ["database_id"], base_url=server.base_url, requests_per_second=None
+                ) as manager:
+                    manager.create_page("database_id", [PropertyValue("Name", "First"), PropertyValue("Amount", 2)])
+                    records = manager.get_records("database_id")
+
+            print(len(records), [module for module in ("pandas", "numpy", "orjson") if module in sys.modules])
+        """)
+        # When
+        output = subprocess.run(
+            [sys.executable, "-c", script], cwd=REPOSITORY_PATH, capture_output=True, text=True, check=True
+        ).stdout
+        # Then
+        self.assertEqual("1 []", output.strip())
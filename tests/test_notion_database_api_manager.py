@@ -1,17 +1,28 @@
+import datetime
+import os
+import tempfile
 import unittest
+from unittest import mock
 
 import pandas as pd
 from pandas._testing import assert_frame_equal
 import requests_mock
 
 from notionapimanager import NotionDatabaseApiManager
-from notionapimanager.notion_database_api_manager import NotionPropertyDecoder, NotionPropertyEncoder, PropertyType
-from notionapimanager.notion_property_encoder import PropertyValue
+from notionapimanager.database_cache import DatabaseCache
+from notionapimanager.notion_database_api_manager import NotionPropertyEncoder, PropertyType
+from notionapimanager.notion_filter import Property, Sort
+from notionapimanager.notion_property_encoder import PageRecord, PropertyValue
+from notionapimanager.rate_limiter import RateLimiter
+from notionapimanager.retry_policy import NotionApiError, RetryPolicy
+from tests.helpers.fake_clock import FakeClock
 
 
 class NotionDatabaseApiManagerTests(unittest.TestCase):
     def setUp(self) -> None:
-        self.manager = NotionDatabaseApiManager("integration_token_1234", ["database_id_12345678"])
+        self.manager = NotionDatabaseApiManager(
+            "integration_token_1234", ["database_id_12345678"], requests_per_second=None
+        )
         self.manager._property_types = {
             "database_id_12345678": {
                 "property1": PropertyType.CHECKBOX,
@@ -19,8 +30,11 @@ class NotionDatabaseApiManagerTests(unittest.TestCase):
                 "property3": PropertyType.SELECT
             }
         }
-        self.manager._decoder = NotionPropertyDecoder()
         self.manager._encoder = NotionPropertyEncoder()
+        self.manager._session = self.manager._create_session()
+
+    def tearDown(self) -> None:
+        self.manager.close()
 
     @requests_mock.Mocker(kw="requests_mocker")
     def test_connect(self, requests_mocker):
@@ -76,6 +90,130 @@ class NotionDatabaseApiManagerTests(unittest.TestCase):
             expected_property_types
         )
 
+    def test_connect_creates_pooled_session(self):
+        # Given
+        manager = NotionDatabaseApiManager("integration_token_1234", [], pool_size=25)
+        # When
+        manager.connect()
+        # Then
+        adapter = manager._session.get_adapter("https://api.notion.com/v1/pages")
+        self.assertEqual(25, adapter._pool_maxsize)
+        manager.close()
+
+    def test_close_releases_session(self):
+        # Given
+        manager = NotionDatabaseApiManager("integration_token_1234", [])
+        manager.connect()
+        # When
+        manager.close()
+        # Then
+        self.assertIsNone(manager._session)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_context_manager_connects_and_closes(self, requests_mocker):
+        # Given
+        requests_mocker.get(
+            "https://api.notion.com/v1/databases/database_id_12345678",
+            json={"properties": {"property1": {"type": "checkbox"}}}
+        )
+        # When
+        with NotionDatabaseApiManager("integration_token_1234", ["database_id_12345678"]) as manager:
+            session = manager._session
+        # Then
+        self.assertIsNotNone(session)
+        self.assertIsNone(manager._session)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_requests_reuse_session_and_timeout(self, requests_mocker):
+        # Given
+        manager = NotionDatabaseApiManager("integration_token_1234", ["database_id_12345678"], timeout=(3, 7))
+        requests_mocker.get(
+            "https://api.notion.com/v1/databases/database_id_12345678",
+            json={"properties": {"property1": {"type": "checkbox"}}}
+        )
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={"results": [], "next_cursor": None, "has_more": False}
+        )
+        # When
+        with manager:
+            manager.get_database("database_id_12345678")
+        # Then
+        self.assertEqual(2, requests_mocker.call_count)
+        self.assertEqual([(3, 7), (3, 7)], [request.timeout for request in requests_mocker.request_history])
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_keep_alive_disabled_asks_server_to_close_connections(self, requests_mocker):
+        # Given
+        manager = NotionDatabaseApiManager("integration_token_1234", [], keep_alive=False)
+        requests_mocker.get("https://api.notion.com/v1/blocks/page_id/children", json={"results": []})
+        # When
+        with manager:
+            manager.get_page_blocks("page_id")
+        # Then
+        self.assertEqual("close", requests_mocker.request_history[0].headers["Connection"])
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_connect_loads_schemas_of_all_databases(self, requests_mocker):
+        # Given
+        database_ids = [f"database_{number}" for number in range(5)]
+        manager = NotionDatabaseApiManager("integration_token_1234", database_ids, requests_per_second=None)
+        for number, database_id in enumerate(database_ids):
+            requests_mocker.get(
+                f"https://api.notion.com/v1/databases/{database_id}",
+                json={"properties": {f"property{number}": {"type": "number"}}}
+            )
+        # When
+        with manager:
+            property_types = manager._property_types
+        # Then
+        self.assertEqual(
+            {database_id: {f"property{number}": PropertyType.NUMBER} for number, database_id in enumerate(database_ids)},
+            property_types
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_lazy_connect_requests_schema_when_first_needed(self, requests_mocker):
+        # Given
+        manager = NotionDatabaseApiManager("integration_token_1234", ["database_id_12345678"])
+        requests_mocker.get(
+            "https://api.notion.com/v1/databases/database_id_12345678",
+            json={"properties": {"property1": {"type": "checkbox"}}}
+        )
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={"results": [], "next_cursor": None, "has_more": False}
+        )
+        # When
+        manager.connect(lazy=True)
+        call_count_after_connect = requests_mocker.call_count
+        manager.get_database("database_id_12345678")
+        manager.get_database("database_id_12345678")
+        manager.close()
+        # Then
+        self.assertEqual(0, call_count_after_connect)
+        self.assertEqual(["GET", "POST", "POST"], [request.method for request in requests_mocker.request_history])
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_connect_takes_schemas_from_cache(self, requests_mocker):
+        # Given
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = DatabaseCache(os.path.join(directory.name, "cache.sqlite"))
+        requests_mocker.get(
+            "https://api.notion.com/v1/databases/database_id_12345678",
+            json={"properties": {"property1": {"type": "checkbox"}}}
+        )
+        with NotionDatabaseApiManager("integration_token_1234", ["database_id_12345678"], cache=cache):
+            pass
+        manager = NotionDatabaseApiManager("integration_token_1234", ["database_id_12345678"], cache=cache)
+        # When
+        with manager:
+            property_types = manager._property_types
+        # Then
+        self.assertEqual({"database_id_12345678": {"property1": PropertyType.CHECKBOX}}, property_types)
+        self.assertEqual(1, requests_mocker.call_count)
+
     @requests_mock.Mocker(kw="requests_mocker")
     def test_get_database_with_no_rows_returns_empty_dataframe_with_right_columns(self, requests_mocker):
         # Given
@@ -331,6 +469,324 @@ class NotionDatabaseApiManagerTests(unittest.TestCase):
             )
         )
 
+    @staticmethod
+    def _mock_query_segments(requests_mocker, segments):
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            [
+                {
+                    "json": {
+                        "results": [
+                            {"id": page_id, "properties": {"property3": {"type": "select", "select": {"name": value}}}}
+                            for page_id, value in segment
+                        ],
+                        "next_cursor": f"cursor_{segment_number}" if segment_number < len(segments) - 1 else None,
+                        "has_more": segment_number < len(segments) - 1
+                    }
+                }
+                for segment_number, segment in enumerate(segments)
+            ]
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_iter_pages_requests_segments_only_when_needed(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A"), ("page_2", "B")], [("page_3", "C")]])
+        # When
+        pages = self.manager.iter_pages("database_id_12345678")
+        first_page = next(pages)
+        call_count_after_first_page = requests_mocker.call_count
+        remaining_pages = list(pages)
+        # Then
+        self.assertEqual(PageRecord("page_1", {"property3": "A"}), first_page)
+        self.assertEqual(1, call_count_after_first_page)
+        self.assertEqual(
+            [PageRecord("page_2", {"property3": "B"}), PageRecord("page_3", {"property3": "C"})],
+            remaining_pages
+        )
+        self.assertEqual({"start_cursor": "cursor_0"}, requests_mocker.request_history[1].json())
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_iter_pages_decodes_empty_select_and_date_values(self, requests_mocker):
+        # Given
+        self.manager._property_types["database_id_12345678"]["day"] = PropertyType.DATE
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    {
+                        "id": "page_1",
+                        "properties": {
+                            "property3": {"type": "select", "select": None},
+                            "day": {"type": "date", "date": None},
+                        }
+                    },
+                    {
+                        "id": "page_2",
+                        "properties": {
+                            "property3": {"type": "select", "select": {"name": "A"}},
+                            "day": {"type": "date", "date": {"start": "2022-03-04"}},
+                        }
+                    },
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        # When
+        pages = list(self.manager.iter_pages("database_id_12345678"))
+        # Then
+        self.assertEqual(
+            [
+                PageRecord("page_1", {"property3": None, "day": None}),
+                PageRecord("page_2", {"property3": "A", "day": "2022-03-04"}),
+            ],
+            pages
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_iter_dataframes_yields_one_dataframe_per_segment_by_default(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A"), ("page_2", "B")], [("page_3", "C")]])
+        # When
+        dataframes = list(self.manager.iter_dataframes("database_id_12345678"))
+        # Then
+        self.assertEqual([["page_1", "page_2"], ["page_3"]], [list(dataframe.index) for dataframe in dataframes])
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_iter_dataframes_with_chunk_size(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A"), ("page_2", "B")], [("page_3", "C")]])
+        # When
+        dataframes = list(self.manager.iter_dataframes("database_id_12345678", chunk_size=2))
+        # Then
+        assert_frame_equal(
+            dataframes[0],
+            pd.DataFrame([["A"], ["B"]], columns=["property3"], index=["page_1", "page_2"])
+        )
+        assert_frame_equal(
+            dataframes[1],
+            pd.DataFrame([["C"]], columns=["property3"], index=["page_3"])
+        )
+        self.assertEqual(2, len(dataframes))
+
+    @staticmethod
+    def _edited_page(page_id, value, last_edited_time):
+        return {
+            "id": page_id,
+            "last_edited_time": last_edited_time,
+            "properties": {"property3": {"type": "select", "select": {"name": value}}}
+        }
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_sync_database_without_watermark_reads_all_pages(self, requests_mocker):
+        # Given
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    self._edited_page("page_2", "B", "2022-06-06T23:09:00.000Z"),
+                    self._edited_page("page_1", "A", "2022-06-04T16:34:00.000Z"),
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        # When
+        dataframe, watermark = self.manager.sync_database("database_id_12345678")
+        # Then
+        assert_frame_equal(dataframe, pd.DataFrame({"property3": ["B", "A"]}, index=["page_2", "page_1"]))
+        self.assertEqual("2022-06-06T23:09:00.000Z", watermark)
+        self.assertEqual(
+            {"sorts": [{"timestamp": "last_edited_time", "direction": "descending"}]},
+            requests_mocker.request_history[0].json()
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_sync_database_merges_pages_edited_since_watermark_and_stops_reading(self, requests_mocker):
+        # Given
+        previous_df = pd.DataFrame({"property3": ["A", "B"]}, index=["page_1", "page_2"])
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    self._edited_page("page_3", "C", "2022-06-07T10:00:00.000Z"),
+                    self._edited_page("page_1", "A2", "2022-06-06T23:09:00.000Z"),
+                    self._edited_page("page_2", "B", "2022-06-04T16:34:00.000Z"),
+                ],
+                "next_cursor": "cursor_1",
+                "has_more": True
+            }
+        )
+        # When
+        dataframe, watermark = self.manager.sync_database(
+            "database_id_12345678", previous_df, since="2022-06-06T23:09:00.000Z"
+        )
+        # Then
+        assert_frame_equal(
+            dataframe,
+            pd.DataFrame({"property3": ["B", "C", "A2"]}, index=["page_2", "page_3", "page_1"])
+        )
+        self.assertEqual("2022-06-07T10:00:00.000Z", watermark)
+        self.assertEqual(1, requests_mocker.call_count)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_sync_database_without_changes_keeps_previous_dataframe_and_watermark(self, requests_mocker):
+        # Given
+        previous_df = pd.DataFrame({"property3": ["A"]}, index=["page_1"])
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [self._edited_page("page_1", "A", "2022-06-04T16:34:00.000Z")],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        # When
+        result = self.manager.sync_database("database_id_12345678", previous_df, since=pd.Timestamp("2022-06-05"))
+        # Then
+        self.assertIs(previous_df, result.dataframe)
+        self.assertEqual(pd.Timestamp("2022-06-05"), result.watermark)
+
+    def _set_up_cache(self, requests_mocker, database_last_edited_time="2022-06-01T00:00:00.000Z"):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.manager.cache = DatabaseCache(os.path.join(directory.name, "cache.sqlite"), ttl=60)
+        requests_mocker.get(
+            "https://api.notion.com/v1/databases/database_id_12345678",
+            json={"last_edited_time": database_last_edited_time, "properties": {}}
+        )
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [self._edited_page("page_1", "A", "2022-06-04T16:34:00.000Z")],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_stores_snapshot_in_cache_and_reuses_it_while_fresh(self, requests_mocker):
+        # Given
+        self._set_up_cache(requests_mocker)
+        first_dataframe = self.manager.get_database("database_id_12345678")
+        call_count_after_first_read = requests_mocker.call_count
+        # When
+        second_dataframe = self.manager.get_database("database_id_12345678")
+        # Then
+        assert_frame_equal(first_dataframe, second_dataframe)
+        self.assertEqual(3, call_count_after_first_read)
+        self.assertEqual(3, requests_mocker.call_count)
+        self.assertEqual(
+            {"sorts": [{"timestamp": "last_edited_time", "direction": "descending"}], "page_size": 1},
+            requests_mocker.request_history[1].json()
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_revalidates_stale_snapshot_without_reading_the_database(self, requests_mocker):
+        # Given
+        self._set_up_cache(requests_mocker)
+        self.manager.cache.put(
+            "database_id_12345678",
+            pd.DataFrame({"property3": ["cached"]}, index=["page_1"]),
+            "2022-06-01T00:00:00.000Z|2022-06-04T16:34:00.000Z"
+        )
+        self.manager.cache.ttl = 0
+        # When
+        dataframe = self.manager.get_database("database_id_12345678")
+        # Then
+        assert_frame_equal(pd.DataFrame({"property3": ["cached"]}, index=["page_1"]), dataframe)
+        self.assertEqual(2, requests_mocker.call_count)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_reads_again_when_snapshot_was_stored_during_the_minute_of_the_last_edit(
+        self, requests_mocker
+    ):
+        # Given
+        self._set_up_cache(requests_mocker)
+        self.manager.cache._clock = FakeClock(now=pd.Timestamp("2022-06-04T16:34:30Z").timestamp())
+        self.manager.cache.put(
+            "database_id_12345678",
+            pd.DataFrame({"property3": ["cached"]}, index=["page_1"]),
+            "2022-06-01T00:00:00.000Z|2022-06-04T16:34:00.000Z"
+        )
+        self.manager.cache.ttl = 0
+        # When
+        dataframe = self.manager.get_database("database_id_12345678")
+        # Then
+        assert_frame_equal(pd.DataFrame({"property3": ["A"]}, index=["page_1"]), dataframe)
+        self.assertEqual(3, requests_mocker.call_count)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_reads_again_when_cached_snapshot_is_outdated(self, requests_mocker):
+        # Given
+        self._set_up_cache(requests_mocker, database_last_edited_time="2022-06-05T00:00:00.000Z")
+        self.manager.cache.put(
+            "database_id_12345678",
+            pd.DataFrame({"property3": ["cached"]}, index=["page_1"]),
+            "2022-06-01T00:00:00.000Z|2022-06-04T16:34:00.000Z"
+        )
+        self.manager.cache.ttl = 0
+        # When
+        dataframe = self.manager.get_database("database_id_12345678")
+        # Then
+        assert_frame_equal(pd.DataFrame({"property3": ["A"]}, index=["page_1"]), dataframe)
+        self.assertEqual(3, requests_mocker.call_count)
+        self.assertEqual(
+            "2022-06-05T00:00:00.000Z|2022-06-04T16:34:00.000Z",
+            self.manager.cache.get("database_id_12345678").version
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_pushes_filter_sorts_and_page_size_down_to_notion(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A")], [("page_2", "B")]])
+        # When
+        dataframe = self.manager.get_database(
+            "database_id_12345678",
+            filter=Property("property3").equals("A") | Property("property3").equals("B"),
+            sorts=[Sort("property2", descending=True), {"timestamp": "created_time", "direction": "ascending"}],
+            page_size=1
+        )
+        # Then
+        self.assertEqual(["page_1", "page_2"], list(dataframe.index))
+        expected_query = {
+            "filter": {
+                "or": [
+                    {"property": "property3", "select": {"equals": "A"}},
+                    {"property": "property3", "select": {"equals": "B"}},
+                ]
+            },
+            "sorts": [
+                {"property": "property2", "direction": "descending"},
+                {"timestamp": "created_time", "direction": "ascending"},
+            ],
+            "page_size": 1,
+        }
+        self.assertEqual(expected_query, requests_mocker.request_history[0].json())
+        self.assertEqual(dict(expected_query, start_cursor="cursor_0"), requests_mocker.request_history[1].json())
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_iter_pages_with_raw_filter(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A")]])
+        raw_filter = {"property": "property3", "select": {"is_not_empty": True}}
+        # When
+        pages = list(self.manager.iter_pages("database_id_12345678", filter=raw_filter))
+        # Then
+        self.assertEqual([PageRecord("page_1", {"property3": "A"})], pages)
+        self.assertEqual({"filter": raw_filter}, requests_mocker.request_history[0].json())
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_filtered_get_database_does_not_use_cache(self, requests_mocker):
+        # Given
+        self._set_up_cache(requests_mocker)
+        # When
+        self.manager.get_database("database_id_12345678", filter=Property("property1").equals(True))
+        # Then
+        self.assertIsNone(self.manager.cache.get("database_id_12345678"))
+        self.assertEqual(1, requests_mocker.call_count)
+
     @requests_mock.Mocker(kw="requests_mocker")
     def test_create_page(self, requests_mocker):
         # Given
@@ -349,7 +805,7 @@ class NotionDatabaseApiManagerTests(unittest.TestCase):
             }
         }
         # When
-        self.manager.create_page(
+        page_id = self.manager.create_page(
             "database_id_12345678",
             [
                 PropertyValue("property1", False),
@@ -362,6 +818,335 @@ class NotionDatabaseApiManagerTests(unittest.TestCase):
         self.assertEqual("POST", requests_mocker.request_history[0].method)
         self.assertEqual("https://api.notion.com/v1/pages", requests_mocker.request_history[0].url)
         self.assertEqual(expected_json, requests_mocker.request_history[0].json())
+        self.assertIsNone(page_id)
+
+    @staticmethod
+    def _mock_page_creation(requests_mocker):
+        def create_page(request, context):
+            properties = request.json()["properties"]
+            if properties["property2"]["text"]["content"] == "invalid":
+                context.status_code = 400
+                return {"object": "error", "code": "validation_error"}
+
+            return {"id": "page_" + properties["property2"]["text"]["content"]}
+
+        requests_mocker.post("https://api.notion.com/v1/pages", json=create_page)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_create_pages_returns_ids_and_errors_in_row_order(self, requests_mocker):
+        # Given
+        self._mock_page_creation(requests_mocker)
+        rows = [
+            [PropertyValue("property2", f"{number}")] for number in range(5)
+        ] + [[PropertyValue("property2", "invalid")], [PropertyValue("unknown_property", "value")]]
+        # When
+        results = self.manager.create_pages("database_id_12345678", rows, max_workers=3)
+        # Then
+        self.assertEqual(
+            ["page_0", "page_1", "page_2", "page_3", "page_4", None, None],
+            [result.page_id for result in results]
+        )
+        self.assertEqual([None] * 5, [result.error for result in results[:5]])
+        self.assertIsInstance(results[5].error, NotionApiError)
+        self.assertIsInstance(results[6].error, KeyError)
+        self.assertEqual(6, requests_mocker.call_count)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_create_pages_from_dataframe_skips_missing_values(self, requests_mocker):
+        # Given
+        self._mock_page_creation(requests_mocker)
+        dataframe = pd.DataFrame({"property1": [True, False], "property2": ["a", "b"], "property3": ["X", None]})
+        # When
+        results = self.manager.create_pages("database_id_12345678", dataframe)
+        # Then
+        self.assertEqual(["page_a", "page_b"], [result.page_id for result in results])
+        sent_properties = sorted(
+            (request.json()["properties"] for request in requests_mocker.request_history),
+            key=lambda properties: properties["property2"]["text"]["content"]
+        )
+        self.assertEqual(
+            [
+                {
+                    "property1": {"checkbox": True},
+                    "property2": {"text": {"content": "a"}},
+                    "property3": {"select": {"name": "X"}},
+                },
+                {
+                    "property1": {"checkbox": False},
+                    "property2": {"text": {"content": "b"}},
+                },
+            ],
+            sent_properties
+        )
+
+    def test_encoding_plan_is_compiled_once_per_column_set(self):
+        # Given
+        dataframe = pd.DataFrame({"property2": ["a"], "property3": ["X"]})
+        # When
+        first = self.manager._get_column_encoder("database_id_12345678", dataframe.columns)
+        second = self.manager._get_column_encoder("database_id_12345678", dataframe.columns)
+        other = self.manager._get_column_encoder("database_id_12345678", ["property2"])
+        # Then
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_create_pages_acquires_the_rate_limiter_for_each_page(self, requests_mocker):
+        # Given
+        self._mock_page_creation(requests_mocker)
+        self.manager._rate_limiter = mock.Mock()
+        self.manager._rate_limiter.acquire.return_value = 0
+        # When
+        self.manager.create_pages("database_id_12345678", [[PropertyValue("property2", "a")]] * 4)
+        # Then
+        self.assertEqual(4, self.manager._rate_limiter.acquire.call_count)
+
+    @staticmethod
+    def _mock_page_updates(requests_mocker, page_ids):
+        for page_id in page_ids:
+            requests_mocker.patch(f"https://api.notion.com/v1/pages/{page_id}", json={"id": page_id})
+        requests_mocker.patch(
+            "https://api.notion.com/v1/pages/missing_page", status_code=404, json={"code": "object_not_found"}
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_update_pages_returns_ids_and_errors_in_order(self, requests_mocker):
+        # Given
+        self._mock_page_updates(requests_mocker, ["page_1", "page_2"])
+        updates = {
+            "page_1": [PropertyValue("property1", True)],
+            "missing_page": [PropertyValue("property1", True)],
+            "page_2": [PropertyValue("property3", "B"), PropertyValue("property2", "text")],
+        }
+        # When
+        results = self.manager.update_pages("database_id_12345678", updates, max_workers=2)
+        # Then
+        self.assertEqual(["page_1", None, "page_2"], [result.page_id for result in results])
+        self.assertIsInstance(results[1].error, NotionApiError)
+        self.assertEqual(
+            {"properties": {"property3": {"select": {"name": "B"}}, "property2": {"text": {"content": "text"}}}},
+            [request for request in requests_mocker.request_history if request.path == "/v1/pages/page_2"][0].json()
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_update_pages_from_dataframe_leaves_missing_values_unchanged(self, requests_mocker):
+        # Given
+        self._mock_page_updates(requests_mocker, ["page_1", "page_2"])
+        dataframe = pd.DataFrame({"property1": [True, None]}, index=["page_1", "page_2"])
+        # When
+        results = self.manager.update_pages("database_id_12345678", dataframe)
+        # Then
+        self.assertEqual(["page_1", "page_2"], [result.page_id for result in results])
+        self.assertEqual(
+            {
+                "/v1/pages/page_1": {"properties": {"property1": {"checkbox": True}}},
+                "/v1/pages/page_2": {"properties": {}},
+            },
+            {request.path: request.json() for request in requests_mocker.request_history}
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_archive_pages(self, requests_mocker):
+        # Given
+        self._mock_page_updates(requests_mocker, ["page_1", "page_2"])
+        # When
+        results = self.manager.archive_pages(["page_1", "missing_page", "page_2"])
+        # Then
+        self.assertEqual(["page_1", None, "page_2"], [result.page_id for result in results])
+        self.assertEqual(404, results[1].error.status_code)
+        self.assertEqual(
+            [{"archived": True}] * 3, [request.json() for request in requests_mocker.request_history]
+        )
+
+    @staticmethod
+    def _mock_upsert(requests_mocker, pages):
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    {
+                        "id": page_id,
+                        "properties": {
+                            "property1": {"type": "checkbox", "checkbox": done},
+                            "property3": {"type": "select", "select": {"name": key}},
+                        }
+                    }
+                    for page_id, key, done in pages
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        requests_mocker.post("https://api.notion.com/v1/pages", json={"id": "new_page"})
+        for page_id, _, _ in pages:
+            requests_mocker.patch(f"https://api.notion.com/v1/pages/{page_id}", json={"id": page_id})
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_upsert_dataframe_only_sends_changed_rows(self, requests_mocker):
+        # Given
+        self._mock_upsert(requests_mocker, [("page_a", "A", True), ("page_b", "B", False), ("page_c", "C", True)])
+        dataframe = pd.DataFrame({"property3": ["A", "B", "D"], "property1": [True, True, False]})
+        # When
+        result = self.manager.upsert_dataframe("database_id_12345678", dataframe, key="property3")
+        # Then
+        self.assertEqual(["new_page"], [operation.page_id for operation in result.created])
+        self.assertEqual(["page_b"], [operation.page_id for operation in result.updated])
+        self.assertEqual(["page_c"], [operation.page_id for operation in result.archived])
+        requests = {(request.method, request.path): request for request in requests_mocker.request_history}
+        self.assertEqual(4, len(requests))
+        self.assertEqual(
+            {"property3": {"select": {"name": "D"}}, "property1": {"checkbox": False}},
+            requests[("POST", "/v1/pages")].json()["properties"]
+        )
+        self.assertEqual(
+            {"properties": {"property3": {"select": {"name": "B"}}, "property1": {"checkbox": True}}},
+            requests[("PATCH", "/v1/pages/page_b")].json()
+        )
+        self.assertEqual({"archived": True}, requests[("PATCH", "/v1/pages/page_c")].json())
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_upsert_dataframe_clears_missing_values_and_can_keep_unmatched_pages(self, requests_mocker):
+        # Given
+        self._mock_upsert(requests_mocker, [("page_a", "A", True), ("page_c", "C", True)])
+        dataframe = pd.DataFrame({"property3": ["A"], "property1": [None]})
+        # When
+        result = self.manager.upsert_dataframe(
+            "database_id_12345678", dataframe, key="property3", archive_missing=False
+        )
+        # Then
+        self.assertEqual(["page_a"], [operation.page_id for operation in result.updated])
+        self.assertEqual([], result.archived)
+        self.assertEqual(
+            {"properties": {"property3": {"select": {"name": "A"}}, "property1": {"checkbox": False}}},
+            requests_mocker.last_request.json()
+        )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_upsert_dataframe_again_does_not_update_empty_texts_and_unset_checkboxes(self, requests_mocker):
+        # Given
+        self.manager._property_types["database_id_12345678"]["notes"] = PropertyType.RICH_TEXT
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    {
+                        "id": "page_a",
+                        "properties": {
+                            "property1": {"type": "checkbox", "checkbox": False},
+                            "property3": {"type": "select", "select": {"name": "A"}},
+                            "notes": {"type": "rich_text", "rich_text": []},
+                        }
+                    }
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        dataframe = pd.DataFrame({"property3": ["A"], "property1": [None], "notes": [""]})
+        # When
+        result = self.manager.upsert_dataframe("database_id_12345678", dataframe, key="property3")
+        # Then
+        self.assertEqual(([], [], []), (result.created, result.updated, result.archived))
+        self.assertEqual(1, requests_mocker.call_count)
+
+    def test_upsert_dataframe_requires_unique_keys(self):
+        with self.assertRaises(ValueError):
+            self.manager.upsert_dataframe(
+                "database_id_12345678", pd.DataFrame({"property3": ["A", "A"]}), key="property3"
+            )
+
+    @mock.patch("notionapimanager.notion_database_api_manager.time.sleep")
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_rate_limited_request_is_retried_after_the_time_notion_asks_for(self, sleep, requests_mocker):
+        # Given
+        requests_mocker.get(
+            "https://api.notion.com/v1/blocks/page_id/children",
+            [
+                {"status_code": 429, "headers": {"Retry-After": "2"}, "json": {"code": "rate_limited"}},
+                {"json": {"results": [{"id": "block_id"}], "next_cursor": None, "has_more": False}},
+            ]
+        )
+        # When
+        blocks = self.manager.get_page_blocks("page_id")
+        # Then
+        self.assertEqual([{"id": "block_id"}], blocks)
+        sleep.assert_called_once_with(2.0)
+
+    @mock.patch("notionapimanager.notion_database_api_manager.time.sleep")
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_rate_limited_request_pauses_the_shared_rate_limiter(self, sleep, requests_mocker):
+        # Given
+        self.manager._rate_limiter = mock.Mock(spec=RateLimiter)
+        self.manager._rate_limiter.acquire.return_value = 0
+        requests_mocker.get(
+            "https://api.notion.com/v1/blocks/page_id/children",
+            [
+                {"status_code": 429, "headers": {"Retry-After": "3"}, "json": {"code": "rate_limited"}},
+                {"json": {"results": [], "next_cursor": None, "has_more": False}},
+            ]
+        )
+        # When
+        self.manager.get_page_blocks("page_id")
+        # Then
+        self.manager._rate_limiter.pause.assert_called_once_with(3.0)
+        self.assertEqual(2, self.manager._rate_limiter.acquire.call_count)
+        sleep.assert_called_once_with(0)
+
+    @mock.patch("notionapimanager.notion_database_api_manager.time.sleep")
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_server_errors_are_retried_with_exponential_backoff_until_giving_up(self, sleep, requests_mocker):
+        # Given
+        self.manager.retry_policy = RetryPolicy(max_retries=3, backoff_factor=1)
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            status_code=502,
+            text="<html>Bad gateway</html>"
+        )
+        # When
+        with self.assertRaises(NotionApiError) as context:
+            self.manager.get_database("database_id_12345678")
+        # Then
+        self.assertEqual(502, context.exception.status_code)
+        self.assertEqual([mock.call(1), mock.call(2), mock.call(4)], sleep.call_args_list)
+        self.assertEqual(4, requests_mocker.call_count)
+
+    @mock.patch("notionapimanager.notion_database_api_manager.time.sleep")
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_server_errors_are_only_retried_when_creating_pages_if_enabled(self, sleep, requests_mocker):
+        # Given
+        requests_mocker.post(
+            "https://api.notion.com/v1/pages",
+            [
+                {"status_code": 429, "headers": {"Retry-After": "1"}, "json": {"code": "rate_limited"}},
+                {"status_code": 502, "text": "<html>Bad gateway</html>"},
+                {"json": {"id": "new_page"}},
+            ]
+        )
+        # When
+        with self.assertRaises(NotionApiError) as context:
+            self.manager.create_page("database_id_12345678", [PropertyValue("property1", True)])
+        self.manager.retry_policy = RetryPolicy(retry_non_idempotent_server_errors=True)
+        page_id = self.manager.create_page("database_id_12345678", [PropertyValue("property1", True)])
+        # Then
+        self.assertEqual(502, context.exception.status_code)
+        self.assertEqual("new_page", page_id)
+        self.assertEqual(3, requests_mocker.call_count)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_client_errors_are_raised_without_retrying(self, requests_mocker):
+        # Given
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            status_code=404,
+            json={"object": "error", "code": "object_not_found", "message": "Could not find database"}
+        )
+        # When
+        with self.assertRaises(NotionApiError) as context:
+            self.manager.get_database("database_id_12345678")
+        # Then
+        self.assertEqual("object_not_found", context.exception.code)
+        self.assertEqual("Could not find database", context.exception.message)
+        self.assertEqual(1, requests_mocker.call_count)
 
     @requests_mock.Mocker(kw="requests_mocker")
     def test_get_page_blocks(self, requests_mocker):
@@ -426,3 +1211,253 @@ class NotionDatabaseApiManagerTests(unittest.TestCase):
               'type': 'paragraph',
               'paragraph': {'color': 'default', 'text': []}}]
         )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_page_blocks_follows_cursors(self, requests_mocker):
+        # Given
+        requests_mocker.get(
+            "https://api.notion.com/v1/blocks/page_id/children",
+            [
+                {"json": {"results": [{"id": "block_1"}], "next_cursor": "cursor_1", "has_more": True}},
+                {"json": {"results": [{"id": "block_2"}], "next_cursor": None, "has_more": False}},
+            ]
+        )
+        # When
+        blocks = self.manager.get_page_blocks("page_id")
+        # Then
+        self.assertEqual([{"id": "block_1"}, {"id": "block_2"}], blocks)
+        self.assertEqual({"start_cursor": ["cursor_1"]}, requests_mocker.request_history[1].qs)
+
+    @staticmethod
+    def _mock_block_tree(requests_mocker, tree):
+        for parent_id, children in tree.items():
+            requests_mocker.get(
+                f"https://api.notion.com/v1/blocks/{parent_id}/children",
+                json={
+                    "results": [
+                        {
+                            "id": child_id,
+                            "type": "paragraph",
+                            "paragraph": {"text": [{"plain_text": child_id}]},
+                            "has_children": child_id in tree,
+                        }
+                        for child_id in children
+                    ],
+                    "next_cursor": None,
+                    "has_more": False
+                }
+            )
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_page_block_tree_reads_nested_children(self, requests_mocker):
+        # Given
+        self._mock_block_tree(
+            requests_mocker, {"page_id": ["block_1", "block_2"], "block_1": ["block_1_1"], "block_1_1": ["block_x"]}
+        )
+        # When
+        tree = self.manager.get_page_block_tree("page_id", max_depth=2)
+        # Then
+        self.assertEqual(["block_1", "block_2"], [node["id"] for node in tree])
+        self.assertEqual(
+            {
+                "id": "block_1_1",
+                "type": "paragraph",
+                "content": {"text": [{"plain_text": "block_1_1"}]},
+                "has_children": True,
+                "children": [],
+            },
+            tree[0]["children"][0]
+        )
+        self.assertEqual([], tree[1]["children"])
+        self.assertEqual(2, requests_mocker.call_count)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_contents_requests_blocks_of_every_page(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A"), ("page_2", "B")], [("page_3", "C")]])
+        self._mock_block_tree(requests_mocker, {f"page_{number}": [f"block_{number}"] for number in range(1, 4)})
+        # When
+        contents = self.manager.get_database_contents("database_id_12345678", max_workers=2)
+        # Then
+        self.assertEqual(["page_1", "page_2", "page_3"], list(contents))
+        self.assertEqual(["block_3"], [block["id"] for block in contents["page_3"]])
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_contents_skips_pages_not_edited_since_they_were_cached(self, requests_mocker):
+        # Given
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.manager.cache = DatabaseCache(os.path.join(directory.name, "cache.sqlite"))
+        self.manager.cache.put_page_contents(
+            "database_id_12345678",
+            [
+                ("page_1", "2022-06-04T16:34:00.000Z", [{"id": "cached_block"}]),
+                ("page_2", "2022-06-04T16:34:00.000Z", [{"id": "outdated_block"}]),
+            ]
+        )
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    self._edited_page("page_1", "A", "2022-06-04T16:34:00.000Z"),
+                    self._edited_page("page_2", "B", "2022-06-06T23:09:00.000Z"),
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        self._mock_block_tree(requests_mocker, {"page_2": ["block_2"]})
+        # When
+        contents = self.manager.get_database_contents("database_id_12345678")
+        # Then
+        self.assertEqual(
+            {"page_1": ["cached_block"], "page_2": ["block_2"]},
+            {page_id: [block["id"] for block in blocks] for page_id, blocks in contents.items()}
+        )
+        self.assertEqual(2, requests_mocker.call_count)
+        self.assertEqual(
+            ["block_2"],
+            [block["id"] for block in self.manager.cache.get_page_content("page_2", "2022-06-06T23:09:00.000Z")]
+        )
+
+    @mock.patch("notionapimanager.notion_database_api_manager.time.sleep")
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_instrumentation_receives_an_event_per_request(self, sleep, requests_mocker):
+        # Given
+        events = []
+        self.manager.instrumentation.add_listener(events.append)
+        requests_mocker.post(
+            "https://api.notion.com/v1/pages",
+            [
+                {"status_code": 429, "json": {"code": "rate_limited"}},
+                {"json": {"id": "new_page"}},
+            ]
+        )
+        # When
+        self.manager.create_page("database_id_12345678", [PropertyValue("property1", True)])
+        # Then
+        self.assertEqual(1, len(events))
+        event = events[0]
+        self.assertEqual(("POST", "/v1/pages", 200, 1), (event.method, event.endpoint, event.status_code, event.retries))
+        self.assertEqual(len(requests_mocker.last_request.body), event.request_bytes)
+        self.assertEqual(len('{"id": "new_page"}'), event.response_bytes)
+        self.assertEqual(sleep.call_args[0][0], event.retry_wait)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_instrumentation_stats_separate_network_and_decode_time(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A"), ("page_2", "B")], [("page_3", "C")]])
+        # When
+        self.manager.get_database("database_id_12345678")
+        stats = self.manager.instrumentation.get_stats()
+        # Then
+        self.assertEqual({"POST /v1/databases/{id}/query": 2}, stats.requests_by_endpoint)
+        self.assertEqual(3, stats.decoded_pages)
+        self.assertGreater(stats.decode_time, 0)
+        self.assertGreater(stats.network_time, 0)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_database_compact_and_arrow_outputs(self, requests_mocker):
+        # Given
+        self._mock_query_segments(requests_mocker, [[("page_1", "A"), ("page_2", "B")]])
+        # When
+        compact = self.manager.get_database("database_id_12345678", output="compact")
+        table = self.manager.get_database("database_id_12345678", output="arrow")
+        # Then
+        self.assertIsInstance(compact["property3"].dtype, pd.CategoricalDtype)
+        self.assertEqual(["page_1", "page_2"], table.column("page_id").to_pylist())
+        with self.assertRaises(ValueError):
+            self.manager.get_database("database_id_12345678", output="polars")
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_resolve_relations_joins_related_pages_reading_the_target_database_once(self, requests_mocker):
+        # Given
+        self.manager._property_types["target_database_id"] = {"Name": PropertyType.TITLE}
+        target_query = requests_mocker.post(
+            "https://api.notion.com/v1/databases/target_database_id/query",
+            json={
+                "results": [
+                    {"id": page_id, "properties": {"Name": {"type": "title", "title": [{"plain_text": name}]}}}
+                    for page_id, name in [("target_1", "First"), ("target_2", "Second")]
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        dataframe = pd.DataFrame(
+            {"Tasks": [["target_1", "target_2"], [], ["target_2", "deleted"]]}, index=["page_1", "page_2", "page_3"]
+        )
+        # When
+        resolved = self.manager.resolve_relations(dataframe, "Tasks", "target_database_id")
+        self.manager.resolve_relations(dataframe.head(1), "Tasks", "target_database_id")
+        # Then
+        self.assertEqual(1, target_query.call_count)
+        self.assertEqual(["page_1", "page_1", "page_2", "page_3", "page_3"], list(resolved.index))
+        self.assertEqual(["Tasks", "Tasks.Name"], list(resolved.columns))
+        self.assertEqual(["First", "Second"], list(resolved["Tasks.Name"].iloc[:2]))
+        self.assertEqual([True, False, True], list(resolved["Tasks.Name"].iloc[2:].isna()))
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_databases_returns_a_dataframe_per_database(self, requests_mocker):
+        # Given
+        self.manager.database_ids = ["database_1", "database_2"]
+        for database_id in self.manager.database_ids:
+            self.manager._property_types[database_id] = {"name": PropertyType.TITLE}
+            requests_mocker.post(
+                f"https://api.notion.com/v1/databases/{database_id}/query",
+                json={
+                    "results": [{"id": f"{database_id}_page", "properties": {"name": {"type": "title", "title": []}}}],
+                    "next_cursor": None,
+                    "has_more": False
+                }
+            )
+        # When
+        dataframes = self.manager.get_databases(output="compact")
+        # Then
+        self.assertEqual(["database_1", "database_2"], list(dataframes))
+        self.assertEqual(["database_2_page"], list(dataframes["database_2"].index))
+
+    def test_get_database_partitioned_requires_a_number_or_date_property(self):
+        with self.assertRaises(ValueError):
+            self.manager.get_database_partitioned("database_id_12345678", "property3")
+
+    def test_partition_boundaries_split_the_range_evenly_and_dates_by_whole_days(self):
+        # When
+        numbers = self.manager._get_partition_boundaries(0.0, 10.0, 4, PropertyType.NUMBER)
+        dates = self.manager._get_partition_boundaries(
+            pd.Timestamp("2022-03-01T10:00"), pd.Timestamp("2022-03-03T08:00"), 4, PropertyType.DATE
+        )
+        # Then
+        self.assertEqual([2.5, 5.0, 7.5], numbers)
+        self.assertEqual([datetime.date(2022, 3, 2)], dates)
+
+    @requests_mock.Mocker(kw="requests_mocker")
+    def test_get_records_returns_plain_python_values(self, requests_mocker):
+        # Given
+        requests_mocker.post(
+            "https://api.notion.com/v1/databases/database_id_12345678/query",
+            json={
+                "results": [
+                    {
+                        "id": "page_1",
+                        "properties": {
+                            "property1": {"type": "checkbox", "checkbox": True},
+                            "property3": {"type": "select", "select": {"name": "A"}},
+                        }
+                    },
+                    {"id": "page_2", "properties": {"property1": {"type": "checkbox", "checkbox": False}}},
+                ],
+                "next_cursor": None,
+                "has_more": False
+            }
+        )
+        # When
+        records = self.manager.get_records("database_id_12345678")
+        # Then
+        self.assertEqual(
+            [
+                PageRecord("page_1", {"property1": True, "property3": "A"}),
+                PageRecord("page_2", {"property1": False, "property3": None}),
+            ],
+            records
+        )
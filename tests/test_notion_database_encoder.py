@@ -1,8 +1,11 @@
+import json
 import unittest
 
+import numpy as np
 import pandas as pd
 
-from notionapimanager.notion_property_encoder import NotionPropertyEncoder, PropertyType
+from notionapimanager.notion_property_encoder import ColumnarNotionPropertyDecoder, ColumnarNotionPropertyEncoder, \
+    NotionPropertyDecoder, NotionPropertyEncoder, PropertyType
 
 
 class NotionPropertyEncoderTests(unittest.TestCase):
@@ -117,3 +120,209 @@ class NotionPropertyEncoderTests(unittest.TestCase):
             },
             result
         )
+
+    def test_encode_relation_ids(self):
+        # Given
+        encoder = NotionPropertyEncoder()
+        # When
+        result = encoder.encode(["page_1", "page_2"], PropertyType.RELATION)
+        # Then
+        self.assertEqual({"relation": [{"id": "page_1"}, {"id": "page_2"}]}, result)
+
+
+class NotionPropertyDecoderTests(unittest.TestCase):
+    def test_decode_title_select_and_relation(self):
+        # Given
+        decoder = NotionPropertyDecoder()
+        properties = {
+            "name": {"type": "title", "title": [{"plain_text": "Some title"}]},
+            "category": {"type": "select", "select": {"name": "option 1"}},
+            "tasks": {"type": "relation", "relation": [{"id": "page_1"}, {"id": "page_2"}]},
+        }
+        # When
+        result = {name: decoder.decode(value) for name, value in properties.items()}
+        # Then
+        self.assertEqual({"name": "Some title", "category": "option 1", "tasks": ["page_1", "page_2"]}, result)
+
+    def test_decode_empty_select_and_date(self):
+        # Given
+        decoder = NotionPropertyDecoder()
+        # When
+        results = [
+            decoder.decode({"type": "select", "select": None}),
+            decoder.decode({"type": "date", "date": None}),
+        ]
+        # Then
+        self.assertEqual([None, None], results)
+
+
+class ColumnarNotionPropertyDecoderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.decoder = ColumnarNotionPropertyDecoder({
+            "category": PropertyType.SELECT,
+            "name": PropertyType.TITLE,
+            "day": PropertyType.DATE,
+            "amount": PropertyType.NUMBER,
+            "done": PropertyType.CHECKBOX,
+            "other": PropertyType.UNKNOWN,
+        })
+
+    def test_extract_column_of_each_type_including_empty_values(self):
+        # When
+        results = [
+            self.decoder.extract_column(
+                "category", [{"type": "select", "select": {"name": "A"}}, {"type": "select", "select": None}, None]
+            ),
+            self.decoder.extract_column(
+                "name", [{"type": "title", "title": [{"plain_text": "Some title"}]}, {"type": "title", "title": []}]
+            ),
+            self.decoder.extract_column(
+                "day", [{"type": "date", "date": {"start": "2022-03-04", "end": None}}, {"type": "date", "date": None}]
+            ),
+            self.decoder.extract_column("other", [{"type": "relation", "relation": [{"id": "page_id"}]}]),
+        ]
+        # Then
+        self.assertEqual(
+            [["A", None, None], ["Some title", None], ["2022-03-04", None], [["page_id"]]],
+            results
+        )
+
+    def test_properties_missing_from_schema_are_planned_from_their_type_in_the_pages(self):
+        # When
+        extracted = self.decoder.extract_column(
+            "new_property", [None, {"type": "date", "date": {"start": "2022-03-04"}}]
+        )
+        column = self.decoder.finalize_column("new_property", extracted)
+        # Then
+        self.assertEqual([None, "2022-03-04"], extracted)
+        self.assertEqual([True, False], list(pd.isna(column)))
+        self.assertEqual(pd.Timestamp("2022-03-04"), column[1])
+
+    def test_column_with_all_values_missing_is_not_planned(self):
+        self.assertEqual([None, None], self.decoder.extract_column("new_property", [None, None]))
+
+    def test_finalize_column_converts_whole_columns_to_native_types(self):
+        # When
+        done = self.decoder.finalize_column("done", [True, False])
+        amount = self.decoder.finalize_column("amount", [1, None])
+        day = self.decoder.finalize_column("day", ["2022-03-04", "2022-03-05T10:00:00.000"])
+        # Then
+        self.assertEqual("bool", done.dtype)
+        self.assertEqual("float64", amount.dtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(day.dtype))
+        self.assertEqual(["not a number"], self.decoder.finalize_column("amount", ["not a number"]))
+
+    def test_finalize_column_with_dates_in_different_time_zones_parses_each_date(self):
+        # When
+        day = self.decoder.finalize_column("day", ["2022-03-04", "2022-03-04T10:00:00+02:00", None])
+        # Then
+        self.assertEqual(
+            [pd.Timestamp("2022-03-04"), pd.Timestamp("2022-03-04T10:00:00+02:00"), None],
+            day
+        )
+
+
+class ColumnarNotionPropertyEncoderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.property_types = {
+            "name": PropertyType.TITLE,
+            "notes": PropertyType.RICH_TEXT,
+            "category": PropertyType.SELECT,
+            "day": PropertyType.DATE,
+            "done": PropertyType.CHECKBOX,
+            "amount": PropertyType.NUMBER,
+            "tasks": PropertyType.RELATION,
+        }
+
+    def test_encode_dataframe_gives_the_same_values_as_the_per_cell_encoder(self):
+        # Given
+        dataframe = pd.DataFrame({
+            "name": ["First", "Second"],
+            "notes": ["Some notes", "Other notes"],
+            "category": ["A", "B"],
+            "day": pd.to_datetime(["2022-03-04", "2022-03-05"]),
+            "done": [True, False],
+            "amount": [1.5, 2.0],
+            "tasks": [["page_1", "page_2"], []],
+        })
+        encoder = NotionPropertyEncoder()
+        # When
+        result = ColumnarNotionPropertyEncoder(self.property_types, dataframe.columns).encode_dataframe(dataframe)
+        # Then
+        self.assertEqual(
+            [
+                {name: encoder.encode(value, self.property_types[name]) for name, value in row.items()}
+                for row in dataframe.to_dict("records")
+            ],
+            result
+        )
+
+    def test_encode_dataframe_with_dates_in_different_time_zones_formats_each_date(self):
+        # Given
+        days = ["2022-03-04T23:30:00.000+01:00", "2022-07-04T10:00:00.000+02:00", "2022-08-01", None]
+        decoder = ColumnarNotionPropertyDecoder({"day": PropertyType.DATE})
+        dataframe = pd.DataFrame({"day": decoder.finalize_column("day", days)})
+        # When
+        result = ColumnarNotionPropertyEncoder(self.property_types, dataframe.columns).encode_dataframe(dataframe)
+        # Then
+        self.assertEqual(
+            [
+                {"day": {"date": {"start": "2022-03-04", "end": None, "time_zone": None}}},
+                {"day": {"date": {"start": "2022-07-04", "end": None, "time_zone": None}}},
+                {"day": {"date": {"start": "2022-08-01", "end": None, "time_zone": None}}},
+                {},
+            ],
+            result
+        )
+
+    def test_encode_dataframe_skips_missing_values(self):
+        # Given
+        dataframe = pd.DataFrame({
+            "category": ["A", None],
+            "day": [pd.NaT, pd.Timestamp("2022-03-04")],
+            "done": [None, True],
+            "amount": [np.nan, 3],
+        })
+        # When
+        result = ColumnarNotionPropertyEncoder(self.property_types, dataframe.columns).encode_dataframe(dataframe)
+        # Then
+        self.assertEqual(
+            [
+                {"category": {"select": {"name": "A"}}},
+                {
+                    "day": {"date": {"start": "2022-03-04", "end": None, "time_zone": None}},
+                    "done": {"checkbox": True},
+                    "amount": {"number": 3.0},
+                },
+            ],
+            result
+        )
+
+    def test_encode_dataframe_converts_numpy_values_to_native_types(self):
+        # Given
+        dataframe = pd.DataFrame({"done": np.array([True]), "amount": np.array([7], dtype=np.int64)})
+        # When
+        result = ColumnarNotionPropertyEncoder(self.property_types, dataframe.columns).encode_dataframe(dataframe)
+        # Then
+        self.assertEqual('[{"done": {"checkbox": true}, "amount": {"number": 7.0}}]', json.dumps(result))
+
+    def test_empty_values_clear_each_column(self):
+        # When
+        encoder = ColumnarNotionPropertyEncoder(self.property_types, ["name", "category", "done"])
+        # Then
+        self.assertEqual(
+            {"name": {"title": []}, "category": {"select": None}, "done": {"checkbox": False}},
+            encoder.empty_values
+        )
+
+    def test_columns_without_an_encodable_property_are_rejected(self):
+        with self.assertRaises(ValueError):
+            ColumnarNotionPropertyEncoder(self.property_types, ["name", "unknown_property"])
+
+    def test_normalize_replaces_missing_values_and_empty_texts_with_empty_values(self):
+        # Given
+        encoder = ColumnarNotionPropertyEncoder(self.property_types, ["name", "done", "amount"])
+        # When
+        result = encoder.normalize({"name": {"title": [{"text": {"content": ""}}]}, "amount": {"number": 2.0}})
+        # Then
+        self.assertEqual({"name": {"title": []}, "done": {"checkbox": False}, "amount": {"number": 2.0}}, result)
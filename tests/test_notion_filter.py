@@ -0,0 +1,126 @@
+import datetime
+import unittest
+
+from notionapimanager.notion_filter import Filter, Property, range_partitions, Sort
+from notionapimanager.notion_property_encoder import PropertyType
+
+
+class NotionFilterTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.property_types = {
+            "Name": PropertyType.TITLE,
+            "Price": PropertyType.NUMBER,
+            "Day": PropertyType.DATE,
+            "Category": PropertyType.SELECT,
+            "Done": PropertyType.CHECKBOX,
+            "Other": PropertyType.UNKNOWN,
+        }
+
+    def test_text_condition(self):
+        # When
+        result = Property("Name").starts_with("Chapter").compile(self.property_types)
+        # Then
+        self.assertEqual({"property": "Name", "title": {"starts_with": "Chapter"}}, result)
+
+    def test_comparison_operators_on_numbers(self):
+        # When
+        results = [
+            (Property("Price") > 1).compile(self.property_types),
+            (Property("Price") <= 2).compile(self.property_types),
+        ]
+        # Then
+        self.assertEqual(
+            [
+                {"property": "Price", "number": {"greater_than": 1}},
+                {"property": "Price", "number": {"less_than_or_equal_to": 2}},
+            ],
+            results
+        )
+
+    def test_comparison_operators_on_dates_encode_dates_in_iso_format(self):
+        # When
+        results = [
+            (Property("Day") >= datetime.date(2022, 3, 4)).compile(self.property_types),
+            (Property("Day") < datetime.datetime(2022, 3, 4, 10, 30)).compile(self.property_types),
+        ]
+        # Then
+        self.assertEqual(
+            [
+                {"property": "Day", "date": {"on_or_after": "2022-03-04"}},
+                {"property": "Day", "date": {"before": "2022-03-04T10:30:00"}},
+            ],
+            results
+        )
+
+    def test_is_empty(self):
+        # When
+        result = Property("Category").is_empty().compile(self.property_types)
+        # Then
+        self.assertEqual({"property": "Category", "select": {"is_empty": True}}, result)
+
+    def test_nested_compound_filters_with_the_same_operator_are_flattened(self):
+        # Given
+        compound_filter = (
+            Property("Done").equals(True) & Property("Price").is_not_empty() & (
+                Property("Category").equals("A") | Property("Category").does_not_equal("B")
+            )
+        )
+        # When
+        result = compound_filter.compile(self.property_types)
+        # Then
+        self.assertEqual(
+            {
+                "and": [
+                    {"property": "Done", "checkbox": {"equals": True}},
+                    {"property": "Price", "number": {"is_not_empty": True}},
+                    {
+                        "or": [
+                            {"property": "Category", "select": {"equals": "A"}},
+                            {"property": "Category", "select": {"does_not_equal": "B"}},
+                        ]
+                    },
+                ]
+            },
+            result
+        )
+
+    def test_unsupported_condition_for_property_type_raises_error(self):
+        with self.assertRaises(ValueError):
+            Property("Category").contains("A").compile(self.property_types)
+        with self.assertRaises(ValueError):
+            Property("Other").equals("A").compile(self.property_types)
+
+    def test_unknown_property_raises_error(self):
+        with self.assertRaises(ValueError):
+            Property("Missing").equals("A").compile(self.property_types)
+
+    def test_base_filter_cannot_be_compiled(self):
+        with self.assertRaises(NotImplementedError):
+            Filter().compile(self.property_types)
+
+    def test_sort(self):
+        self.assertEqual({"property": "Price", "direction": "ascending"}, Sort("Price").compile())
+        self.assertEqual({"property": "Price", "direction": "descending"}, Sort("Price", descending=True).compile())
+
+    def test_range_partitions_cover_every_value_once(self):
+        # When
+        results = [partition.compile(self.property_types) for partition in range_partitions("Price", [10, 20])]
+        # Then
+        self.assertEqual(
+            [
+                {"property": "Price", "number": {"less_than": 10}},
+                {
+                    "and": [
+                        {"property": "Price", "number": {"greater_than_or_equal_to": 10}},
+                        {"property": "Price", "number": {"less_than": 20}},
+                    ]
+                },
+                {"property": "Price", "number": {"greater_than_or_equal_to": 20}},
+                {"property": "Price", "number": {"is_empty": True}},
+            ],
+            results
+        )
+        self.assertEqual(
+            [{"property": "Price", "number": {"is_not_empty": True}}, {"property": "Price", "number": {"is_empty": True}}],
+            [partition.compile(self.property_types) for partition in range_partitions("Price", [])]
+        )
@@ -0,0 +1,59 @@
+import unittest
+
+from notionapimanager.rate_limiter import RateLimiter
+from tests.helpers.fake_clock import FakeClock
+
+
+class RateLimiterTests(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.clock = FakeClock()
+
+    def test_burst_up_to_capacity_does_not_wait(self):
+        # Given
+        limiter = RateLimiter(3, clock=self.clock, sleep=self.clock.sleep)
+        # When
+        waits = [limiter.acquire() for _ in range(3)]
+        # Then
+        self.assertEqual([0, 0, 0], waits)
+
+    def test_requests_beyond_capacity_wait_for_the_refill(self):
+        # Given
+        limiter = RateLimiter(2, capacity=1, clock=self.clock, sleep=self.clock.sleep)
+        # When
+        for _ in range(5):
+            limiter.acquire()
+        # Then
+        self.assertAlmostEqual(2.0, self.clock.now)
+
+    def test_idle_time_refills_the_bucket_up_to_capacity(self):
+        # Given
+        limiter = RateLimiter(1, capacity=2, clock=self.clock, sleep=self.clock.sleep)
+        limiter.acquire()
+        limiter.acquire()
+        # When
+        self.clock.now += 100
+        waits = [limiter.acquire() for _ in range(3)]
+        # Then
+        self.assertEqual([0, 0], waits[:2])
+        self.assertAlmostEqual(1.0, waits[2])
+
+    def test_pause_delays_the_next_requests(self):
+        # Given
+        limiter = RateLimiter(2, capacity=2, clock=self.clock, sleep=self.clock.sleep)
+        # When
+        limiter.pause(3)
+        wait = limiter.acquire()
+        # Then
+        self.assertAlmostEqual(3.5, wait)
+
+    async def test_acquire_async_shares_the_bucket_with_acquire(self):
+        # Given
+        limiter = RateLimiter(
+            1, capacity=1, clock=self.clock, sleep=self.clock.sleep, async_sleep=self.clock.async_sleep
+        )
+        limiter.acquire()
+        # When
+        wait = await limiter.acquire_async()
+        # Then
+        self.assertAlmostEqual(1.0, wait)
+        self.assertAlmostEqual(1.0, self.clock.now)
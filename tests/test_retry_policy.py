@@ -0,0 +1,61 @@
+import unittest
+
+from notionapimanager.retry_policy import NotionApiError, RetryPolicy
+
+
+class RetryPolicyTests(unittest.TestCase):
+    def test_retry_after_header_takes_precedence_over_backoff(self):
+        # Given
+        policy = RetryPolicy()
+        # When
+        delay = policy.get_delay(429, "7", attempt=3)
+        # Then
+        self.assertEqual(7.0, delay)
+
+    def test_backoff_grows_exponentially_up_to_the_maximum(self):
+        # Given
+        policy = RetryPolicy(max_retries=10, backoff_factor=0.5, max_backoff=3)
+        # When
+        delays = [policy.get_delay(503, None, attempt) for attempt in range(5)]
+        # Then
+        self.assertEqual([0.5, 1, 2, 3, 3], delays)
+
+    def test_invalid_retry_after_header_falls_back_to_backoff(self):
+        # Given
+        policy = RetryPolicy(backoff_factor=1)
+        # When
+        delay = policy.get_delay(429, "Wed, 21 Oct 2015 07:28:00 GMT", attempt=1)
+        # Then
+        self.assertEqual(2, delay)
+
+    def test_no_retry_for_client_errors_or_after_max_retries(self):
+        # Given
+        policy = RetryPolicy(max_retries=2)
+        # Then
+        self.assertIsNone(policy.get_delay(400, None, attempt=0))
+        self.assertIsNone(policy.get_delay(500, None, attempt=2))
+
+    def test_server_errors_of_non_idempotent_requests_are_only_retried_when_enabled(self):
+        # Given
+        policy = RetryPolicy(backoff_factor=1)
+        enabled_policy = RetryPolicy(backoff_factor=1, retry_non_idempotent_server_errors=True)
+        # Then
+        self.assertIsNone(policy.get_delay(503, None, attempt=0, idempotent=False))
+        self.assertEqual(1, policy.get_delay(429, None, attempt=0, idempotent=False))
+        self.assertEqual(1, enabled_policy.get_delay(503, None, attempt=0, idempotent=False))
+
+
+class NotionApiErrorTests(unittest.TestCase):
+    def test_from_json_error_body(self):
+        # When
+        error = NotionApiError.from_response_body(
+            409, '{"object": "error", "code": "conflict_error", "message": "Conflict occurred"}'
+        )
+        # Then
+        self.assertEqual((409, "conflict_error", "Conflict occurred"), (error.status_code, error.code, error.message))
+
+    def test_from_non_json_error_body(self):
+        # When
+        error = NotionApiError.from_response_body(502, "<html>Bad gateway</html>")
+        # Then
+        self.assertEqual((502, None, "<html>Bad gateway</html>"), (error.status_code, error.code, error.message))